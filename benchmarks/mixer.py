@@ -0,0 +1,52 @@
+"""
+Time of one mixer block against the JACK period it has to fit into. No JACK
+needed: measures matrix work of the process callback only.
+
+    python benchmarks/mixer.py --inputs 32 --outputs 16 --blocksize 64
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from jackson.mixer import MixMatrix, smoothing_factor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--inputs", type=int, default=32)
+    parser.add_argument("--outputs", type=int, default=16)
+    parser.add_argument("--blocksize", type=int, default=64)
+    parser.add_argument("--rate", type=int, default=48000)
+    parser.add_argument("--blocks", type=int, default=100_000)
+    args = parser.parse_args()
+
+    matrix = MixMatrix(inputs=args.inputs, outputs=args.outputs)
+    for output in range(args.outputs):
+        for input in range(args.inputs):
+            matrix.set_gain(output, input, 0.5)
+
+    rng = np.random.default_rng(0)
+    shape = (args.inputs, args.blocksize)
+    block_in = rng.uniform(-1, 1, shape).astype(np.float32)
+    block_out = np.zeros((args.outputs, args.blocksize), dtype=np.float32)
+    smoothing = smoothing_factor(args.blocksize, args.rate, 0.02)
+
+    timings = np.zeros(args.blocks)
+    for idx in range(args.blocks):
+        start = time.perf_counter()
+        matrix.process(block_in, block_out, smoothing)
+        timings[idx] = time.perf_counter() - start
+
+    period_us = args.blocksize / args.rate * 1_000_000
+    median, p99, worst = np.percentile(timings * 1_000_000, [50, 99, 100])
+    print(
+        f"{args.inputs}x{args.outputs} at {args.blocksize} frames:"
+        + f" median {median:.1f} us, p99 {p99:.1f} us, max {worst:.1f} us"
+        + f" of {period_us:.0f} us period"
+    )
+
+
+if __name__ == "__main__":
+    main()
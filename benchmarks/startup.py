@@ -0,0 +1,214 @@
+"""
+Time from starting `jackson server` and `jackson client` until every
+connection in client's map exists on both sides.
+
+Both run on this machine with the JACK dummy driver and separate JACK server
+names. JackTrip is replaced by "stub" transport. Each run appends a line to
+results file so numbers can be compared over time:
+
+    python benchmarks/startup.py --runs 5
+"""
+
+import argparse
+import json
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import jack
+import yaml
+from jack_server import SampleRate
+
+from jackson.port_connection import ConnectionMap
+from jackson.settings import ClientSettings
+
+BENCHMARKS = Path(__file__).parent
+SERVER_NAME = "JacksonBenchServer"
+CLIENT_NAME = "JacksonBenchClient"
+
+
+def get_configs(
+    channels: int,
+    api_port: int,
+    sample_rate: SampleRate = 48000,
+    buffer_size: int = 256,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    # Dummy driver gets as many capture and playback ports as are streamed
+    audio = {"driver": "dummy", "device": None, "channels": channels}
+    server = {
+        "audio": audio
+        | {
+            "jack_server_name": SERVER_NAME,
+            "sample_rate": sample_rate,
+            "buffer_size": buffer_size,
+        },
+        "server": {"jacktrip_port": api_port + 1, "api_port": api_port},
+        "transport": "stub",
+    }
+    client = {
+        "name": "Bench",
+        "audio": audio | {"jack_server_name": CLIENT_NAME},
+        "server": {
+            "jacktrip_port": api_port + 1,
+            "api_port": api_port,
+            "host": "127.0.0.1",
+        },
+        "transport": "stub",
+        "network": {"probe": False},
+        "ports": {
+            "receive": {f"1..{channels}": f"1..{channels}"},
+            "send": {f"1..{channels}": f"1..{channels}"},
+        },
+    }
+    return server, client
+
+
+def open_jack_client(server_name: str) -> jack.Client | None:
+    try:
+        return jack.Client("Bench", no_start_server=True, servername=server_name)
+    except jack.JackError:
+        return None
+
+
+def is_connected(client: jack.Client | None, source: str, destination: str) -> bool:
+    if not client:
+        return False
+    try:
+        connections = client.get_all_connections(source)  # pyright: ignore
+    except jack.JackError:
+        return False
+    return any(p.name == destination for p in connections)
+
+
+def count_missing(
+    map: ConnectionMap, server: jack.Client | None, client: jack.Client | None
+) -> int:
+    missing = 0
+    for conn in map.values():
+        local = [str(p) for p in conn.get_local_connection()]
+        remote = [str(p) for p in conn.get_remote_connection()]
+        missing += not is_connected(client, *local)
+        missing += not is_connected(server, *remote)
+    return missing
+
+
+def spawn(mode: str, config: Path) -> subprocess.Popen[bytes]:
+    cmd = [sys.executable, "-m", "jackson.main", mode, "--config", str(config)]
+    return subprocess.Popen(
+        cmd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def stop(process: subprocess.Popen[bytes]) -> None:
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+@dataclass
+class Graph:
+    connect_time: float  # Until every connection existed, in seconds
+    server: jack.Client  # Inactive clients on both JACK servers
+    client: jack.Client
+    processes: list[subprocess.Popen[bytes]]  # `jackson server`, `jackson client`
+
+
+@contextmanager
+def start_graph(
+    workdir: Path,
+    server_config: dict[str, Any],
+    client_config: dict[str, Any],
+    timeout: float,
+) -> Generator[Graph, None, None]:
+    """Start server and client, wait until connected, stop them on exit."""
+    (workdir / "server.yaml").write_text(yaml.safe_dump(server_config))
+    (workdir / "client.yaml").write_text(yaml.safe_dump(client_config))
+    map = ClientSettings.load(client_config).connection_map
+
+    start = time.perf_counter()
+    processes = [
+        spawn("server", workdir / "server.yaml"),
+        spawn("client", workdir / "client.yaml"),
+    ]
+    server = client = None
+    try:
+        while True:
+            server = server or open_jack_client(SERVER_NAME)
+            client = client or open_jack_client(CLIENT_NAME)
+            if server and client and not count_missing(map, server, client):
+                break
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(f"Graph wasn't connected in {timeout} s")
+            time.sleep(0.01)
+
+        yield Graph(time.perf_counter() - start, server, client, processes)
+    finally:
+        for jack_client in (server, client):
+            if jack_client:
+                jack_client.close()
+        for process in reversed(processes):
+            stop(process)
+
+
+def run_once(workdir: Path, channels: int, timeout: float) -> float:
+    server_config, client_config = get_configs(channels, api_port=18000)
+    with start_graph(workdir, server_config, client_config, timeout) as graph:
+        return graph.connect_time
+
+
+def get_commit() -> str:
+    result = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+    )
+    return result.stdout.strip()
+
+
+def silence(message: str) -> None:
+    pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--results", type=Path, default=BENCHMARKS / "results.jsonl")
+    args = parser.parse_args()
+
+    # Clients fail to open until JACK servers are up
+    jack.set_error_function(silence)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        times: list[float] = []
+        for idx in range(args.runs):
+            times.append(run_once(Path(tmp), args.channels, args.timeout))
+            print(f"Run {idx + 1}: {times[-1]:.3f} s")
+
+    result = {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": get_commit(),
+        "channels": args.channels,
+        "runs": times,
+        "best": min(times),
+        "median": sorted(times)[len(times) // 2],
+    }
+    with open(args.results, "a") as f:
+        f.write(json.dumps(result) + "\n")
+    print(f"Best {result['best']:.3f} s, median {result['median']:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Grid of sample rate × buffer size × channel count, to pick defaults for a
+new server and to catch regressions between releases.
+
+Each configuration starts `jackson server` and `jackson client` like
+`startup.py` does (dummy driver, "stub" transport) and records:
+
+- connect time: from start until every connection exists on both sides,
+- JACK DSP load of both servers, mean and max over `--settle` seconds,
+- xruns of both servers during that time (startup ones aren't counted),
+- peak RSS of both Jackson processes with their children (JACK server runs
+  inside Jackson's process, transport in a child).
+
+Report is written as CSV and JSON next to each other:
+
+    python benchmarks/sweep.py --periods 64 128 256 --channels 2 16 64
+"""
+
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import product
+from pathlib import Path
+from typing import Any, get_args
+
+import jack
+from jack_server import SampleRate
+from startup import BENCHMARKS, Graph, get_commit, get_configs, silence, start_graph
+
+FIELDS = [
+    "sample_rate",
+    "buffer_size",
+    "channels",
+    "connect_s",
+    "server_dsp_load_mean",
+    "server_dsp_load_max",
+    "client_dsp_load_mean",
+    "client_dsp_load_max",
+    "server_xruns",
+    "client_xruns",
+    "server_rss_mb",
+    "client_rss_mb",
+    "error",
+]
+
+
+def get_process_tree(pid: int) -> list[int]:
+    pids = [pid]
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                for child in f.read().split():
+                    pids += get_process_tree(int(child))
+    except OSError:  # Exited in between
+        pass
+    return pids
+
+
+def read_rss_mb(pid: int) -> float:
+    """Resident memory of process and its descendants."""
+    total_kb = 0
+    for pid_ in get_process_tree(pid):
+        try:
+            with open(f"/proc/{pid_}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+        except OSError:  # Exited in between
+            continue
+    return total_kb / 1024
+
+
+def measure(graph: Graph, settle: float) -> dict[str, Any]:
+    sides = {"server": graph.server, "client": graph.client}
+    xruns = dict.fromkeys(sides, 0)
+    loads: dict[str, list[float]] = {side: [] for side in sides}
+    rss = dict.fromkeys(sides, 0.0)
+
+    def count_xrun(side: str):
+        def callback(delayed_usecs: float) -> None:
+            xruns[side] += 1
+
+        return callback
+
+    for side, client in sides.items():
+        client.set_xrun_callback(count_xrun(side))
+        client.activate()
+
+    end = time.perf_counter() + settle
+    while time.perf_counter() < end:
+        for (side, client), process in zip(sides.items(), graph.processes):
+            loads[side].append(client.cpu_load())
+            rss[side] = max(rss[side], read_rss_mb(process.pid))
+        time.sleep(0.1)
+
+    result: dict[str, Any] = {"connect_s": round(graph.connect_time, 3)}
+    for side in sides:
+        result[f"{side}_dsp_load_mean"] = round(sum(loads[side]) / len(loads[side]), 2)
+        result[f"{side}_dsp_load_max"] = round(max(loads[side]), 2)
+        result[f"{side}_xruns"] = xruns[side]
+        result[f"{side}_rss_mb"] = round(rss[side], 1)
+    return result
+
+
+def run_config(
+    workdir: Path,
+    sample_rate: SampleRate,
+    buffer_size: int,
+    channels: int,
+    settle: float,
+    timeout: float,
+) -> dict[str, Any]:
+    row: dict[str, Any] = {
+        "sample_rate": sample_rate,
+        "buffer_size": buffer_size,
+        "channels": channels,
+    }
+    server_config, client_config = get_configs(
+        channels, api_port=18000, sample_rate=sample_rate, buffer_size=buffer_size
+    )
+    try:
+        with start_graph(workdir, server_config, client_config, timeout) as graph:
+            row |= measure(graph, settle)
+    except (TimeoutError, jack.JackError) as exc:
+        row["error"] = str(exc)
+    return row
+
+
+def format_row(row: dict[str, Any]) -> str:
+    config = (
+        f"{row['sample_rate']} Hz, {row['buffer_size']} frames, {row['channels']} ch"
+    )
+    if "error" in row:
+        return f"{config}: {row['error']}"
+    return (
+        f"{config}: connect {row['connect_s']:.3f} s,"
+        + f" DSP {row['server_dsp_load_max']:.1f}% / {row['client_dsp_load_max']:.1f}%,"
+        + f" xruns {row['server_xruns']} / {row['client_xruns']}"
+    )
+
+
+def write_report(path: Path, rows: list[dict[str, Any]]) -> None:
+    with open(path.with_suffix(".csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    report = {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": get_commit(),
+        "results": rows,
+    }
+    with open(path.with_suffix(".json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    rates = get_args(SampleRate)
+    parser.add_argument("--rates", type=int, nargs="+", choices=rates, default=rates)
+    parser.add_argument("--periods", type=int, nargs="+", default=[64, 128, 256, 512])
+    parser.add_argument("--channels", type=int, nargs="+", default=[2, 8, 32])
+    parser.add_argument("--settle", type=float, default=5)  # Measured, in seconds
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--report", type=Path, default=BENCHMARKS / "sweep")
+    args = parser.parse_args()
+
+    # Clients fail to open until JACK servers are up
+    jack.set_error_function(silence)
+
+    rows: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rate, period, channels in product(args.rates, args.periods, args.channels):
+            rows.append(
+                run_config(Path(tmp), rate, period, channels, args.settle, args.timeout)
+            )
+            print(format_row(rows[-1]))
+
+    write_report(args.report, rows)
+    print(f"Report: {args.report.with_suffix('.csv')}, .json")
+
+
+if __name__ == "__main__":
+    main()
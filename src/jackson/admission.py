@@ -0,0 +1,75 @@
+import math
+import threading
+from dataclasses import dataclass, field
+
+from pydantic import BaseModel
+
+DEFAULT_MAX_PENDING = 8
+
+
+class Overloaded(BaseModel):
+    pending: int
+    retry_after: int  # In seconds
+
+
+class AdmissionMetrics(BaseModel):
+    pending: int
+    max_pending: int
+    peak_pending: int
+    admitted: int
+    rejected: int
+    average_latency_ms: float
+
+
+@dataclass
+class AdmissionControl:
+    """
+    Bounds graph operations that are running or waiting for connector lock.
+    Ones over the limit are turned away at once, with an estimate of when to
+    come back, instead of piling up behind everyone else. Thread-safe.
+    """
+
+    max_pending: int = DEFAULT_MAX_PENDING
+    smoothing: float = 0.2  # Weight of the latest sample in average latency
+
+    lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+    pending: int = field(default=0, init=False)
+    peak_pending: int = field(default=0, init=False)
+    admitted: int = field(default=0, init=False)
+    rejected: int = field(default=0, init=False)
+    average_latency: float = field(default=0, init=False)  # In seconds
+
+    def enter(self) -> Overloaded | None:
+        """Take a slot. Returns reason if there's none left."""
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                # Queue that is full now takes about one latency to drain
+                retry_after = max(1, math.ceil(self.average_latency))
+                return Overloaded(pending=self.pending, retry_after=retry_after)
+
+            self.pending += 1
+            self.admitted += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+
+    def leave(self, latency: float) -> None:
+        """Free slot taken by `enter()`. `latency` includes waiting for lock."""
+        with self.lock:
+            self.pending -= 1
+            if self.average_latency:
+                self.average_latency += self.smoothing * (
+                    latency - self.average_latency
+                )
+            else:
+                self.average_latency = latency
+
+    def metrics(self) -> AdmissionMetrics:
+        with self.lock:
+            return AdmissionMetrics(
+                pending=self.pending,
+                max_pending=self.max_pending,
+                peak_pending=self.peak_pending,
+                admitted=self.admitted,
+                rejected=self.rejected,
+                average_latency_ms=self.average_latency * 1000,
+            )
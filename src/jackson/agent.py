@@ -0,0 +1,449 @@
+"""
+JACK agent: process that owns the helper JACK client, sessions and meters and
+serves them to API workers over a Unix domain socket.
+
+Protocol is newline-delimited JSON. Request is a batch of commands
+`[[method, params], ...]`, response is a list of results in the same order:
+`[[true, value], ...]` or `[false, {"type": ..., "data": ...}]` for failures.
+"""
+
+import contextlib
+import json
+import os
+import socket
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING, Any
+
+import anyio
+import uvicorn
+from anyio.abc import SocketStream, TaskStatus
+from anyio.streams.buffered import BufferedByteReceiveStream
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from pydantic import parse_obj_as
+from starlette.types import Receive, Scope, Send
+
+from jackson import systemd
+from jackson.admission import AdmissionMetrics
+from jackson.api_client import KNOWN_ERRORS
+from jackson.api_server import get_app, port_connector_error_handler
+from jackson.bandwidth import BandwidthUsage
+from jackson.connector_server import (
+    ConnectionRange,
+    ConnectResponse,
+    DisconnectResponse,
+    HeartbeatResponse,
+    InitResponse,
+    NotReady,
+    PortConnectorError,
+    ServerPortConnector,
+)
+from jackson.history import HistoryResponse, MetricsHistory, Series
+from jackson.logging import manager_log as log
+from jackson.loop_lag import LoopLagHistogram, LoopLagMonitor
+from jackson.probe import NetworkReport
+from jackson.scenes import ScenesResponse, SceneSwitchResponse
+from jackson.shards import ShardsUsage
+from jackson.tracing import span
+
+if TYPE_CHECKING:
+    from jackson.metering import LevelMeter
+    from jackson.mixer import Mixer
+    from jackson.recorder import Recorder
+
+AGENT_SOCKET_ENV = "JACKSON_AGENT_SOCKET"
+MAX_MESSAGE_SIZE = 4 * 1024 * 1024
+
+Methods = dict[str, Callable[..., Any]]
+Command = tuple[str, dict[str, Any]]
+
+
+class AgentError(Exception):
+    """Agent failed to execute command for reason other than PortConnectorError."""
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode() + b"\n"
+
+
+def get_agent_methods(
+    port_connector: ServerPortConnector,
+    meter: "LevelMeter | None" = None,
+    recorder: "Recorder | None" = None,
+    history: MetricsHistory | None = None,
+    mixer: "Mixer | None" = None,
+    loop_lag: LoopLagMonitor | None = None,
+) -> Methods:
+    def connect(client_name: str, connections: list[Any]) -> ConnectResponse:
+        ranges = parse_obj_as(list[ConnectionRange], connections)
+        return port_connector.connect(client_name, ranges)
+
+    def report_network(client_name: str, report: dict[str, Any]) -> None:
+        port_connector.report_network(client_name, NetworkReport(**report))
+
+    def describe() -> dict[str, Any]:
+        return {
+            "publish_rate": meter.publish_rate if meter else None,
+            "recorder": recorder is not None,
+            "history_resolutions": history.resolutions if history else None,
+            "mixer": mixer is not None,
+            "loop_lag": loop_lag is not None,
+        }
+
+    methods: Methods = {
+        "init": port_connector.init,
+        "connect": connect,
+        "heartbeat": port_connector.heartbeat,
+        "disconnect": port_connector.disconnect,
+        "report_network": report_network,
+        "network_reports": port_connector.network_reports,
+        "list_scenes": port_connector.list_scenes,
+        "switch_scene": port_connector.switch_scene,
+        "admission_metrics": port_connector.admission_metrics,
+        "bandwidth_usage": port_connector.bandwidth_usage,
+        "shards_usage": port_connector.shards_usage,
+        "describe": describe,
+    }
+    if meter:
+        methods["levels"] = meter.levels
+    if recorder:
+        methods["recorder_status"] = recorder.status
+    if history:
+        methods["history"] = history.query
+    if mixer:
+        methods["mixer_state"] = mixer.state
+        methods["mixer_set_gain"] = mixer.set_gain
+        methods["mixer_set_muted"] = mixer.set_muted
+    if loop_lag:
+        methods["loop_lag"] = loop_lag.histogram
+    return methods
+
+
+def _execute(methods: Methods, method: str, params: dict[str, Any]) -> list[Any]:
+    try:
+        with span(f"agent.{method}"):
+            result = methods[method](**params)
+    except PortConnectorError as exc:
+        data = {"type": type(exc.data).__name__, "data": jsonable_encoder(exc.data)}
+        return [False, data]
+    except Exception as exc:
+        log.exception(f"Agent command {method} failed")
+        return [False, {"type": AgentError.__name__, "data": repr(exc)}]
+
+    return [True, jsonable_encoder(result)]
+
+
+def execute_batch(methods: Methods, message: bytes) -> bytes:
+    commands: list[Command] = json.loads(message)
+    return _dumps([_execute(methods, m, params) for m, params in commands])
+
+
+async def _handle_connection(methods: Methods, stream: SocketStream) -> None:
+    buffered = BufferedByteReceiveStream(stream)
+    async with stream:
+        while True:
+            try:
+                message = await buffered.receive_until(b"\n", MAX_MESSAGE_SIZE)
+            except (anyio.EndOfStream, anyio.IncompleteRead):
+                return
+
+            response = await anyio.to_thread.run_sync(execute_batch, methods, message)
+            await stream.send(response)
+
+
+async def serve_agent(
+    path: str, methods: Methods, *, task_status: TaskStatus = anyio.TASK_STATUS_IGNORED
+) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+    listener = await anyio.create_unix_listener(path)
+    task_status.started()
+    await listener.serve(partial(_handle_connection, methods))
+
+
+def _raise_error(error: dict[str, Any]) -> None:
+    for model in KNOWN_ERRORS:
+        if model.__name__ == error["type"]:
+            raise PortConnectorError(model(**error["data"]))
+    raise AgentError(error["data"])
+
+
+@dataclass
+class AgentClient:
+    """
+    Blocking client for API workers. Keeps a connection per thread since
+    FastAPI runs sync endpoints in a thread pool. Reconnects once if agent
+    was restarted, fails with NotReady if it's not up (yet). Connection lost
+    while waiting for the reply is raised as is.
+    """
+
+    path: str
+
+    _local: threading.local = field(default_factory=threading.local, init=False)
+
+    def _connect(self) -> tuple[socket.socket, Any]:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        self._local.conn = conn = (sock, sock.makefile("rb"))
+        return conn
+
+    def _send(self, message: bytes) -> Any:
+        conn: tuple[socket.socket, Any] | None = getattr(self._local, "conn", None)
+        sock, reader = conn or self._connect()
+        sock.sendall(message)
+        return reader
+
+    def _receive(self, reader: Any) -> bytes:
+        if not (response := reader.readline()):
+            raise ConnectionResetError("Agent closed connection")
+        return response
+
+    def _drop_connection(self) -> None:
+        if conn := getattr(self._local, "conn", None):
+            conn[0].close()
+            self._local.conn = None
+
+    def call_many(self, commands: list[Command]) -> list[Any]:
+        """Execute batch of commands in one round trip. Raises first failure."""
+        message = _dumps(commands)
+        try:
+            reader = self._send(message)
+        except OSError:
+            self._drop_connection()
+            try:
+                reader = self._send(message)
+            except OSError as exc:
+                self._drop_connection()
+                raise PortConnectorError(NotReady(reason=f"Agent is down: {exc!r}"))
+
+        # Agent might have executed the batch already, it's not safe to replay
+        try:
+            response = self._receive(reader)
+        except OSError:
+            self._drop_connection()
+            raise
+
+        results: list[Any] = []
+        for ok, value in json.loads(response):
+            if not ok:
+                _raise_error(value)
+            results.append(value)
+        return results
+
+    def call(self, method: str, **params: Any) -> Any:
+        return self.call_many([(method, params)])[0]
+
+
+@dataclass
+class AgentPortConnector:
+    agent: AgentClient
+
+    def init(
+        self,
+        client_name: str | None = None,
+        receive_channels: int | None = None,
+        send_channels: int | None = None,
+    ) -> InitResponse:
+        result = self.agent.call(
+            "init",
+            client_name=client_name,
+            receive_channels=receive_channels,
+            send_channels=send_channels,
+        )
+        return InitResponse(**result)
+
+    def connect(
+        self, client_name: str, connections: list[ConnectionRange]
+    ) -> ConnectResponse:
+        encoded = [c.encode() for c in connections]
+        result = self.agent.call(
+            "connect", client_name=client_name, connections=encoded
+        )
+        return ConnectResponse(**result)
+
+    def heartbeat(self, client_name: str) -> HeartbeatResponse:
+        return HeartbeatResponse(
+            **self.agent.call("heartbeat", client_name=client_name)
+        )
+
+    def disconnect(self, client_name: str) -> DisconnectResponse:
+        result = self.agent.call("disconnect", client_name=client_name)
+        return DisconnectResponse(**result)
+
+    def report_network(self, client_name: str, report: NetworkReport) -> None:
+        self.agent.call("report_network", client_name=client_name, report=report.dict())
+
+    def network_reports(self) -> dict[str, NetworkReport]:
+        result = self.agent.call("network_reports")
+        return parse_obj_as(dict[str, NetworkReport], result)
+
+    def list_scenes(self) -> ScenesResponse:
+        return ScenesResponse(**self.agent.call("list_scenes"))
+
+    def switch_scene(self, name: str) -> SceneSwitchResponse:
+        return SceneSwitchResponse(**self.agent.call("switch_scene", name=name))
+
+    def admission_metrics(self) -> AdmissionMetrics:
+        return AdmissionMetrics(**self.agent.call("admission_metrics"))
+
+    def bandwidth_usage(self) -> BandwidthUsage:
+        return BandwidthUsage(**self.agent.call("bandwidth_usage"))
+
+    def shards_usage(self) -> ShardsUsage:
+        return ShardsUsage(**self.agent.call("shards_usage"))
+
+
+@dataclass
+class AgentLevelMeter:
+    agent: AgentClient
+    publish_rate: float
+
+    def levels(self) -> list[dict[str, Any]]:
+        return self.agent.call("levels")
+
+
+@dataclass
+class AgentRecorder:
+    agent: AgentClient
+
+    def status(self) -> dict[str, Any]:
+        return self.agent.call("recorder_status")
+
+
+@dataclass
+class AgentHistory:
+    agent: AgentClient
+    resolutions: list[int]
+
+    def query(
+        self, series: Series, resolution: int, since: float = 0
+    ) -> HistoryResponse:
+        result = self.agent.call(
+            "history", series=series, resolution=resolution, since=since
+        )
+        return HistoryResponse(**result)
+
+
+@dataclass
+class AgentMixer:
+    agent: AgentClient
+
+    def state(self) -> dict[str, Any]:
+        return self.agent.call("mixer_state")
+
+    def set_gain(self, source: str, destination: str, gain_db: float) -> dict[str, Any]:
+        return self.agent.call(
+            "mixer_set_gain", source=source, destination=destination, gain_db=gain_db
+        )
+
+    def set_muted(self, source: str, muted: bool) -> dict[str, Any]:
+        return self.agent.call("mixer_set_muted", source=source, muted=muted)
+
+
+@dataclass
+class AgentLoopLag:
+    """Lag of agent's event loop, the one that serves JACK side."""
+
+    agent: AgentClient
+
+    def histogram(self) -> LoopLagHistogram:
+        return LoopLagHistogram(**self.agent.call("loop_lag"))
+
+
+def run_api_workers(agent_socket: str, port: int, workers: int) -> None:
+    os.environ[AGENT_SOCKET_ENV] = agent_socket
+    uvicorn.run(  # pyright: ignore[reportUnknownMemberType]
+        "jackson.agent:get_agent_app",
+        factory=True,
+        host="0.0.0.0",
+        port=port,
+        workers=workers,
+    )
+
+
+def _build_agent_app(agent: AgentClient, features: dict[str, Any]) -> FastAPI:
+    publish_rate = features["publish_rate"]
+    history_resolutions = features["history_resolutions"]
+
+    return get_app(
+        AgentPortConnector(agent),
+        meter=AgentLevelMeter(agent, publish_rate) if publish_rate else None,
+        recorder=AgentRecorder(agent) if features["recorder"] else None,
+        history=AgentHistory(agent, history_resolutions)
+        if history_resolutions
+        else None,
+        mixer=AgentMixer(agent) if features["mixer"] else None,
+        loop_lag=AgentLoopLag(agent) if features["loop_lag"] else None,
+    )
+
+
+def _get_not_ready_app() -> FastAPI:
+    app = FastAPI(exception_handlers={PortConnectorError: port_connector_error_handler})
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PATCH", "PUT", "DELETE"])
+    def _(path: str):
+        raise PortConnectorError(NotReady(reason="Waiting for agent"))
+
+    return app
+
+
+@dataclass
+class LazyAgentApp:
+    """
+    API worker app that doesn't wait for agent to start. Worker serves (and
+    tells systemd it's ready) right away while agent is polled in background.
+    Until agent answers, requests get 503 NotReady, then routes are set up for
+    features agent has.
+    """
+
+    agent: AgentClient
+    first_delay: float = 0.1
+    max_delay: float = 1.0
+
+    app: FastAPI | None = field(default=None, init=False)
+    not_ready: FastAPI = field(default_factory=_get_not_ready_app, init=False)
+
+    async def _connect(self) -> None:
+        delay = self.first_delay
+        while True:
+            try:
+                features = await anyio.to_thread.run_sync(
+                    self.agent.call, "describe", cancellable=True
+                )
+                break
+            except PortConnectorError:
+                await anyio.sleep(delay)
+                delay = min(delay * 2, self.max_delay)
+
+        self.app = _build_agent_app(self.agent, features)
+        log.info("Connected to agent")
+
+    async def _run_lifespan(self, receive: Receive, send: Send) -> None:
+        async with anyio.create_task_group() as tg:
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    tg.start_soon(self._connect)
+                    # Each worker feeds it, a stuck worker loop stops its share
+                    tg.start_soon(partial(systemd.feed_watchdog, from_child=True))
+                    await send({"type": "lifespan.startup.complete"})
+                    systemd.notify("READY=1")
+                elif message["type"] == "lifespan.shutdown":
+                    tg.cancel_scope.cancel()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._run_lifespan(receive, send)
+        else:
+            await (self.app or self.not_ready)(scope, receive, send)
+
+
+def get_agent_app() -> LazyAgentApp:
+    """App factory for API workers, reads agent socket path from environment."""
+    return LazyAgentApp(AgentClient(os.environ[AGENT_SOCKET_ENV]))
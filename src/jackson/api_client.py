@@ -1,5 +1,6 @@
-from collections.abc import Callable, Coroutine, Iterable
-from dataclasses import dataclass
+import random
+from collections.abc import Callable, Collection, Coroutine
+from dataclasses import dataclass, field
 from functools import partial
 from typing import Any, TypeVar
 
@@ -7,15 +8,26 @@ import anyio
 import httpx
 from pydantic import BaseModel
 
+from jackson.admission import Overloaded
+from jackson.bandwidth import BandwidthExceeded
 from jackson.connector_server import (
-    Connection,
     ConnectResponse,
+    DisconnectResponse,
     FailedToConnectPorts,
+    HeartbeatResponse,
     InitResponse,
+    MixerChannelNotFound,
+    MixerInputsExhausted,
+    NotReady,
     PlaybackPortAlreadyHasConnections,
     PortNotFound,
+    SessionNotFound,
+    group_connections,
 )
 from jackson.port_connection import ConnectionMap
+from jackson.probe import NetworkReport
+from jackson.scenes import SceneNotFound
+from jackson.tracing import span
 
 
 @dataclass
@@ -31,6 +43,13 @@ KNOWN_ERRORS: tuple[type[BaseModel], ...] = (
     PlaybackPortAlreadyHasConnections,
     PortNotFound,
     FailedToConnectPorts,
+    SessionNotFound,
+    SceneNotFound,
+    Overloaded,
+    BandwidthExceeded,
+    MixerInputsExhausted,
+    MixerChannelNotFound,
+    NotReady,
 )
 
 
@@ -68,38 +87,134 @@ def handle_response(response: httpx.Response, model: type[T]) -> T:
     return model(**data)
 
 
-def get_required_remote_connections(map: ConnectionMap) -> Iterable[dict[str, Any]]:
-    for conn in map.values():
-        src, dest = conn.get_remote_connection()
-        yield Connection(
-            source=src, destination=dest, client_should=conn.client_should
-        ).dict()
+def get_required_remote_connections(map: ConnectionMap) -> list[dict[str, str]]:
+    def gen():
+        for conn in map.values():
+            src, dest = conn.get_remote_connection()
+            yield src, dest, conn.client_should
 
+    return [r.encode() for r in group_connections(gen())]
 
-async def retry_connect_func(
-    func: Callable[[], Coroutine[None, None, httpx.Response]]
-) -> httpx.Response:
-    response = None
 
-    for _ in range(3):
-        if (response := await func()).status_code != 404:
+@dataclass
+class Backoff:
+    """
+    Exponential backoff with full jitter: clients that failed together (say,
+    all restarted after network blip) spread out instead of retrying in
+    lockstep.
+    """
+
+    base: float = 0.25  # In seconds
+    cap: float = 8.0  # In seconds
+    deadline: float = 30.0  # Give up after that many seconds overall
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.cap, self.base * 2**attempt))
+
+
+def _get_retry_after(response: httpx.Response) -> float:
+    try:
+        return float(response.headers.get("Retry-After", 0))
+    except ValueError:
+        return 0
+
+
+BRIEF_RETRY_ATTEMPTS = 3
+BRIEF_RETRY_DELAY = 0.5  # In seconds
+
+
+async def request_with_backoff(
+    func: Callable[[], Coroutine[None, None, httpx.Response]],
+    backoff: Backoff,
+    retry_statuses: Collection[int] = (429,),
+    brief_retry_statuses: Collection[int] = (),
+) -> httpx.Response:
+    """
+    Repeat request while it fails with one of `retry_statuses`, or with 503
+    and `Retry-After` (server is still starting). Waits at least as long as
+    server asked in `Retry-After`. Returns last response when next attempt
+    would be past the deadline.
+
+    `brief_retry_statuses` are retried only a few times at a short fixed
+    delay: they're expected to clear up quickly or not at all.
+    """
+    deadline = anyio.current_time() + backoff.deadline
+
+    attempt = 0
+    brief_attempt = 0
+
+    while True:
+        response = await func()
+        if response.status_code in brief_retry_statuses:
+            brief_attempt += 1
+            if brief_attempt >= BRIEF_RETRY_ATTEMPTS:
+                return response
+            await anyio.sleep(BRIEF_RETRY_DELAY)
+            continue
+
+        starting = response.status_code == 503 and "Retry-After" in response.headers
+        if response.status_code not in retry_statuses and not starting:
             return response
-        await anyio.sleep(0.5)
 
-    assert response
-    return response
+        delay = max(backoff.delay(attempt), _get_retry_after(response))
+        if anyio.current_time() + delay > deadline:
+            return response
+        await anyio.sleep(delay)
+        attempt += 1
 
 
 @dataclass
 class APIClient:
     client: httpx.AsyncClient
-
-    async def init(self) -> InitResponse:
-        response = await self.client.get("/init")  # pyright: ignore
+    client_name: str
+    backoff: Backoff = field(default_factory=Backoff)
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        with span(f"http {method} {url}"):
+            return await self.client.request(method, url, **kwargs)
+
+    async def init(self, receive_channels: int, send_channels: int) -> InitResponse:
+        params = {
+            "client_name": self.client_name,
+            "receive_channels": receive_channels,
+            "send_channels": send_channels,
+        }
+        func = partial(self._request, "GET", "/init", params=params)
+        response = await request_with_backoff(func, self.backoff)
         return handle_response(response, InitResponse)
 
-    async def connect(self, connection_map: ConnectionMap) -> None:
-        payload = list(get_required_remote_connections(connection_map))
-        func = partial(self.client.patch, "/connect", json=payload)  # pyright: ignore
-        response = await retry_connect_func(func)
-        handle_response(response, ConnectResponse)
+    async def connect(self, connection_map: ConnectionMap) -> ConnectResponse:
+        payload = get_required_remote_connections(connection_map)
+        func = partial(
+            self._request,
+            "PATCH",
+            "/connect",
+            params={"client_name": self.client_name},
+            json=payload,
+        )
+        # Ports of client's JackTrip may not be registered on server just yet
+        response = await request_with_backoff(
+            func, self.backoff, brief_retry_statuses=(404,)
+        )
+        return handle_response(response, ConnectResponse)
+
+    async def heartbeat(self) -> HeartbeatResponse:
+        response = await self._request(
+            "POST", "/heartbeat", params={"client_name": self.client_name}
+        )
+        return handle_response(response, HeartbeatResponse)
+
+    async def report_network(self, report: NetworkReport) -> None:
+        response = await self._request(
+            "POST",
+            "/network-report",
+            params={"client_name": self.client_name},
+            json=report.dict(),
+        )
+        response.raise_for_status()
+
+    async def disconnect(self) -> None:
+        response = await self._request(
+            "PATCH", "/disconnect", params={"client_name": self.client_name}
+        )
+        handle_response(response, DisconnectResponse)
@@ -1,30 +1,80 @@
 import signal
+from collections.abc import Sequence
 from types import FrameType
+from typing import Any, Protocol
 
 import anyio
 import fastapi
 import uvicorn
-from fastapi import Body, FastAPI, HTTPException, status
+from fastapi import Body, FastAPI, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.exception_handlers import http_exception_handler
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from jackson.admission import Overloaded
+from jackson.bandwidth import BandwidthExceeded
 from jackson.connector_server import (
-    Connection,
+    ConnectionRange,
     FailedToConnectPorts,
+    MixerChannelNotFound,
+    MixerInputsExhausted,
+    NotReady,
     PlaybackPortAlreadyHasConnections,
+    PortConnector,
     PortConnectorError,
     PortNotFound,
-    ServerPortConnector,
+    SessionNotFound,
 )
+from jackson.history import Series
+from jackson.probe import NetworkReport
+from jackson.scenes import SceneNotFound
+
+
+class LevelSource(Protocol):
+    publish_rate: float
+
+    def levels(self) -> Sequence[Any]:
+        ...
+
+
+class RecorderStatusSource(Protocol):
+    def status(self) -> Any:
+        ...
+
+
+class HistorySource(Protocol):
+    @property
+    def resolutions(self) -> list[int]:
+        ...
+
+    def query(self, series: Series, resolution: int, since: float = 0) -> Any:
+        ...
+
+
+class LoopLagSource(Protocol):
+    def histogram(self) -> Any:
+        ...
+
+
+class MixerControl(Protocol):
+    def state(self) -> Any:
+        ...
+
+    def set_gain(self, source: str, destination: str, gain_db: float) -> Any:
+        ...
+
+    def set_muted(self, source: str, muted: bool) -> Any:
+        ...
 
 
 def install_api_signal_handlers(
-    server: uvicorn.Server, scope: anyio.CancelScope
+    server: uvicorn.Server | None, scope: anyio.CancelScope
 ) -> None:
     def handler(sig: int, frame: FrameType | None) -> None:
         scope.cancel()
-        server.handle_exit(sig=sig, frame=frame)
+        if server:
+            server.handle_exit(sig=sig, frame=frame)
 
     for sig in (signal.SIGINT, signal.SIGTERM):
         signal.signal(sig, handler)
@@ -37,31 +87,178 @@ async def port_connector_error_handler(
         PortNotFound: 404,
         PlaybackPortAlreadyHasConnections: status.HTTP_409_CONFLICT,
         FailedToConnectPorts: status.HTTP_424_FAILED_DEPENDENCY,
+        SessionNotFound: 404,
+        SceneNotFound: 404,
+        Overloaded: status.HTTP_429_TOO_MANY_REQUESTS,
+        BandwidthExceeded: status.HTTP_503_SERVICE_UNAVAILABLE,
+        MixerInputsExhausted: status.HTTP_409_CONFLICT,
+        MixerChannelNotFound: 404,
+        NotReady: status.HTTP_503_SERVICE_UNAVAILABLE,
     }
+    headers = None
+    if isinstance(exc.data, (Overloaded, NotReady)):
+        headers = {"Retry-After": str(exc.data.retry_after)}
+
     http_exc = HTTPException(
         status_code=status_map[type(exc.data)],
         detail={"message": type(exc.data).__name__, "data": exc.data.dict()},
+        headers=headers,
     )
     return await http_exception_handler(request=request, exc=http_exc)
 
 
-def get_app(port_connector: ServerPortConnector) -> FastAPI:
+def _add_metering_routes(app: FastAPI, meter: LevelSource) -> None:
+    @app.get("/levels")
+    def _():
+        return meter.levels()
+
+    @app.websocket("/levels/stream")
+    async def _(websocket: WebSocket):
+        await websocket.accept()
+
+        async def send_levels() -> None:
+            while True:
+                levels = await anyio.to_thread.run_sync(meter.levels)
+                await websocket.send_json(jsonable_encoder(levels))
+                await anyio.sleep(1 / meter.publish_rate)
+
+        # Client only listens, so disconnect is noticed by receiving
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(send_levels)
+            try:
+                while True:
+                    await websocket.receive_text()
+            except WebSocketDisconnect:
+                tg.cancel_scope.cancel()
+
+
+def _add_history_routes(app: FastAPI, history: HistorySource) -> None:
+    @app.get("/history/{series}")
+    def _(series: Series, resolution: int = 1, since: float = 0):
+        if resolution not in history.resolutions:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Resolution should be one of {history.resolutions}",
+            )
+        return history.query(series, resolution, since)
+
+
+def _add_mixer_routes(app: FastAPI, mixer: MixerControl) -> None:
+    @app.get("/mixer")
+    def _():
+        return mixer.state()
+
+    @app.patch("/mixer/gain")
+    def _(source: str, destination: str, gain_db: float):
+        return mixer.set_gain(source, destination, gain_db)
+
+    @app.patch("/mixer/mute")
+    def _(source: str, muted: bool = True):
+        return mixer.set_muted(source, muted)
+
+
+def get_app(
+    port_connector: PortConnector,
+    meter: LevelSource | None = None,
+    recorder: RecorderStatusSource | None = None,
+    history: HistorySource | None = None,
+    mixer: MixerControl | None = None,
+    loop_lag: LoopLagSource | None = None,
+) -> FastAPI:
     app = FastAPI(exception_handlers={PortConnectorError: port_connector_error_handler})
 
     @app.get("/init")
-    def _():
-        return port_connector.init()
+    def _(
+        client_name: str | None = None,
+        receive_channels: int | None = None,
+        send_channels: int | None = None,
+    ):
+        return port_connector.init(client_name, receive_channels, send_channels)
 
     @app.patch("/connect")
-    def _(connections: list[Connection] = Body(...)):
-        return port_connector.connect(connections)
+    def _(client_name: str, connections: list[ConnectionRange] = Body(...)):
+        return port_connector.connect(client_name, connections)
+
+    @app.post("/heartbeat")
+    def _(client_name: str):
+        return port_connector.heartbeat(client_name)
+
+    @app.patch("/disconnect")
+    def _(client_name: str):
+        return port_connector.disconnect(client_name)
+
+    @app.post("/network-report")
+    def _(client_name: str, report: NetworkReport):
+        port_connector.report_network(client_name, report)
+
+    @app.get("/network-reports")
+    def _():
+        return port_connector.network_reports()
+
+    @app.get("/scenes")
+    def _():
+        return port_connector.list_scenes()
+
+    @app.post("/scenes/switch")
+    def _(name: str):
+        return port_connector.switch_scene(name)
+
+    @app.get("/admission")
+    def _():
+        return port_connector.admission_metrics()
+
+    @app.get("/bandwidth")
+    def _():
+        return port_connector.bandwidth_usage()
+
+    @app.get("/shards")
+    def _():
+        return port_connector.shards_usage()
+
+    if meter:
+        _add_metering_routes(app, meter)
+
+    if recorder:
+
+        @app.get("/recorder")
+        def _():
+            return recorder.status()
+
+    if history:
+        _add_history_routes(app, history)
+
+    if mixer:
+        _add_mixer_routes(app, mixer)
+
+    if loop_lag:
+
+        @app.get("/loop-lag")
+        def _():
+            return loop_lag.histogram()
 
     return app
 
 
-def get_api_server(port_connector: ServerPortConnector) -> uvicorn.Server:
-    app = get_app(port_connector)
-    config = uvicorn.Config(app=app, host="0.0.0.0", workers=1, log_config=None)
+def get_api_server(
+    port_connector: PortConnector,
+    port: int,
+    meter: LevelSource | None = None,
+    recorder: RecorderStatusSource | None = None,
+    history: HistorySource | None = None,
+    mixer: MixerControl | None = None,
+    loop_lag: LoopLagSource | None = None,
+) -> uvicorn.Server:
+    app = get_app(
+        port_connector,
+        meter=meter,
+        recorder=recorder,
+        history=history,
+        mixer=mixer,
+        loop_lag=loop_lag,
+    )
+    config = uvicorn.Config(
+        app=app, host="0.0.0.0", port=port, workers=1, log_config=None
+    )
     server = uvicorn.Server(config)
     server.config.load()
     server.lifespan = server.config.lifespan_class(server.config)
@@ -0,0 +1,143 @@
+from dataclasses import dataclass, field
+
+from pydantic import BaseModel
+
+BIT_RESOLUTION = 16  # JackTrip default, `--bitres`
+# JackTrip default header, UDP and IPv4 headers
+PACKET_OVERHEAD = 16 + 8 + 20  # In bytes
+
+
+def stream_kbps(
+    channels: int, rate: int, buffer_size: int, bit_resolution: int = BIT_RESOLUTION
+) -> float:
+    """Bandwidth of one direction of JackTrip stream: one packet per period."""
+    # JackTrip doesn't allow one-way channel broadcasting, see `jacktrip.py`
+    payload = buffer_size * max(channels, 1) * bit_resolution // 8
+    return rate / buffer_size * (payload + PACKET_OVERHEAD) * 8 / 1000
+
+
+def max_channels(
+    kbps: float, rate: int, buffer_size: int, bit_resolution: int = BIT_RESOLUTION
+) -> int:
+    """Most channels that fit into `kbps`. 0 if not even one does."""
+    packet_bytes = kbps * 1000 / 8 / (rate / buffer_size)
+    channels = int(
+        (packet_bytes - PACKET_OVERHEAD) // (buffer_size * bit_resolution / 8)
+    )
+    return max(channels, 0)
+
+
+class ClientBandwidth(BaseModel):
+    """Projected traffic of client's stream. Uplink is from server to client."""
+
+    receive_channels: int
+    send_channels: int
+    uplink_kbps: float
+    downlink_kbps: float
+
+
+class BandwidthUsage(BaseModel):
+    uplink_kbps: float
+    downlink_kbps: float
+    uplink_budget_kbps: float | None
+    downlink_budget_kbps: float | None
+    clients: dict[str, ClientBandwidth]
+
+
+class BandwidthExceeded(BaseModel):
+    required: ClientBandwidth
+    uplink_available_kbps: float | None
+    downlink_available_kbps: float | None
+    # Largest channel set that fits, client may ask for fewer channels
+    suggested_receive_channels: int
+    suggested_send_channels: int
+
+
+@dataclass
+class BandwidthBudget:
+    """
+    Projected JackTrip traffic of client sessions against server's uplink and
+    downlink capacity. Unlimited when capacity is not set. Not thread-safe.
+    """
+
+    uplink_kbps: float | None = None
+    downlink_kbps: float | None = None
+    bit_resolution: int = BIT_RESOLUTION
+
+    clients: dict[str, ClientBandwidth] = field(
+        default_factory=dict[str, ClientBandwidth], init=False
+    )
+
+    def project(
+        self, receive_channels: int, send_channels: int, rate: int, buffer_size: int
+    ) -> ClientBandwidth:
+        return ClientBandwidth(
+            receive_channels=receive_channels,
+            send_channels=send_channels,
+            uplink_kbps=stream_kbps(
+                receive_channels, rate, buffer_size, self.bit_resolution
+            ),
+            downlink_kbps=stream_kbps(
+                send_channels, rate, buffer_size, self.bit_resolution
+            ),
+        )
+
+    def _available(self, client_name: str) -> tuple[float | None, float | None]:
+        """Capacity left for client, not counting its own current usage."""
+        others = [c for name, c in self.clients.items() if name != client_name]
+        uplink = downlink = None
+        if self.uplink_kbps is not None:
+            uplink = self.uplink_kbps - sum(c.uplink_kbps for c in others)
+        if self.downlink_kbps is not None:
+            downlink = self.downlink_kbps - sum(c.downlink_kbps for c in others)
+        return uplink, downlink
+
+    def check(
+        self,
+        client_name: str,
+        receive_channels: int,
+        send_channels: int,
+        rate: int,
+        buffer_size: int,
+    ) -> ClientBandwidth | BandwidthExceeded:
+        """Projected bandwidth of client if it fits, otherwise the reason."""
+        required = self.project(receive_channels, send_channels, rate, buffer_size)
+        uplink, downlink = self._available(client_name)
+
+        uplink_exceeded = uplink is not None and required.uplink_kbps > uplink
+        downlink_exceeded = downlink is not None and required.downlink_kbps > downlink
+        if not uplink_exceeded and not downlink_exceeded:
+            return required
+
+        receive, send = receive_channels, send_channels
+        if uplink is not None and uplink_exceeded:
+            receive = min(
+                receive, max_channels(uplink, rate, buffer_size, self.bit_resolution)
+            )
+        if downlink is not None and downlink_exceeded:
+            send = min(
+                send, max_channels(downlink, rate, buffer_size, self.bit_resolution)
+            )
+
+        return BandwidthExceeded(
+            required=required,
+            uplink_available_kbps=uplink,
+            downlink_available_kbps=downlink,
+            suggested_receive_channels=receive,
+            suggested_send_channels=send,
+        )
+
+    def reserve(self, client_name: str, bandwidth: ClientBandwidth) -> None:
+        self.clients[client_name] = bandwidth
+
+    def release(self, client_name: str) -> None:
+        self.clients.pop(client_name, None)
+
+    def usage(self) -> BandwidthUsage:
+        return BandwidthUsage(
+            uplink_kbps=sum(c.uplink_kbps for c in self.clients.values()),
+            downlink_kbps=sum(c.downlink_kbps for c in self.clients.values()),
+            uplink_budget_kbps=self.uplink_kbps,
+            downlink_budget_kbps=self.downlink_kbps,
+            clients=self.clients.copy(),
+        )
@@ -4,8 +4,9 @@ import anyio
 import jack
 
 from jackson.jack_client import connect_ports_and_log
-from jackson.jacktrip import JACK_CLIENT_NAME
+from jackson.jack_events import JackEvents
 from jackson.port_connection import ConnectionMap
+from jackson.tracing import span
 
 
 def ports_already_connected(client: jack.Client, source: str, destination: str) -> bool:
@@ -14,25 +15,39 @@ def ports_already_connected(client: jack.Client, source: str, destination: str)
     return any(p.name == destination for p in connections)
 
 
-async def connect_server_and_client_ports(
-    client: jack.Client,
-    connect_on_server: Callable[[ConnectionMap], Awaitable[None]],
-    connection_map: ConnectionMap,
-) -> None:
-    def on_register(name: str, register: bool) -> None:
-        if register and name == JACK_CLIENT_NAME:
-            ready.set()
-
-    ready = anyio.Event()
-    client.set_client_registration_callback(on_register)
-    client.activate()
+def get_bridge_ports(connection_map: ConnectionMap) -> set[str]:
+    """
+    Bridge ports that local connections need. Transport is ready once they are
+    registered, whatever backend registers them.
+    """
+    return {str(conn.local_bridge) for conn in connection_map.values()}
 
-    await ready.wait()
-    await connect_on_server(connection_map)
 
+def connect_local_ports(client: jack.Client, connection_map: ConnectionMap) -> None:
     for conn in connection_map.values():
         src, dest = conn.get_local_connection()
         src_str, dest_str = str(src), str(dest)
 
         if not ports_already_connected(client, src_str, dest_str):
             connect_ports_and_log(client, src_str, dest_str)
+
+
+async def connect_server_and_client_ports(
+    client: jack.Client,
+    connect_on_server: Callable[[ConnectionMap], Awaitable[None]],
+    connection_map: ConnectionMap,
+) -> None:
+    events = JackEvents(client)
+    events.install()
+    await anyio.to_thread.run_sync(client.activate, cancellable=True)
+
+    with span("client.wait_jacktrip"):
+        await events.wait_ports(get_bridge_ports(connection_map))
+
+    with span("client.connect_on_server"):
+        await connect_on_server(connection_map)
+
+    with span("client.connect_local_ports", count=len(connection_map)):
+        await anyio.to_thread.run_sync(
+            connect_local_ports, client, connection_map, cancellable=True
+        )
@@ -1,12 +1,39 @@
-from dataclasses import dataclass
-from typing import Literal, cast
+import contextlib
+import errno
+import threading
+import time
+from collections.abc import Generator, Iterable, Iterator
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Any, Literal, Protocol, cast
 
 import jack
 from jack_server import SampleRate
-from pydantic import BaseModel
+from pydantic import BaseModel, validator  # pyright: ignore[reportUnknownVariableType]
 
-from jackson.jack_client import connect_ports_and_log
-from jackson.port_connection import ClientShould, PortName
+from jackson.admission import AdmissionControl, AdmissionMetrics
+from jackson.bandwidth import (
+    BandwidthBudget,
+    BandwidthExceeded,
+    BandwidthUsage,
+    ClientBandwidth,
+)
+from jackson.history import MetricsHistory
+from jackson.jack_client import connect_ports_and_log, disconnect_ports_and_log
+from jackson.lease import Edge, Lease, LeaseRegistry
+from jackson.logging import session_log
+from jackson.port_connection import ClientShould, PortName, PortRange
+from jackson.probe import NetworkReport
+from jackson.scenes import (
+    SceneNotFound,
+    ScenesResponse,
+    SceneSwitchResponse,
+    diff_edges,
+)
+from jackson.shards import ShardPool, ShardsUsage
+from jackson.tracing import span
+
+if TYPE_CHECKING:
+    from jackson.mixer import Mixer
 
 
 class InitResponse(BaseModel):
@@ -14,15 +41,82 @@ class InitResponse(BaseModel):
     outputs: int
     rate: SampleRate
     buffer_size: int
+    probe_port: int | None = None
+    # Shard to stream to if server runs several JackTrip hubs
+    jacktrip_port: int | None = None
 
 
-class Connection(BaseModel):
-    source: PortName
-    destination: PortName
+class ConnectionRange(BaseModel):
+    """Connections between consecutive source and destination ports."""
+
+    source: PortRange
+    destination: PortRange
     client_should: ClientShould
 
+    @validator("destination")
+    def _validate_length(cls, value: PortRange, values: dict[str, Any]) -> PortRange:
+        if (source := values.get("source")) and len(source) != len(value):
+            raise ValueError("Source and destination ranges differ in length")
+        return value
+
+    def pairs(self) -> Iterator[tuple[str, str]]:
+        return zip(self.source.names(), self.destination.names())
+
+    def encode(self) -> dict[str, str]:
+        return {
+            "source": str(self.source),
+            "destination": str(self.destination),
+            "client_should": self.client_should,
+        }
+
+
+def group_connections(
+    connections: Iterable[tuple[PortName, PortName, ClientShould]]
+) -> list[ConnectionRange]:
+    """Merge connections between consecutive ports into ranges."""
+
+    def key(conn: tuple[PortName, PortName, ClientShould]):
+        src, dest, client_should = conn
+        return client_should, src.client, src.type, dest.client, dest.type, src.idx
+
+    result: list[ConnectionRange] = []
+    prev: tuple[PortName, PortName, ClientShould] | None = None
+
+    for conn in sorted(connections, key=key):
+        src, dest, client_should = conn
+
+        if (
+            prev
+            and key(prev)[:-1] == key(conn)[:-1]
+            and src.idx == prev[0].idx + 1
+            and dest.idx == prev[1].idx + 1
+        ):
+            last = result[-1]
+            last.source = replace(last.source, stop=src.idx)
+            last.destination = replace(last.destination, stop=dest.idx)
+        else:
+            result.append(
+                ConnectionRange(
+                    source=PortRange(src.client, src.type, src.idx, src.idx),
+                    destination=PortRange(dest.client, dest.type, dest.idx, dest.idx),
+                    client_should=client_should,
+                )
+            )
+
+        prev = conn
+
+    return result
+
 
 class ConnectResponse(BaseModel):
+    lease_ttl: float
+
+
+class HeartbeatResponse(BaseModel):
+    lease_ttl: float
+
+
+class DisconnectResponse(BaseModel):
     pass
 
 
@@ -44,11 +138,41 @@ class FailedToConnectPorts(BaseModel):
     destination: PortName
 
 
+class SessionNotFound(BaseModel):
+    client_name: str
+
+
+class MixerInputsExhausted(BaseModel):
+    inputs: int
+
+
+class MixerChannelNotFound(BaseModel):
+    source: str
+
+
+class NotReady(BaseModel):
+    """Server is starting: JACK side isn't attached yet."""
+
+    reason: str
+    retry_after: int = 1  # In seconds
+
+
 @dataclass
 class PortConnectorError(Exception):
     data: BaseModel
 
 
+def count_bridge_channels(connections: list[ConnectionRange]) -> tuple[int, int]:
+    """Count receive and send channels of client's JackTrip from its connections."""
+    receive, send = 0, 0
+    for conn in connections:
+        if conn.client_should == "send":
+            send += len(conn.source)
+        else:
+            receive += len(conn.source)
+    return receive, send
+
+
 def validate_playback_port_is_free(
     source: PortName, destination: PortName, connected_to_dest: list[str]
 ) -> None:
@@ -60,46 +184,369 @@ def validate_playback_port_is_free(
     raise PortConnectorError(data)
 
 
+class PortConnector(Protocol):
+    """What API needs: served either in-process or by JACK agent."""
+
+    def init(
+        self,
+        client_name: str | None = None,
+        receive_channels: int | None = None,
+        send_channels: int | None = None,
+    ) -> InitResponse:
+        ...
+
+    def connect(
+        self, client_name: str, connections: list[ConnectionRange]
+    ) -> ConnectResponse:
+        ...
+
+    def heartbeat(self, client_name: str) -> HeartbeatResponse:
+        ...
+
+    def disconnect(self, client_name: str) -> DisconnectResponse:
+        ...
+
+    def report_network(self, client_name: str, report: NetworkReport) -> None:
+        ...
+
+    def network_reports(self) -> dict[str, NetworkReport]:
+        ...
+
+    def list_scenes(self) -> ScenesResponse:
+        ...
+
+    def switch_scene(self, name: str) -> SceneSwitchResponse:
+        ...
+
+    def admission_metrics(self) -> AdmissionMetrics:
+        ...
+
+    def bandwidth_usage(self) -> BandwidthUsage:
+        ...
+
+    def shards_usage(self) -> ShardsUsage:
+        ...
+
+
 @dataclass
 class ServerPortConnector:
     client: jack.Client
+    leases: LeaseRegistry = field(default_factory=LeaseRegistry)
+    probe_port: int | None = None
+    scenes: dict[str, frozenset[Edge]] = field(
+        default_factory=dict[str, frozenset[Edge]]
+    )
+    admission: AdmissionControl = field(default_factory=AdmissionControl)
+    bandwidth: BandwidthBudget = field(default_factory=BandwidthBudget)
+    history: MetricsHistory | None = None
+    # Client streams to playback ports it mixes are summed there, so such
+    # ports may be shared
+    mixer: "Mixer | None" = None
+    shards: ShardPool | None = None
+
+    lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+    reports: dict[str, NetworkReport] = field(
+        default_factory=dict[str, NetworkReport], init=False
+    )
+    current_scene: str | None = field(default=None, init=False)
+    scene_edges: set[Edge] = field(default_factory=set[Edge], init=False)
 
-    def init(self) -> InitResponse:
-        inputs = self.client.get_ports("system:.*", is_input=True)
-        outputs = self.client.get_ports("system:.*", is_output=True)
+    @contextlib.contextmanager
+    def _admit(self) -> Generator[None, None, None]:
+        if overloaded := self.admission.enter():
+            raise PortConnectorError(overloaded)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.admission.leave(time.perf_counter() - start)
+
+    def admission_metrics(self) -> AdmissionMetrics:
+        return self.admission.metrics()
+
+    def _check_bandwidth(
+        self, client_name: str, receive_channels: int, send_channels: int
+    ) -> ClientBandwidth:
+        result = self.bandwidth.check(
+            client_name,
+            receive_channels=receive_channels,
+            send_channels=send_channels,
+            rate=self.client.samplerate,
+            buffer_size=self.client.blocksize,
+        )
+        if isinstance(result, BandwidthExceeded):
+            raise PortConnectorError(result)
+        return result
+
+    def bandwidth_usage(self) -> BandwidthUsage:
+        with self.lock:
+            return self.bandwidth.usage()
+
+    def shards_usage(self) -> ShardsUsage:
+        if not self.shards:
+            return ShardsUsage(shards=[])
+        with self.lock:
+            return self.shards.usage()
+
+    def init(
+        self,
+        client_name: str | None = None,
+        receive_channels: int | None = None,
+        send_channels: int | None = None,
+    ) -> InitResponse:
+        """
+        With client's channel counts, fail early if its stream wouldn't fit into
+        bandwidth budget. Nothing is reserved until connect. Named client is
+        assigned a JackTrip shard, if there are shards.
+        """
+        jacktrip_port = None
+        with self._admit():
+            if (
+                client_name
+                and receive_channels is not None
+                and send_channels is not None
+            ):
+                with self.lock:
+                    self._check_bandwidth(client_name, receive_channels, send_channels)
+            if client_name and self.shards:
+                with self.lock:
+                    jacktrip_port = self.shards.assign(
+                        client_name, (receive_channels or 0) + (send_channels or 0)
+                    )
+
+            with span("jack.get_ports"):
+                inputs = self.client.get_ports("system:.*", is_input=True)
+                outputs = self.client.get_ports("system:.*", is_output=True)
 
         return InitResponse(
             inputs=len(inputs),
             outputs=len(outputs),
             rate=cast(SampleRate, self.client.samplerate),
             buffer_size=self.client.blocksize,
+            probe_port=self.probe_port,
+            jacktrip_port=jacktrip_port,
         )
 
-    def _get_existing_port(self, type: PortDirectionType, name: PortName) -> jack.Port:
-        try:
-            return self.client.get_port_by_name(str(name))
-        except jack.JackError:
-            raise PortConnectorError(PortNotFound(type=type, name=name))
+    def _validate_ports_exist(
+        self, type: PortDirectionType, range: PortRange, existing: set[str]
+    ) -> None:
+        for name in range.names():
+            if name not in existing:
+                raise PortConnectorError(
+                    PortNotFound(type=type, name=PortName.parse(name))
+                )
 
-    def _validate_connection(self, conn: Connection) -> None:
-        _src = self._get_existing_port("source", conn.source)
-        dest = self._get_existing_port("destination", conn.destination)
+    def _validate_playback_ports_are_free(self, conn: ConnectionRange) -> None:
+        for source, destination in conn.pairs():
+            if self.mixer and self.mixer.mixes(destination):
+                continue
 
-        if conn.client_should == "send":
-            connected = [p.name for p in self.client.get_all_connections(dest)]
-            validate_playback_port_is_free(conn.source, conn.destination, connected)
+            with span("jack.get_all_connections", port=destination):
+                ports = self.client.get_all_connections(destination)  # pyright: ignore
+                connected = [p.name for p in ports]
+
+            if connected:
+                validate_playback_port_is_free(
+                    PortName.parse(source), PortName.parse(destination), connected
+                )
+
+    def _validate_connections(self, connections: list[ConnectionRange]) -> None:
+        with span("jack.get_ports"):
+            existing = {p.name for p in self.client.get_ports()}
+
+        for conn in connections:
+            self._validate_ports_exist("source", conn.source, existing)
+            self._validate_ports_exist("destination", conn.destination, existing)
+
+            if conn.client_should == "send":
+                self._validate_playback_ports_are_free(conn)
 
-    def _make_connection(self, conn: Connection) -> None:
+    def _make_connection(
+        self, source: str, destination: str, port: str | None = None
+    ) -> None:
+        """`port` is where to actually connect if it's not `destination` itself."""
         try:
-            connect_ports_and_log(self.client, str(conn.source), str(conn.destination))
+            with span("jack.connect", source=source):
+                connect_ports_and_log(self.client, source, port or destination)
         except jack.JackError:
             data = FailedToConnectPorts(
-                source=conn.source, destination=conn.destination
+                source=PortName.parse(source), destination=PortName.parse(destination)
             )
             raise PortConnectorError(data)
 
-    def connect(self, connections: list[Connection]) -> ConnectResponse:
-        for conn in connections:
-            self._validate_connection(conn)
-            self._make_connection(conn)
-        return ConnectResponse()
+    def _disconnect_edges(self, edges: Iterable[Edge]) -> None:
+        for source, destination in edges:
+            try:
+                with span("jack.disconnect", source=source):
+                    disconnect_ports_and_log(self.client, source, destination)
+            except jack.JackError:
+                # Port is gone or connection was already removed
+                pass
+
+    def _release(self, lease: Lease) -> None:
+        self.bandwidth.release(lease.client_name)
+        if self.shards:
+            self.shards.release(lease.client_name)
+        if self.mixer:
+            self.mixer.release(lease.client_name)
+        self._disconnect_edges(lease.edges)
+
+    def _release_expired(self) -> None:
+        for lease in self.leases.release_expired():
+            session_log.warning(f"Session of {lease.client_name} expired")
+            self._release(lease)
+
+    def release_expired(self) -> None:
+        with self.lock:
+            self._release_expired()
+
+    def _connect_pair(
+        self, client_name: str, lease: Lease, source: str, destination: str
+    ) -> None:
+        port = None
+        if self.mixer and self.mixer.mixes(destination):
+            port = self.mixer.route(client_name, source, destination)
+            if (source, port) in lease.edges:  # Source feeds several outputs
+                return
+
+        self._make_connection(source, destination, port)
+        lease.edges.add((source, port or destination))
+
+    def connect(
+        self, client_name: str, connections: list[ConnectionRange]
+    ) -> ConnectResponse:
+        start = time.perf_counter()
+
+        with self._admit(), self.lock, span("server.connect", client_name=client_name):
+            self._release_expired()
+            self._validate_connections(connections)
+            receive, send = count_bridge_channels(connections)
+            bandwidth = self._check_bandwidth(client_name, receive, send)
+            is_new = client_name not in self.leases.leases
+            reserved = self.bandwidth.clients.get(client_name)
+            lease = self.leases.acquire(client_name)
+            edges = set(lease.edges)
+            self.bandwidth.reserve(client_name, bandwidth)
+            if self.shards:
+                self.shards.activate(client_name)
+
+            try:
+                for conn in connections:
+                    for source, destination in conn.pairs():
+                        self._connect_pair(client_name, lease, source, destination)
+            except Exception:
+                # Leave nothing of this call behind, session keeps what it had
+                self._disconnect_edges(lease.edges - edges)
+                lease.edges &= edges
+                if is_new:
+                    self.leases.release(client_name)
+                    self._release(lease)
+                elif reserved:
+                    self.bandwidth.reserve(client_name, reserved)
+                raise
+
+        if self.history:
+            latency = time.perf_counter() - start
+            self.history.record("connect_latency_ms", latency * 1000)
+        return ConnectResponse(lease_ttl=self.leases.ttl)
+
+    def heartbeat(self, client_name: str) -> HeartbeatResponse:
+        with self.lock:
+            if not self.leases.renew(client_name):
+                raise PortConnectorError(SessionNotFound(client_name=client_name))
+
+        return HeartbeatResponse(lease_ttl=self.leases.ttl)
+
+    def disconnect(self, client_name: str) -> DisconnectResponse:
+        with self.lock:
+            if lease := self.leases.release(client_name):
+                self._release(lease)
+
+        return DisconnectResponse()
+
+    def report_network(self, client_name: str, report: NetworkReport) -> None:
+        session_log.info(f"Network path of {client_name}: {report}")
+        self.reports[client_name] = report
+
+    def network_reports(self) -> dict[str, NetworkReport]:
+        return self.reports.copy()
+
+    def list_scenes(self) -> ScenesResponse:
+        return ScenesResponse(scenes=sorted(self.scenes), current=self.current_scene)
+
+    def _validate_scene_ports_exist(self, edges: frozenset[Edge]) -> None:
+        with span("jack.get_ports"):
+            existing = {p.name for p in self.client.get_ports()}
+
+        for source, destination in sorted(edges):
+            ports: list[tuple[PortDirectionType, str]] = [
+                ("source", source),
+                ("destination", destination),
+            ]
+            for type, name in ports:
+                if name not in existing:
+                    data = PortNotFound(type=type, name=PortName.parse(name))
+                    raise PortConnectorError(data)
+
+    def _restore_scene(self, connected: list[Edge], disconnected: list[Edge]) -> None:
+        for source, destination in connected:
+            with contextlib.suppress(jack.JackError):
+                self.client.disconnect(source, destination)
+        for source, destination in disconnected:
+            with contextlib.suppress(jack.JackError):
+                self.client.connect(source, destination)
+
+    def _apply_scene(self, target: frozenset[Edge]) -> tuple[list[Edge], list[Edge]]:
+        """
+        Returns connected and disconnected edges. Connections that existed
+        before (made by client sessions) are left alone and not owned by scene.
+        """
+        to_connect, to_disconnect = diff_edges(self.scene_edges, target)
+
+        for source, destination in to_disconnect:
+            with contextlib.suppress(jack.JackError):  # Port is gone
+                self.client.disconnect(source, destination)
+
+        connected: list[Edge] = []
+        for source, destination in to_connect:
+            try:
+                self.client.connect(source, destination)
+            except jack.JackError as exc:
+                if getattr(exc, "code", None) == errno.EEXIST:
+                    continue
+                self._restore_scene(connected, to_disconnect)
+                data = FailedToConnectPorts(
+                    source=PortName.parse(source),
+                    destination=PortName.parse(destination),
+                )
+                raise PortConnectorError(data)
+            connected.append((source, destination))
+
+        self.scene_edges.difference_update(to_disconnect)
+        self.scene_edges.update(connected)
+        return connected, to_disconnect
+
+    def switch_scene(self, name: str) -> SceneSwitchResponse:
+        """Replace connections made by current scene with ones of `name` scene."""
+        if (target := self.scenes.get(name)) is None:
+            raise PortConnectorError(SceneNotFound(name=name))
+
+        with self._admit(), self.lock, span("server.switch_scene", scene=name):
+            start = time.perf_counter()
+            self._validate_scene_ports_exist(target)
+            connected, disconnected = self._apply_scene(target)
+            self.current_scene = name
+            duration = time.perf_counter() - start
+
+        session_log.info(
+            f"Switched to scene [bold green]{name}[/bold green] in"
+            + f" {duration * 1000:.2f} ms: {len(connected)} connected,"
+            + f" {len(disconnected)} disconnected"
+        )
+        return SceneSwitchResponse(
+            scene=name,
+            connected=len(connected),
+            disconnected=len(disconnected),
+            duration_ms=duration * 1000,
+        )
@@ -0,0 +1,116 @@
+"""
+Choosing between candidate servers. Every candidate is probed at once:
+`/init` tells whether it would take us, echo packets (or `/init` round trip
+if it doesn't serve echo) tell how far it is. Session goes to the closest
+healthy one and moves to the next best when it's lost.
+"""
+
+import statistics
+import time
+from dataclasses import dataclass
+from ipaddress import IPv4Address
+
+import anyio
+import httpx
+
+from jackson.api_client import APIClient, ServerError
+from jackson.connector_server import InitResponse
+from jackson.probe import measure_rtts
+
+PROBE_TIMEOUT = 5.0  # In seconds
+RTT_PACKETS = 5
+
+
+@dataclass
+class ServerCandidate:
+    api: APIClient
+    host: IPv4Address
+    jacktrip_port: int
+
+    def __str__(self) -> str:
+        return str(self.api.client.base_url)
+
+
+@dataclass
+class ProbeResult:
+    candidate: ServerCandidate
+    init: InitResponse | None = None
+    rtt: float | None = None  # In seconds
+    error: str | None = None
+
+
+@dataclass
+class Failover:
+    lost: ServerCandidate
+    chosen: ServerCandidate
+    reason: str
+    duration: float  # From loss until session is connected again, in seconds
+
+
+class ServerLost(Exception):
+    """Active server stopped answering, session should move to another one."""
+
+
+class NoHealthyServer(Exception):
+    def __init__(self, results: list[ProbeResult]) -> None:
+        errors = "; ".join(f"{r.candidate}: {r.error}" for r in results)
+        super().__init__(f"No server can take the session: {errors}")
+
+
+async def _measure_echo_rtt(host: IPv4Address, port: int) -> float | None:
+    rtts = await measure_rtts(host, port, count=RTT_PACKETS, interval=0.01, timeout=0.2)
+    received = [r for r in rtts if r is not None]
+    return statistics.median(received) if received else None
+
+
+async def probe_server(
+    candidate: ServerCandidate,
+    receive_channels: int,
+    send_channels: int,
+    timeout: float = PROBE_TIMEOUT,
+) -> ProbeResult:
+    start = time.perf_counter()
+    try:
+        with anyio.fail_after(timeout):
+            init = await candidate.api.init(receive_channels, send_channels)
+            rtt = time.perf_counter() - start
+            if init.probe_port:
+                rtt = await _measure_echo_rtt(candidate.host, init.probe_port) or rtt
+    except (httpx.HTTPError, ServerError, TimeoutError) as exc:
+        return ProbeResult(candidate, error=repr(exc))
+
+    return ProbeResult(candidate, init=init, rtt=rtt)
+
+
+async def probe_servers(
+    candidates: list[ServerCandidate],
+    receive_channels: int,
+    send_channels: int,
+    timeout: float = PROBE_TIMEOUT,
+) -> list[ProbeResult]:
+    results: dict[int, ProbeResult] = {}
+
+    async def probe(idx: int, candidate: ServerCandidate) -> None:
+        results[idx] = await probe_server(
+            candidate, receive_channels, send_channels, timeout
+        )
+
+    async with anyio.create_task_group() as tg:
+        for idx, candidate in enumerate(candidates):
+            tg.start_soon(probe, idx, candidate)
+
+    return [results[idx] for idx in range(len(candidates))]
+
+
+def choose_server(
+    results: list[ProbeResult], avoid: ServerCandidate | None = None
+) -> ProbeResult:
+    """
+    Lowest-latency healthy server. `avoid` (the one just lost) is chosen only
+    if nothing else is healthy: its API may be up while its stream is not.
+    """
+    healthy = [r for r in results if r.init and r.rtt is not None]
+    preferred = [r for r in healthy if r.candidate != avoid] or healthy
+    if not preferred:
+        raise NoHealthyServer(results)
+    return min(preferred, key=lambda r: r.rtt or 0)
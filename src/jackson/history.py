@@ -0,0 +1,141 @@
+"""
+Time series of server health for post-mortems: xruns, DSP load, JackTrip
+underruns and connect latency.
+
+Every series keeps a fixed-size, array-backed ring per resolution. A sample
+is folded into the current bucket of each ring, so coarser rings are
+downsampled versions of finer ones that reach further back. Memory doesn't
+grow with uptime.
+"""
+
+import gzip
+import json
+import math
+import os
+import threading
+import time
+from array import array
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Literal, get_args
+
+from pydantic import BaseModel
+
+Series = Literal["xruns", "dsp_load", "jacktrip_underruns", "connect_latency_ms"]
+SERIES: tuple[Series, ...] = get_args(Series)
+
+# Resolution in seconds to number of buckets: 1 hour, 6 hours, 1 day
+DEFAULT_CAPACITIES = {1: 3600, 10: 2160, 60: 1440}
+
+Point = tuple[float, int, float, float]  # (bucket start, samples, mean, max)
+
+
+class HistoryResponse(BaseModel):
+    series: Series
+    resolution: int  # In seconds
+    points: list[Point]
+
+
+@dataclass
+class Ring:
+    """Aggregates of samples in `capacity` most recent buckets."""
+
+    resolution: int
+    capacity: int
+
+    buckets: "array[int]" = field(init=False)  # Bucket number, -1 if unused
+    counts: "array[int]" = field(init=False)
+    sums: "array[float]" = field(init=False)
+    maxes: "array[float]" = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.buckets = array("q", [-1]) * self.capacity
+        self.counts = array("q", [0]) * self.capacity
+        self.sums = array("d", [0]) * self.capacity
+        self.maxes = array("d", [0]) * self.capacity
+
+    def add(self, now: float, value: float) -> None:
+        bucket = int(now // self.resolution)
+        idx = bucket % self.capacity
+
+        if self.buckets[idx] != bucket:  # Overwrite bucket from previous lap
+            self.buckets[idx] = bucket
+            self.counts[idx] = 0
+            self.sums[idx] = 0
+            self.maxes[idx] = -math.inf
+
+        self.counts[idx] += 1
+        self.sums[idx] += value
+        self.maxes[idx] = max(self.maxes[idx], value)
+
+    def points(self, now: float, since: float = 0) -> list[Point]:
+        last = int(now // self.resolution)
+        first = max(last - self.capacity + 1, int(since // self.resolution))
+
+        result: list[Point] = []
+        for bucket in range(first, last + 1):
+            idx = bucket % self.capacity
+            if self.buckets[idx] != bucket:
+                continue
+            count = self.counts[idx]
+            result.append(
+                (
+                    bucket * self.resolution,
+                    count,
+                    self.sums[idx] / count,
+                    self.maxes[idx],
+                )
+            )
+        return result
+
+
+@dataclass
+class MetricsHistory:
+    """Thread-safe: samples come from JACK, API and event loop threads."""
+
+    capacities: dict[int, int] = field(default_factory=DEFAULT_CAPACITIES.copy)
+    clock: Callable[[], float] = time.time
+
+    rings: dict[Series, dict[int, Ring]] = field(init=False)
+    lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def __post_init__(self) -> None:
+        self.rings = {
+            series: {res: Ring(res, cap) for res, cap in self.capacities.items()}
+            for series in SERIES
+        }
+
+    @property
+    def resolutions(self) -> list[int]:
+        return sorted(self.capacities)
+
+    def record(self, series: Series, value: float = 1) -> None:
+        now = self.clock()
+        with self.lock:
+            for ring in self.rings[series].values():
+                ring.add(now, value)
+
+    def query(
+        self, series: Series, resolution: int, since: float = 0
+    ) -> HistoryResponse:
+        """Raises KeyError for resolution that isn't kept."""
+        now = self.clock()
+        with self.lock:
+            points = self.rings[series][resolution].points(now, since=since)
+        return HistoryResponse(series=series, resolution=resolution, points=points)
+
+    def dump(self, path: str) -> None:
+        """Write every series at every resolution as gzipped JSON."""
+        data = [
+            self.query(series, res).dict()
+            for series in SERIES
+            for res in self.resolutions
+        ]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with gzip.open(path, "wt") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+
+def read_dump(path: str) -> list[HistoryResponse]:
+    with gzip.open(path, "rt") as f:
+        return [HistoryResponse(**item) for item in json.load(f)]
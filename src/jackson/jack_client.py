@@ -9,3 +9,13 @@ def connect_ports_and_log(client: jack.Client, source: str, destination: str) ->
         f"Connected ports: [bold green]{source}[/bold green] ->"
         + f" [bold green]{destination}[/bold green]"
     )
+
+
+def disconnect_ports_and_log(
+    client: jack.Client, source: str, destination: str
+) -> None:
+    client.disconnect(source, destination)
+    log.info(
+        f"Disconnected ports: [bold red]{source}[/bold red] ->"
+        + f" [bold red]{destination}[/bold red]"
+    )
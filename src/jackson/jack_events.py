@@ -0,0 +1,154 @@
+import asyncio
+import contextlib
+import math
+from collections import deque
+from collections.abc import Awaitable, Callable, Generator, Iterable
+from dataclasses import dataclass, field
+
+import anyio
+import jack
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+
+
+@dataclass(frozen=True)
+class ClientRegistered:
+    name: str
+    registered: bool
+
+
+@dataclass(frozen=True)
+class PortRegistered:
+    name: str
+    registered: bool
+
+
+@dataclass(frozen=True)
+class PortsConnected:
+    source: str
+    destination: str
+    connected: bool
+
+
+@dataclass(frozen=True)
+class XRun:
+    delay: float  # In microseconds
+
+
+JackEvent = ClientRegistered | PortRegistered | PortsConnected | XRun
+
+
+@dataclass
+class _Waiter:
+    predicate: Callable[[JackEvent], bool]
+    event: anyio.Event = field(default_factory=anyio.Event)
+
+
+@dataclass
+class JackEvents:
+    """
+    Forwards JACK notification callbacks into the event loop.
+
+    JACK calls back on its own thread, where touching loop primitives is not
+    safe. Callbacks only append to a deque (atomic, no locks) and schedule
+    one wakeup of the loop until it runs, which then delivers everything
+    queued so far to subscribers and waiters in one batch.
+    """
+
+    client: jack.Client
+
+    _loop: asyncio.AbstractEventLoop = field(init=False)
+    _pending: deque[JackEvent] = field(default_factory=deque[JackEvent], init=False)
+    _wakeup_scheduled: bool = field(default=False, init=False)
+    _subscribers: set[MemoryObjectSendStream[JackEvent]] = field(
+        default_factory=set[MemoryObjectSendStream[JackEvent]], init=False
+    )
+    _waiters: list[_Waiter] = field(default_factory=list[_Waiter], init=False)
+
+    def install(self) -> None:
+        """Set callbacks. Call from event loop before client is activated."""
+        self._loop = asyncio.get_running_loop()
+        self.client.set_client_registration_callback(
+            lambda name, registered: self._push(ClientRegistered(name, registered))
+        )
+        self.client.set_port_registration_callback(
+            lambda port, registered: self._push(PortRegistered(port.name, registered))
+        )
+        self.client.set_port_connect_callback(
+            lambda a, b, connected: self._push(
+                PortsConnected(a.name, b.name, connected)
+            )
+        )
+        self.client.set_xrun_callback(lambda delay: self._push(XRun(delay)))
+
+    def _push(self, event: JackEvent) -> None:
+        """Runs on JACK notification thread."""
+        self._pending.append(event)
+        if self._wakeup_scheduled:
+            return
+
+        self._wakeup_scheduled = True
+        with contextlib.suppress(RuntimeError):  # Loop is closed
+            self._loop.call_soon_threadsafe(self._deliver)
+
+    def _deliver(self) -> None:
+        # Reset first: events pushed while draining schedule another wakeup
+        self._wakeup_scheduled = False
+
+        while self._pending:
+            event = self._pending.popleft()
+
+            for stream in self._subscribers:
+                stream.send_nowait(event)
+
+            for waiter in self._waiters:
+                if waiter.predicate(event):
+                    waiter.event.set()
+
+    @contextlib.contextmanager
+    def subscribe(self) -> Generator[MemoryObjectReceiveStream[JackEvent], None, None]:
+        """Stream of every event delivered while subscribed."""
+        streams = anyio.create_memory_object_stream(math.inf)
+        send: MemoryObjectSendStream[JackEvent] = streams[0]
+        receive: MemoryObjectReceiveStream[JackEvent] = streams[1]
+        self._subscribers.add(send)
+        try:
+            yield receive
+        finally:
+            self._subscribers.discard(send)
+            send.close()
+
+    async def wait_for(
+        self,
+        predicate: Callable[[JackEvent], bool],
+        ready: Callable[[], Awaitable[bool]] | None = None,
+    ) -> None:
+        """
+        Wait until event matching `predicate` is delivered. `ready` is checked
+        after waiter is registered so state reached earlier is not missed.
+        """
+        waiter = _Waiter(predicate)
+        self._waiters.append(waiter)
+        try:
+            if not (ready and await ready()):
+                await waiter.event.wait()
+        finally:
+            self._waiters.remove(waiter)
+
+    async def wait_ports(self, names: Iterable[str]) -> None:
+        """Wait until all ports exist."""
+        missing = set(names)
+
+        async def ready() -> bool:
+            # Takes JACK's graph lock, keep it off the event loop
+            ports = await anyio.to_thread.run_sync(
+                self.client.get_ports, cancellable=True
+            )
+            missing.difference_update(p.name for p in ports)
+            return not missing
+
+        def predicate(event: JackEvent) -> bool:
+            if isinstance(event, PortRegistered) and event.registered:
+                missing.discard(event.name)
+            return not missing
+
+        await self.wait_for(predicate, ready=ready)
@@ -1,6 +1,8 @@
 import contextlib
 import logging
 import os
+import re
+import subprocess
 from collections.abc import AsyncGenerator, Callable
 from dataclasses import dataclass, field
 from ipaddress import IPv4Address
@@ -9,7 +11,12 @@ import anyio
 from anyio.abc import ByteReceiveStream, Process
 from anyio.streams.text import TextReceiveStream
 
+from jackson.realtime import RealtimePolicy, apply_policy
+
 JACK_CLIENT_NAME = "JackTrip"
+KILL_TIMEOUT = 3.0  # In seconds
+# Receive side ran out of packets
+UNDERRUN_PATTERN = re.compile(r"underrun|UDP waiting too long", re.IGNORECASE)
 
 
 async def _restream_stream(
@@ -21,27 +28,67 @@ async def _restream_stream(
             handler(line.strip())
 
 
+@dataclass
+class ProcessExited(Exception):
+    """Process exited on its own, not because it was stopped."""
+
+    cmd: list[str]
+    returncode: int | None
+
+    def __str__(self) -> str:
+        return f"{self.cmd[0]} exited with code {self.returncode}"
+
+
 @dataclass
 class StreamingProcess:
     cmd: list[str]
     env: dict[str, str]
     log: logging.Logger
+    kill_timeout: float = KILL_TIMEOUT
+    stream_output: bool = True  # Otherwise process writes to our stdout and stderr
+    on_output: Callable[[str], None] | None = None  # Called with each streamed line
+    realtime: RealtimePolicy | None = None
 
     process: Process | None = field(default=None, init=False)
     is_stopping: bool = field(default=False, init=False)
+    _realtime_denied: bool = field(default=False, init=False)
 
     @contextlib.asynccontextmanager
     async def _open_process_and_stream(self) -> AsyncGenerator[Process, None]:
         env = dict(os.environ)
         env.update(self.env)
 
-        async with await anyio.open_process(self.cmd, env=env) as process:
+        pipe = subprocess.PIPE if self.stream_output else None
+        async with await anyio.open_process(
+            self.cmd, env=env, stdout=pipe, stderr=pipe
+        ) as process:
             async with anyio.create_task_group() as tg:
-                tg.start_soon(lambda: _restream_stream(process.stderr, self.log.error))
+                if self.stream_output:
+                    tg.start_soon(
+                        lambda: _restream_stream(process.stderr, self._handle_line)
+                    )
                 yield process
 
+    def _handle_line(self, line: str) -> None:
+        self.log.error(line)
+        if self.on_output:
+            self.on_output(line)
+
+    def apply_realtime(self) -> None:
+        """
+        Apply realtime policy to threads that don't have it yet. Call once
+        bridge ports are there: threads that matter don't exist before.
+        """
+        if not self.realtime or self._realtime_denied:
+            return
+        if not self.process or self.process.returncode is not None:
+            return
+        if not apply_policy(self.process.pid, self.realtime, self.log):
+            self._realtime_denied = True  # Don't repeat the warning
+
     async def start(self) -> None:
         self.is_stopping = False
+        self._realtime_denied = False
 
         async with self._open_process_and_stream() as self.process:
             try:
@@ -51,8 +98,10 @@ class StreamingProcess:
                     await self.stop()
                     pass
             else:
-                code = await self.stop()
-                raise SystemExit(code)
+                if self.is_stopping:
+                    return  # Stopped on purpose, not crashed
+                await self.stop()
+                raise ProcessExited(self.cmd, self.process.returncode)
 
     async def stop(self) -> None:
         if not self.process or self.is_stopping:
@@ -63,80 +112,84 @@ class StreamingProcess:
         if self.process.returncode is None:
             self.process.terminate()
 
+            with anyio.move_on_after(self.kill_timeout):
+                await self.process.wait()
+
+            if self.process.returncode is None:
+                self.log.warning(
+                    f"Process didn't exit in {self.kill_timeout} s after SIGTERM,"
+                    + " killing it"
+                )
+                self.process.kill()
+
         await self.process.wait()
 
         # Otherwise RuntimeError('Event loop is closed') might be called
         self.process._process._transport.close()  # pyright: ignore
 
 
-def _get_jacktrip(
-    cmd: list[str], jack_server_name: str, log: logging.Logger
-) -> StreamingProcess:
-    cmd_ = cmd.copy()
-    cmd_.insert(0, "jacktrip")
-    env = {"JACK_DEFAULT_SERVER": jack_server_name}
-    return StreamingProcess(cmd=cmd_, env=env, log=log)
-
-
-def _build_server_cmd(*, port: int) -> list[str]:
-    return [
-        "--jacktripserver",
-        "--bindport",
-        str(port),
-        "--nojackportsconnect",
-        "--udprt",
-    ]
-
-
-def get_server(
-    *, jack_server_name: str, port: int, log: logging.Logger
-) -> StreamingProcess:
-    cmd = _build_server_cmd(port=port)
-    return _get_jacktrip(cmd, jack_server_name, log)
-
-
-def _build_client_cmd(
-    *,
-    server_host: IPv4Address,
-    server_port: int,
-    receive_channels: int,
-    send_channels: int,
-    remote_name: str,
-) -> list[str]:
-    return [
-        "--pingtoserver",
-        str(server_host),
-        "--receivechannels",
-        str(receive_channels or 1),
-        # JackTrip doesn't allow one-way channel broadcasting
-        "--sendchannels",
-        str(send_channels or 1),
-        "--peerport",
-        str(server_port),
-        "--clientname",
-        JACK_CLIENT_NAME,
-        "--remotename",
-        remote_name,
-        "--nojackportsconnect",
-        "--udprt",
-    ]
-
-
-def get_client(
-    *,
-    jack_server_name: str,
-    server_host: IPv4Address,
-    server_port: int,
-    receive_channels: int,
-    send_channels: int,
-    remote_name: str,
-    log: logging.Logger,
-) -> StreamingProcess:
-    cmd = _build_client_cmd(
-        server_host=server_host,
-        server_port=server_port,
-        receive_channels=receive_channels,
-        send_channels=send_channels,
-        remote_name=remote_name,
-    )
-    return _get_jacktrip(cmd, jack_server_name, log)
+@dataclass
+class JackTripBackend:
+    """
+    JackTrip hub: server listens on one port, clients introduce themselves
+    with `--remotename` and get `<remote name>:send_N`/`receive_N` ports there.
+    """
+
+    name: str = "jacktrip"
+    bridge_client_name: str = JACK_CLIENT_NAME
+    executable: tuple[str, ...] = ("jacktrip",)
+
+    def build_server_cmd(
+        self, *, port: int, udp_base_port: int | None = None
+    ) -> list[str]:
+        cmd = [
+            *self.executable,
+            "--jacktripserver",
+            "--bindport",
+            str(port),
+            "--nojackportsconnect",
+            "--udprt",
+        ]
+        if udp_base_port:
+            # Hubs on one machine would hand out the same UDP ports otherwise
+            cmd += ["--udpbaseport", str(udp_base_port)]
+        return cmd
+
+    def build_client_cmd(
+        self,
+        *,
+        server_host: IPv4Address,
+        server_port: int,
+        receive_channels: int,
+        send_channels: int,
+        remote_name: str,
+        queue_length: int | None,
+        exit_on_timeout: bool = False,
+    ) -> list[str]:
+        cmd = [
+            *self.executable,
+            "--pingtoserver",
+            str(server_host),
+            "--receivechannels",
+            str(receive_channels or 1),
+            # JackTrip doesn't allow one-way channel broadcasting
+            "--sendchannels",
+            str(send_channels or 1),
+            "--peerport",
+            str(server_port),
+            "--clientname",
+            self.bridge_client_name,
+            "--remotename",
+            remote_name,
+            "--nojackportsconnect",
+            "--udprt",
+        ]
+        if queue_length:
+            cmd += ["--queue", str(queue_length)]
+        if exit_on_timeout:
+            # Quit after 10 s without packets from server, so the loss is noticed
+            cmd.append("--timeout")
+        return cmd
+
+    def is_underrun(self, line: str) -> bool:
+        return bool(UNDERRUN_PATTERN.search(line))
@@ -0,0 +1,61 @@
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+DEFAULT_LEASE_TTL = 10.0  # In seconds
+
+Edge = tuple[str, str]
+
+
+@dataclass
+class Lease:
+    """Connections made on behalf of one client that are valid until `expires_at`."""
+
+    client_name: str
+    expires_at: float
+    edges: set[Edge] = field(default_factory=set[Edge])
+
+    def is_expired(self, now: float) -> bool:
+        return now >= self.expires_at
+
+
+@dataclass
+class LeaseRegistry:
+    """Client sessions keyed by client name. Not thread-safe."""
+
+    ttl: float = DEFAULT_LEASE_TTL
+    clock: Callable[[], float] = time.monotonic
+    leases: dict[str, Lease] = field(default_factory=dict[str, Lease], init=False)
+
+    def acquire(self, client_name: str) -> Lease:
+        """Get renewed lease for client, create one if it doesn't exist."""
+        expires_at = self.clock() + self.ttl
+
+        if lease := self.leases.get(client_name):
+            lease.expires_at = expires_at
+        else:
+            lease = Lease(client_name=client_name, expires_at=expires_at)
+            self.leases[client_name] = lease
+
+        return lease
+
+    def renew(self, client_name: str) -> Lease | None:
+        """Extend lease. Returns None if there's no lease or it has expired already."""
+        lease = self.leases.get(client_name)
+        now = self.clock()
+
+        if not lease or lease.is_expired(now):
+            return None
+
+        lease.expires_at = now + self.ttl
+        return lease
+
+    def release(self, client_name: str) -> Lease | None:
+        return self.leases.pop(client_name, None)
+
+    def release_expired(self) -> list[Lease]:
+        now = self.clock()
+        expired = [lease for lease in self.leases.values() if lease.is_expired(now)]
+        for lease in expired:
+            del self.leases[lease.client_name]
+        return expired
@@ -0,0 +1,155 @@
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import anyio
+
+from jackson.logging import manager_log as log
+from jackson.tracing import span
+
+DEFAULT_START_TIMEOUT = 30.0  # In seconds
+DEFAULT_STOP_TIMEOUT = 5.0  # In seconds
+
+Step = Callable[[], Awaitable[None]]
+
+
+@dataclass
+class Component:
+    name: str
+    start: Step | None = None
+    stop: Step | None = None
+    depends_on: tuple[str, ...] = ()
+    start_timeout: float = DEFAULT_START_TIMEOUT
+    stop_timeout: float = DEFAULT_STOP_TIMEOUT
+
+
+@dataclass
+class Timings:
+    start: float | None = None  # In seconds
+    stop: float | None = None  # In seconds
+
+
+def _check_graph(components: dict[str, Component]) -> None:
+    for component in components.values():
+        for dep in component.depends_on:
+            if dep not in components:
+                raise ValueError(f"{component.name} depends on unknown {dep}")
+
+    visiting: set[str] = set()
+    visited: set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through {name}")
+        visiting.add(name)
+        for dep in components[name].depends_on:
+            visit(dep)
+        visiting.remove(name)
+        visited.add(name)
+
+    for name in components:
+        visit(name)
+
+
+def _format_timings(timings: dict[str, float | None]) -> str:
+    return ", ".join(
+        f"{name} {'timed out' if t is None else f'{t:.2f} s'}"
+        for name, t in timings.items()
+    )
+
+
+@dataclass
+class Lifecycle:
+    """
+    Starts components once everything they depend on is started and stops them
+    once everything that depends on them is stopped. Independent components
+    start and stop concurrently.
+
+    Every step has a deadline. Start step that misses it fails the start,
+    stop step that misses it (or fails) is abandoned so the rest can stop.
+    """
+
+    name: str
+    components: list[Component]
+
+    timings: dict[str, Timings] = field(init=False)
+    _started: set[str] = field(default_factory=set[str], init=False)
+
+    def __post_init__(self) -> None:
+        by_name = {c.name: c for c in self.components}
+        if len(by_name) != len(self.components):
+            raise ValueError("Component names must be unique")
+        _check_graph(by_name)
+        self.timings = {c.name: Timings() for c in self.components}
+
+    async def _start_component(
+        self, component: Component, ready: dict[str, anyio.Event]
+    ) -> None:
+        for dep in component.depends_on:
+            await ready[dep].wait()
+
+        # Partially started component still gets its stop step
+        self._started.add(component.name)
+        if component.start:
+            begin = time.perf_counter()
+            with span(f"{self.name}.{component.name}.start"), anyio.fail_after(
+                component.start_timeout
+            ):
+                await component.start()
+            self.timings[component.name].start = time.perf_counter() - begin
+
+        ready[component.name].set()
+
+    async def start(self) -> None:
+        ready = {c.name: anyio.Event() for c in self.components}
+        async with anyio.create_task_group() as tg:
+            for component in self.components:
+                tg.start_soon(self._start_component, component, ready)
+
+        started = {
+            c.name: self.timings[c.name].start for c in self.components if c.start
+        }
+        log.info(f"Started {self.name}: {_format_timings(started)}")
+
+    async def _stop_component(
+        self, component: Component, stopped: dict[str, anyio.Event]
+    ) -> None:
+        for other in self.components:
+            if component.name in other.depends_on:
+                await stopped[other.name].wait()
+
+        if component.stop and component.name in self._started:
+            begin = time.perf_counter()
+            with span(f"{self.name}.{component.name}.stop"), anyio.move_on_after(
+                component.stop_timeout
+            ) as scope:
+                try:
+                    await component.stop()
+                except Exception:
+                    log.exception(f"Failed to stop {component.name}")
+
+            if scope.cancel_called:
+                log.warning(
+                    f"{component.name} didn't stop in {component.stop_timeout} s,"
+                    + " abandoned it"
+                )
+            else:
+                self.timings[component.name].stop = time.perf_counter() - begin
+
+        stopped[component.name].set()
+
+    async def stop(self) -> None:
+        """Stop components that were started. Never raises."""
+        stopped = {c.name: anyio.Event() for c in self.components}
+        async with anyio.create_task_group() as tg:
+            for component in self.components:
+                tg.start_soon(self._stop_component, component, stopped)
+
+        stopped_ = {
+            c.name: self.timings[c.name].stop
+            for c in self.components
+            if c.stop and c.name in self._started
+        }
+        log.info(f"Stopped {self.name}: {_format_timings(stopped_)}")
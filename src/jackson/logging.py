@@ -1,5 +1,6 @@
 import logging
 import os
+from contextvars import ContextVar
 from logging.handlers import RotatingFileHandler
 from typing import ClassVar, Literal
 
@@ -7,26 +8,48 @@ import jack
 import jack_server
 import rich.traceback
 from rich.logging import RichHandler
+from rich.markup import escape
 from rich.text import Text
 
 _loggers_name_to_progname: dict[str, str] = {}
-_Mode = Literal["server", "client"]
+Mode = Literal["server", "client", "netsim"]
+
+# Set in tasks of each client session when several run in one process
+session_name: ContextVar[str | None] = ContextVar("session_name", default=None)
+
+
+def _add_session_name(record: logging.LogRecord, message: str, markup: bool) -> str:
+    if not (name := getattr(record, "session_name", None)):
+        return message
+    prefix = f"[{name}]"
+    return f"{escape(prefix) if markup else prefix} {message}"
+
+
+class _ConsoleFormatter(logging.Formatter):
+    # RichHandler calls it instead of `format` for records with exceptions
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        message = super().formatMessage(record)
+        return _add_session_name(record, message, markup=True)
 
 
 def _get_console_handler(prog_name: str) -> RichHandler:
     time_with_prog_name = f"[%X] [{prog_name}] "
-    return RichHandler(
+    handler = RichHandler(
         log_time_format=time_with_prog_name, markup=True, rich_tracebacks=True
     )
+    handler.setFormatter(_ConsoleFormatter())
+    return handler
 
 
 class _RichMarkupStripper(logging.Formatter):
-    def format(self, record: logging.LogRecord) -> str:
-        text = super().format(record)
-        return Text.from_markup(text=text).plain
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        # Session name is added after stripping, it'd be taken for markup
+        message = Text.from_markup(text=record.message).plain
+        record.message = _add_session_name(record, message, markup=False)
+        return super().formatMessage(record)
 
 
-def _get_file_handler(mode: _Mode, name: str) -> RotatingFileHandler:
+def _get_file_handler(mode: Mode, name: str) -> RotatingFileHandler:
     os.makedirs(f"log/{mode}", exist_ok=True)
 
     filename = f"log/{mode}/{name}.log"
@@ -41,12 +64,25 @@ def _get_file_handler(mode: _Mode, name: str) -> RotatingFileHandler:
     return handler
 
 
-def _configure_logger(logger: logging.Logger, prog_name: str, mode: _Mode) -> None:
+class _SessionNameFilter(logging.Filter):
+    """
+    Tag records with name of session they come from, if any. Handlers put it
+    in front of the message.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.session_name = session_name.get()
+        return True
+
+
+def _configure_logger(logger: logging.Logger, prog_name: str, mode: Mode) -> None:
+    # After message filters, which see message as it was logged
+    logger.addFilter(_SessionNameFilter())
     logger.addHandler(_get_console_handler(prog_name))
     logger.addHandler(_get_file_handler(mode=mode, name=logger.name))
 
 
-def configure_logging(mode: _Mode) -> None:
+def configure_logging(mode: Mode) -> None:
     for name, prog_name in _loggers_name_to_progname.items():
         _configure_logger(logging.getLogger(name), prog_name=prog_name, mode=mode)
     rich.traceback.install(show_locals=True)
@@ -96,6 +132,11 @@ class JackTripFilter(MessageFilter):
 jack_client_log = get_logger("JackClient")
 jack_server_log = get_logger("JackServer")
 jacktrip_log = get_logger("JackTrip", filter=JackTripFilter())
+session_log = get_logger("Session")
+recorder_log = get_logger("Recorder")
+manager_log = get_logger("Manager")
+api_log = get_logger("API")
+netsim_log = get_logger("Netsim")
 get_logger("HttpServer", "uvicorn.access")
 
 
@@ -0,0 +1,126 @@
+"""
+Event loop lag: how late the loop gets around to a task that asked to wake
+up. Anything blocking the loop thread (a synchronous JACK call, heavy
+parsing) shows up here and stalls API, log restreaming and heartbeats alike.
+
+A ticker task measures every wakeup into a histogram. A watchdog thread
+notices a loop that hasn't ticked for too long and logs where the loop
+thread is stuck while it's still stuck.
+"""
+
+import bisect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from types import FrameType
+
+import anyio
+from pydantic import BaseModel
+
+from jackson.logging import manager_log
+from jackson.tracing import format_frame
+
+# Upper bounds of histogram buckets in seconds, last bucket is everything above
+LAG_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+DEFAULT_INTERVAL = 0.01  # In seconds
+DEFAULT_STALL_THRESHOLD = 0.1  # In seconds
+_PACKAGE_DIR = os.path.dirname(__file__)
+
+
+class LoopLagHistogram(BaseModel):
+    buckets_ms: list[float]  # Upper bounds
+    counts: list[int]  # One more than buckets: lags above the last bound
+    samples: int
+    max_ms: float
+    stalls: int
+
+
+def get_call_site(frame: FrameType | None) -> str:
+    """Innermost frame, and innermost frame of our code if that's elsewhere."""
+    if not frame:
+        return "unknown"
+
+    own = frame
+    while own and not own.f_code.co_filename.startswith(_PACKAGE_DIR):
+        own = own.f_back
+
+    if not own or own is frame:
+        return format_frame(frame)
+    return f"{format_frame(frame)} called from {format_frame(own)}"
+
+
+@dataclass
+class LoopLagMonitor:
+    interval: float = DEFAULT_INTERVAL
+    stall_threshold: float = DEFAULT_STALL_THRESHOLD
+    log: logging.Logger = manager_log
+
+    counts: list[int] = field(init=False)
+    samples: int = field(default=0, init=False)
+    max_lag: float = field(default=0, init=False)  # In seconds
+    stalls: int = field(default=0, init=False)
+
+    _last_tick: float = field(default=0, init=False)  # Written by loop thread only
+    _loop_thread: int | None = field(default=None, init=False)
+    _stopping: threading.Event = field(default_factory=threading.Event, init=False)
+
+    def __post_init__(self) -> None:
+        self.counts = [0] * (len(LAG_BUCKETS) + 1)
+
+    def record(self, lag: float) -> None:
+        self.counts[bisect.bisect_left(LAG_BUCKETS, lag)] += 1
+        self.samples += 1
+        self.max_lag = max(self.max_lag, lag)
+
+    def _watch(self) -> None:
+        reported_tick = None
+        while not self._stopping.wait(self.interval):
+            tick = self._last_tick
+            stalled = time.perf_counter() - tick - self.interval
+            if stalled < self.stall_threshold or tick == reported_tick:
+                continue
+
+            # Loop thread is still inside the call that blocks it
+            assert self._loop_thread
+            frame = sys._current_frames().get(self._loop_thread)
+            self.stalls += 1
+            self.log.warning(
+                f"Event loop is stalled for {stalled * 1000:.0f} ms in"
+                + f" {get_call_site(frame)}"
+            )
+            reported_tick = tick
+
+    async def run(self) -> None:
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.perf_counter()
+        self._stopping.clear()
+        watchdog = threading.Thread(
+            target=self._watch, name="LoopLagWatchdog", daemon=True
+        )
+        watchdog.start()
+
+        try:
+            while True:
+                self._last_tick = start = time.perf_counter()
+                await anyio.sleep(self.interval)
+                self.record(max(0, time.perf_counter() - start - self.interval))
+        finally:
+            self._stopping.set()
+
+    def histogram(self) -> LoopLagHistogram:
+        return LoopLagHistogram(
+            buckets_ms=[b * 1000 for b in LAG_BUCKETS],
+            counts=self.counts.copy(),
+            samples=self.samples,
+            max_ms=self.max_lag * 1000,
+            stalls=self.stalls,
+        )
+
+    def dump(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.histogram().dict(), f)
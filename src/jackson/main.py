@@ -1,4 +1,10 @@
+import contextlib
 import io
+import os
+import sys
+from collections.abc import Generator, Mapping, Sequence
+from ipaddress import IPv4Address
+from typing import TYPE_CHECKING
 
 import anyio
 import click
@@ -7,75 +13,394 @@ import jack_server
 import yaml
 from jack_server._server import SetByJack_
 
-from jackson import jacktrip
+from jackson import realtime, transport
+from jackson.agent import run_api_workers
 from jackson.api_client import APIClient
-from jackson.logging import configure_logging, jacktrip_log
-from jackson.manager import Client, Server, run_manager
+from jackson.bandwidth import BandwidthBudget
+from jackson.failover import ServerCandidate
+from jackson.history import MetricsHistory
+from jackson.jacktrip import StreamingProcess
+from jackson.logging import Mode, api_log, configure_logging, jacktrip_log, manager_log
+from jackson.loop_lag import LoopLagMonitor
+from jackson.manager import Client, Server, run_manager, run_sessions
+from jackson.netsim import DEFAULT_LISTEN_PORT, Netsim, NetsimProfile
+from jackson.probe import probe_network
+from jackson.scenes import expand_scene
 from jackson.settings import ClientSettings, ServerSettings
+from jackson.shards import ShardPool, get_shard_ports, get_udp_base_port
+from jackson.tracing import SamplingProfiler, tracer
 
+if TYPE_CHECKING:
+    from jackson.metering import LevelMeter
+    from jackson.mixer import Mixer
+    from jackson.recorder import Recorder
 
-def get_server(settings: ServerSettings) -> Server:
-    jack_server_ = jack_server.Server(
-        name=settings.audio.jack_server_name,
-        driver=settings.audio.driver,
-        device=settings.audio.device or SetByJack_,
-        rate=settings.audio.sample_rate,
-        period=settings.audio.buffer_size,
-    )
-    jacktrip_ = jacktrip.get_server(
+
+def get_api_process(socket: str, port: int, workers: int) -> StreamingProcess:
+    cmd = [sys.executable, "-m", "jackson.main", "api", "--agent-socket", socket]
+    cmd += ["--port", str(port), "--workers", str(workers)]
+    return StreamingProcess(cmd=cmd, env={}, log=api_log, stream_output=False)
+
+
+def set_driver_channels(server: jack_server.Server, channels: int | None) -> None:
+    """
+    Dummy driver has 2 capture and 2 playback ports unless told otherwise.
+    Same parameters of other drivers are device names.
+    """
+    if channels is None or server.driver.name != "dummy":
+        return
+    for name in ("capture", "playback"):
+        server.driver.params[name].value = channels
+
+
+def get_loop_lag_path(mode: Mode) -> str:
+    return f"log/{mode}/loop_lag.json"
+
+
+def get_server(settings: ServerSettings, agent_only: bool = False) -> Server:
+    """
+    With `agent_only`, JACK server and JackTrip are expected to be already
+    running and API to be served by `jackson api` processes. Clients aren't
+    spread between shards then: only the hub on `jacktrip_port` is known.
+    """
+    transport_ = transport.get_transport(settings.transport)
+    shard_count = settings.server.jacktrip_shards
+    if agent_only and shard_count > 1:
+        manager_log.warning(
+            "Ignoring jacktrip_shards: in agent mode JackTrip isn't started here,"
+            + f" clients are sent to port {settings.server.jacktrip_port}"
+        )
+        shard_count = 1
+    shard_ports = get_shard_ports(settings.server.jacktrip_port, shard_count)
+    jacktrips: list[StreamingProcess] = []
+    if agent_only:
+        jack_server_ = None
+    else:
+        jack_server_ = jack_server.Server(
+            name=settings.audio.jack_server_name,
+            driver=settings.audio.driver,
+            device=settings.audio.device or SetByJack_,
+            rate=settings.audio.sample_rate,
+            period=settings.audio.buffer_size,
+        )
+        set_driver_channels(jack_server_, settings.audio.channels)
+        jacktrips = [
+            transport.get_server(
+                transport_,
+                jack_server_name=settings.audio.jack_server_name,
+                port=port,
+                log=jacktrip_log,
+                realtime=settings.realtime.get_shard_policy(idx, shard_count),
+                udp_base_port=get_udp_base_port(idx, shard_count)
+                if shard_count > 1
+                else None,
+            )
+            for idx, port in enumerate(shard_ports)
+        ]
+
+    socket = settings.server.agent_socket
+    api_port = settings.server.api_port
+
+    def get_api_process_() -> StreamingProcess:
+        assert socket
+        return get_api_process(socket, api_port, settings.server.api_workers)
+
+    def get_meter() -> "LevelMeter":
+        from jackson.metering import get_level_meter
+
+        return get_level_meter(
+            server_name=settings.audio.jack_server_name,
+            channels=settings.metering.channels,
+            publish_rate=settings.metering.publish_rate,
+        )
+
+    def get_recorder() -> "Recorder":
+        from jackson.recorder import get_recorder
+
+        return get_recorder(
+            server_name=settings.audio.jack_server_name,
+            directory=settings.recorder.directory,
+            channels=settings.recorder.channels,
+            buffer_seconds=settings.recorder.buffer_seconds,
+        )
+
+    def get_mixer() -> "Mixer":
+        from jackson.mixer import get_mixer
+
+        return get_mixer(
+            server_name=settings.audio.jack_server_name,
+            inputs=settings.mixer.inputs,
+            outputs=settings.mixer.outputs,
+            smoothing_time=settings.mixer.smoothing_ms / 1000,
+        )
+
+    return Server(
         jack_server_name=settings.audio.jack_server_name,
-        port=settings.server.jacktrip_port,
-        log=jacktrip_log,
+        jack_server=jack_server_,
+        jacktrips=jacktrips,
+        api_port=None if socket else api_port,
+        lease_ttl=settings.server.lease_ttl,
+        probe_port=settings.server.probe_port,
+        max_pending_operations=settings.server.max_pending_operations,
+        bandwidth=BandwidthBudget(
+            uplink_kbps=settings.bandwidth.uplink_kbps,
+            downlink_kbps=settings.bandwidth.downlink_kbps,
+        ),
+        get_meter=get_meter if settings.metering.enabled else None,
+        get_recorder=get_recorder if settings.recorder.enabled else None,
+        get_mixer=get_mixer if settings.mixer.enabled else None,
+        agent_socket=socket,
+        scenes={name: expand_scene(s) for name, s in settings.scenes.items()},
+        history=MetricsHistory() if settings.history.enabled else None,
+        history_path=settings.history.path,
+        attach_jack_server=settings.audio.attach,
+        loop_lag=LoopLagMonitor(
+            stall_threshold=settings.loop_lag.stall_threshold_ms / 1000
+        )
+        if settings.loop_lag.enabled
+        else None,
+        loop_lag_path=get_loop_lag_path("server"),
+        transport=transport_,
+        shards=ShardPool(shard_ports, pending_ttl=settings.server.lease_ttl)
+        if shard_count > 1
+        else None,
+        get_api_process=get_api_process_ if socket and not agent_only else None,
     )
-    return Server(jack_server=jack_server_, jacktrip=jacktrip_)
 
 
-def get_client(settings: ClientSettings) -> Client:
+def get_client(
+    settings: ClientSettings,
+    http_clients: Mapping[str, httpx.AsyncClient] | None = None,
+) -> Client:
+    """`http_clients` are shared connection pools by API URL."""
+    transport_ = transport.get_transport(settings.transport)
+
     def get_jack_server(rate: jack_server.SampleRate, period: int):
-        return jack_server.Server(
+        server = jack_server.Server(
             name=settings.audio.jack_server_name,
             driver=settings.audio.driver,
             device=settings.audio.device or SetByJack_,
             rate=rate,
             period=period,
         )
+        set_driver_channels(server, settings.audio.channels)
+        return server
 
-    def get_jacktrip(receive_count: int, send_count: int):
-        return jacktrip.get_client(
+    def get_jacktrip(
+        server: ServerCandidate,
+        receive_count: int,
+        send_count: int,
+        queue_length: int | None,
+    ):
+        return transport.get_client(
+            transport_,
             jack_server_name=settings.audio.jack_server_name,
-            server_host=settings.server.host,
-            server_port=settings.server.jacktrip_port,
+            server_host=server.host,
+            server_port=server.jacktrip_port,
             receive_channels=receive_count,
             send_channels=send_count,
             remote_name=settings.name,
+            queue_length=queue_length,
             log=jacktrip_log,
+            realtime=settings.realtime.jacktrip_policy,
+            exit_on_timeout=len(settings.servers) > 1,
+        )
+
+    async def probe(host: IPv4Address, port: int, period: float):
+        return await probe_network(
+            host=host,
+            port=port,
+            period=period,
+            target_underrun_rate=settings.network.target_underrun_rate,
         )
 
-    api = APIClient(httpx.AsyncClient(base_url=settings.server.api_url))
+    def get_http_client(url: str) -> httpx.AsyncClient:
+        if http_clients:
+            return http_clients[url]
+        return httpx.AsyncClient(base_url=url)
+
+    servers = [
+        ServerCandidate(
+            api=APIClient(client=get_http_client(s.api_url), client_name=settings.name),
+            host=s.host,
+            jacktrip_port=s.jacktrip_port,
+        )
+        for s in settings.servers
+    ]
     return Client(
-        api=api,
+        servers=servers,
         connection_map=settings.connection_map,
         get_jack_server=get_jack_server,
         get_jacktrip=get_jacktrip,
+        probe_network=probe if settings.network.probe else None,
+        shared_http_client=http_clients is not None,
+        attach_jack_server=settings.audio.attach,
     )
 
 
+def validate_sessions(settings: Sequence[ClientSettings]) -> None:
+    """Sessions in one process need their own names and JACK servers."""
+    fields = {
+        "name": [s.name for s in settings],
+        "jack_server_name": [s.audio.jack_server_name for s in settings],
+    }
+    for field, values in fields.items():
+        if duplicates := sorted({v for v in values if values.count(v) > 1}):
+            raise click.UsageError(f"Sessions share {field}: {', '.join(duplicates)}")
+
+
+def get_client_loop_lag(settings: Sequence[ClientSettings]) -> LoopLagMonitor | None:
+    """Sessions share event loop: it's watched if any of them asks to."""
+    thresholds = [
+        s.loop_lag.stall_threshold_ms / 1000 for s in settings if s.loop_lag.enabled
+    ]
+    return LoopLagMonitor(stall_threshold=min(thresholds)) if thresholds else None
+
+
+async def run_clients(settings: Sequence[ClientSettings]) -> None:
+    """Sessions connecting to the same server share HTTP connection pool."""
+    async with contextlib.AsyncExitStack() as stack:
+        if loop_lag := get_client_loop_lag(settings):
+            stack.callback(loop_lag.dump, get_loop_lag_path("client"))
+            tg = await stack.enter_async_context(anyio.create_task_group())
+            tg.start_soon(loop_lag.run)
+
+        pools: dict[str, httpx.AsyncClient] = {}
+        sessions: dict[str, Client] = {}
+
+        for s in settings:
+            for server in s.servers:
+                if (url := server.api_url) not in pools:
+                    pools[url] = httpx.AsyncClient(base_url=url)
+                    stack.push_async_callback(pools[url].aclose)
+            sessions[s.name] = get_client(s, http_clients=pools)
+
+        await run_sessions(sessions)
+
+
+def prepare_process(lock: bool) -> None:
+    if lock:
+        realtime.lock_memory(manager_log)
+    if realtime.is_supported():
+        scheduling = realtime.get_scheduling(os.getpid())
+        manager_log.info(f"Jackson runs with {scheduling}")
+
+
+@contextlib.contextmanager
+def instrument(mode: Mode, trace: bool, profile: bool) -> Generator[None, None, None]:
+    if trace:
+        tracer.open(f"log/{mode}/trace.json")
+
+    profiler = SamplingProfiler(f"log/{mode}/profile.folded") if profile else None
+    if profiler:
+        profiler.start()
+
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.stop()
+        tracer.close()
+
+
 @click.group()
 def cli() -> None:
     ...
 
 
+trace_option = click.option(
+    "--trace", is_flag=True, help="Write timing spans to log/<mode>/trace.json."
+)
+profile_option = click.option(
+    "--profile",
+    is_flag=True,
+    help="Write sampling profile to log/<mode>/profile.folded.",
+)
+
+
+@cli.command
+@click.option("--config", default="server.yaml", type=click.File())
+@trace_option
+@profile_option
+def server(config: io.TextIOWrapper, trace: bool, profile: bool) -> None:
+    configure_logging("server")
+    settings = ServerSettings(**yaml.safe_load(config))
+    server = get_server(settings)
+    prepare_process(lock=settings.realtime.lock_memory)
+    with instrument("server", trace=trace, profile=profile):
+        anyio.run(lambda: run_manager(server), backend_options={"use_uvloop": True})
+
+
 @cli.command
 @click.option("--config", default="server.yaml", type=click.File())
-def server(config: io.TextIOWrapper) -> None:
+@trace_option
+@profile_option
+def agent(config: io.TextIOWrapper, trace: bool, profile: bool) -> None:
+    """Serve already running JACK server to `jackson api` workers."""
     configure_logging("server")
-    server = get_server(ServerSettings(**yaml.safe_load(config)))
-    anyio.run(lambda: run_manager(server), backend_options={"use_uvloop": True})
+    settings = ServerSettings(**yaml.safe_load(config))
+    if not settings.server.agent_socket:
+        raise click.UsageError("server.agent_socket is not set in config")
+
+    server = get_server(settings, agent_only=True)
+    prepare_process(lock=settings.realtime.lock_memory)
+    with instrument("server", trace=trace, profile=profile):
+        anyio.run(lambda: run_manager(server), backend_options={"use_uvloop": True})
+
+
+@cli.command
+@click.option("--agent-socket", required=True)
+@click.option("--port", default=8000)
+@click.option("--workers", default=1)
+def api(agent_socket: str, port: int, workers: int) -> None:
+    """Serve HTTP API backed by `jackson agent` (or `jackson server` with agent)."""
+    run_api_workers(agent_socket=agent_socket, port=port, workers=workers)
 
 
 @cli.command
-@click.option("--config", default="client.yaml", type=click.File())
-def client(config: io.TextIOWrapper) -> None:
+@click.option(
+    "--config",
+    default=["client.yaml"],
+    multiple=True,
+    type=click.File(),
+    help="Client config, repeat to run several sessions in one process.",
+)
+@trace_option
+@profile_option
+def client(config: Sequence[io.TextIOWrapper], trace: bool, profile: bool) -> None:
     configure_logging("client")
-    client = get_client(ClientSettings.load(yaml.safe_load(config)))
-    anyio.run(lambda: run_manager(client), backend_options={"use_uvloop": True})
+    settings = [ClientSettings.load(yaml.safe_load(c)) for c in config]
+    validate_sessions(settings)
+    prepare_process(lock=any(s.realtime.lock_memory for s in settings))
+    with instrument("client", trace=trace, profile=profile):
+        anyio.run(lambda: run_clients(settings), backend_options={"use_uvloop": True})
+
+
+@cli.command
+@click.option("--profile", required=True, type=click.File())
+@click.option("--server-host", default="127.0.0.1", type=IPv4Address)
+@click.option("--server-port", default=4464, help="Server's jacktrip_port.")
+@click.option(
+    "--listen-port",
+    default=DEFAULT_LISTEN_PORT,
+    help="Point client's jacktrip_port here.",
+)
+def netsim(
+    profile: io.TextIOWrapper,
+    server_host: IPv4Address,
+    server_port: int,
+    listen_port: int,
+) -> None:
+    """Relay JackTrip traffic with latency, jitter, loss and bandwidth cap of profile."""
+    configure_logging("netsim")
+    proxy = Netsim(
+        profile=NetsimProfile(**yaml.safe_load(profile)),
+        server_host=server_host,
+        server_port=server_port,
+        listen_port=listen_port,
+    )
+    anyio.run(proxy.run, backend_options={"use_uvloop": True})
+
+
+if __name__ == "__main__":
+    cli()
@@ -1,26 +1,61 @@
-from dataclasses import dataclass, field
-from functools import singledispatch
-from typing import Any, Protocol
+import math
+from collections.abc import Callable, Coroutine, Mapping
+from dataclasses import dataclass, field, replace
+from functools import partial, singledispatch
+from ipaddress import IPv4Address
+from typing import TYPE_CHECKING, Any, Protocol
 
 import anyio
 import httpx
 import jack
 import jack_server
 import uvicorn
-from anyio.abc import TaskGroup
+from anyio.abc import TaskGroup, TaskStatus
 
-from jackson.api_client import APIClient
+from jackson import systemd
+from jackson.admission import DEFAULT_MAX_PENDING, AdmissionControl
+from jackson.agent import get_agent_methods, serve_agent
+from jackson.api_client import APIClient, ServerError
 from jackson.api_server import get_api_server, install_api_signal_handlers
+from jackson.bandwidth import BandwidthBudget, BandwidthExceeded
 from jackson.connector_client import connect_server_and_client_ports
-from jackson.connector_server import ServerPortConnector
-from jackson.jacktrip import StreamingProcess
+from jackson.connector_server import InitResponse, ServerPortConnector
+from jackson.failover import (
+    Failover,
+    ServerCandidate,
+    ServerLost,
+    choose_server,
+    probe_servers,
+)
+from jackson.history import MetricsHistory
+from jackson.jack_events import JackEvents, XRun
+from jackson.jacktrip import JackTripBackend, ProcessExited, StreamingProcess
+from jackson.lease import DEFAULT_LEASE_TTL, Edge, LeaseRegistry
+from jackson.lifecycle import DEFAULT_START_TIMEOUT, Component, Lifecycle
 from jackson.logging import (
     block_jack_client_streams,
     block_jack_server_streams,
+    manager_log,
+    session_log,
+    session_name,
     set_jack_client_streams,
     set_jack_server_streams,
 )
-from jackson.port_connection import ConnectionMap, count_receive_send_channels
+from jackson.loop_lag import LoopLagMonitor
+from jackson.port_connection import (
+    ConnectionMap,
+    count_channels,
+    count_receive_send_channels,
+)
+from jackson.probe import NetworkReport, serve_echo
+from jackson.shards import ShardPool, read_cpu_seconds
+from jackson.tracing import span
+from jackson.transport import TransportBackend
+
+if TYPE_CHECKING:
+    from jackson.metering import LevelMeter
+    from jackson.mixer import Mixer
+    from jackson.recorder import Recorder
 
 
 class Manager(Protocol):
@@ -31,7 +66,7 @@ class Manager(Protocol):
         ...
 
 
-async def run_manager(manager: Manager) -> None:
+async def _run_manager(manager: Manager) -> None:
     async with anyio.create_task_group() as tg:
         try:
             await manager.start(tg)
@@ -41,6 +76,41 @@ async def run_manager(manager: Manager) -> None:
                 await manager.stop()
 
 
+async def run_manager(manager: Manager) -> None:
+    try:
+        await _run_manager(manager)
+    except ProcessExited as exc:
+        manager_log.error(str(exc))
+        # SystemExit must not be raised in child tasks, asyncio lets it escape
+        raise SystemExit(exc.returncode or 1)
+
+
+async def run_sessions(sessions: Mapping[str, Manager]) -> None:
+    """
+    Run managers concurrently in one task group. Failed session is logged and
+    stopped while others keep running. Exits with error once none is left.
+    """
+
+    async def run(name: str, manager: Manager) -> None:
+        if len(sessions) > 1:
+            session_name.set(name)
+        try:
+            await _run_manager(manager)
+        except Exception:
+            manager_log.exception(f"Session {name} failed")
+        except anyio.ExceptionGroup as group:
+            # Several tasks of session failed. It's a BaseException in anyio 3
+            if not all(isinstance(exc, Exception) for exc in group.exceptions):
+                raise
+            manager_log.exception(f"Session {name} failed")
+
+    async with anyio.create_task_group() as tg:
+        for name, manager in sessions.items():
+            tg.start_soon(run, name, manager)
+
+    raise SystemExit(1)
+
+
 def get_jack_client(server_name: str) -> jack.Client:
     block_jack_client_streams()
     client = jack.Client(name="Helper", no_start_server=True, servername=server_name)
@@ -48,27 +118,404 @@ def get_jack_client(server_name: str) -> jack.Client:
     return client
 
 
+def get_running_jack_server_params(server_name: str) -> tuple[int, int] | None:
+    """Rate and period of JACK server if it's running."""
+    block_jack_client_streams()
+    try:
+        client = jack.Client("Probe", no_start_server=True, servername=server_name)
+    except jack.JackError:
+        return None
+    finally:
+        set_jack_client_streams()
+
+    try:
+        return client.samplerate, client.blocksize
+    finally:
+        client.close()
+
+
+def try_attach_jack_server(server: jack_server.Server) -> bool:
+    """
+    Check if JACK server with the same name is already running, so it can be
+    used instead. Raises if it runs at other rate or period: changing those
+    would reinitialize audio device.
+    """
+    if not (params := get_running_jack_server_params(server.name)):
+        return False
+
+    rate, period = params
+    if (rate, period) != (server.driver.rate, server.driver.period):
+        raise RuntimeError(
+            f"Running JACK server {server.name} has rate {rate} and period"
+            + f" {period}, expected {server.driver.rate} and {server.driver.period}"
+        )
+
+    manager_log.info(f"Attached to running JACK server {server.name}")
+    return True
+
+
+def start_jack_server(server: jack_server.Server, attach: bool) -> bool:
+    """Start JACK server unless it can be attached to. Returns whether attached."""
+    if attach and try_attach_jack_server(server):
+        return True
+
+    set_jack_server_streams()
+    server.start()
+    return False
+
+
+async def wait_for_jack_server(
+    server_name: str, first_delay: float = 0.1, max_delay: float = 1.0
+) -> None:
+    """For JACK server that is managed elsewhere and may be still starting."""
+    delay = first_delay
+    while not await anyio.to_thread.run_sync(
+        get_running_jack_server_params, server_name, cancellable=True
+    ):
+        if delay == first_delay:
+            manager_log.info(f"Waiting for JACK server {server_name}")
+            systemd.notify(f"STATUS=Waiting for JACK server {server_name}")
+        await anyio.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+
+async def release_expired_leases(port_connector: ServerPortConnector) -> None:
+    while True:
+        await anyio.sleep(port_connector.leases.ttl / 2)
+        await anyio.to_thread.run_sync(port_connector.release_expired)
+
+
+async def spawn(tg: TaskGroup, func: Callable[[], Coroutine[Any, Any, None]]) -> None:
+    tg.start_soon(func)
+
+
+async def record_xruns(events: JackEvents, history: MetricsHistory) -> None:
+    with events.subscribe() as stream:
+        async for event in stream:
+            if isinstance(event, XRun):
+                history.record("xruns", event.delay)
+
+
+async def sample_dsp_load(client: jack.Client, history: MetricsHistory) -> None:
+    while True:
+        load = await anyio.to_thread.run_sync(client.cpu_load, cancellable=True)
+        history.record("dsp_load", load)
+        await anyio.sleep(1)
+
+
+def get_underrun_counter(
+    history: MetricsHistory, transport: TransportBackend
+) -> Callable[[str], None]:
+    def count(line: str) -> None:
+        if transport.is_underrun(line):
+            history.record("jacktrip_underruns")
+
+    return count
+
+
+async def sample_shard_cpu(
+    shards: ShardPool, processes: list[StreamingProcess], interval: float = 1
+) -> None:
+    last: dict[int, float] = {}
+    while True:
+        await anyio.sleep(interval)
+        for idx, process in enumerate(processes):
+            if not process.process:
+                continue
+            seconds = read_cpu_seconds(process.process.pid)
+            if seconds is None:
+                continue
+            if idx in last:
+                shards.record_cpu(idx, (seconds - last[idx]) / interval * 100)
+            last[idx] = seconds
+
+
+async def keep_realtime_policy(
+    processes: list[StreamingProcess], interval: float = 2
+) -> None:
+    """Hubs start threads for every client that connects."""
+    while True:
+        await anyio.sleep(interval)
+        for process in processes:
+            process.apply_realtime()
+
+
+async def keep_taps_in_sync(sync_taps: Callable[[], None]) -> None:
+    while True:
+        await anyio.to_thread.run_sync(sync_taps)
+        await anyio.sleep(1)
+
+
 @dataclass
 class Server:
-    jack_server: jack_server.Server
-    jacktrip: StreamingProcess
-
+    """
+    JACK server, JackTrip hubs (`shards` if several), helper client with
+    sessions and HTTP API.
+
+    API runs in-process on `api_port`. With `agent_socket`, JACK side is
+    served over Unix socket instead and API runs in process spawned by
+    `get_api_process` (if any). Without `jack_server` and `jacktrips` they are
+    expected to be managed elsewhere, like in modular systemd layout.
+    """
+
+    jack_server_name: str
+    jack_server: jack_server.Server | None
+    jacktrips: list[StreamingProcess]
+    api_port: int | None = None
+    lease_ttl: float = DEFAULT_LEASE_TTL
+    probe_port: int | None = None
+    max_pending_operations: int = DEFAULT_MAX_PENDING
+    bandwidth: BandwidthBudget = field(default_factory=BandwidthBudget)
+    get_meter: "Callable[[], LevelMeter] | None" = None
+    get_recorder: "Callable[[], Recorder] | None" = None
+    get_mixer: "Callable[[], Mixer] | None" = None
+    agent_socket: str | None = None
+    get_api_process: Callable[[], StreamingProcess] | None = None
+    scenes: dict[str, frozenset[Edge]] = field(
+        default_factory=dict[str, frozenset[Edge]]
+    )
+    history: MetricsHistory | None = None
+    history_path: str | None = None  # Dumped there on shutdown
+    attach_jack_server: bool = False  # Use JACK server if it's already running
+    loop_lag: LoopLagMonitor | None = None
+    loop_lag_path: str | None = None  # Histogram is dumped there on shutdown
+    transport: TransportBackend = field(default_factory=JackTripBackend)
+    shards: ShardPool | None = None  # Ports of `jacktrips`, when there are several
+
+    jack_server_attached: bool = field(default=False, init=False)
     jack_client: jack.Client | None = field(default=None, init=False)
+    port_connector: ServerPortConnector | None = field(default=None, init=False)
+    meter: "LevelMeter | None" = field(default=None, init=False)
+    recorder: "Recorder | None" = field(default=None, init=False)
+    mixer: "Mixer | None" = field(default=None, init=False)
     api: uvicorn.Server | None = field(default=None, init=False)
+    api_process: StreamingProcess | None = field(default=None, init=False)
+    lifecycle: Lifecycle | None = field(default=None, init=False)
+
+    async def _start_jack_server(self) -> None:
+        assert self.jack_server
+        self.jack_server_attached = await anyio.to_thread.run_sync(
+            start_jack_server,
+            self.jack_server,
+            self.attach_jack_server,
+            cancellable=True,
+        )
 
-    async def start(self, tg: TaskGroup) -> None:
-        set_jack_server_streams()
-        self.jack_server.start()
+    async def _wait_for_jack_server(self) -> None:
+        await wait_for_jack_server(self.jack_server_name)
 
-        tg.start_soon(self.jacktrip.start)
+    async def _stop_jack_server(self) -> None:
+        if not self.jack_server_attached:
+            await cleanup(self.jack_server)
+
+    async def _start_meter(self, tg: TaskGroup) -> None:
+        assert self.get_meter
+        self.meter = await anyio.to_thread.run_sync(self.get_meter)
+        tg.start_soon(keep_taps_in_sync, self.meter.sync_taps)
+
+    async def _start_recorder(self, tg: TaskGroup) -> None:
+        assert self.get_recorder
+        self.recorder = await anyio.to_thread.run_sync(self.get_recorder)
+        tg.start_soon(keep_taps_in_sync, self.recorder.sync_taps)
+
+    async def _stop_recorder(self) -> None:
+        if self.recorder:
+            await anyio.to_thread.run_sync(self.recorder.close, cancellable=True)
 
-        self.jack_client = get_jack_client(self.jack_server.name)
-        self.api = get_api_server(port_connector=ServerPortConnector(self.jack_client))
+    async def _start_mixer(self) -> None:
+        assert self.get_mixer
+        self.mixer = await anyio.to_thread.run_sync(self.get_mixer)
+
+    async def _start_port_connector(self, tg: TaskGroup) -> None:
+        self.jack_client = await anyio.to_thread.run_sync(
+            get_jack_client, self.jack_server_name, cancellable=True
+        )
+        self.port_connector = ServerPortConnector(
+            self.jack_client,
+            leases=LeaseRegistry(ttl=self.lease_ttl),
+            probe_port=self.probe_port,
+            scenes=self.scenes,
+            admission=AdmissionControl(max_pending=self.max_pending_operations),
+            bandwidth=self.bandwidth,
+            history=self.history,
+            mixer=self.mixer,
+            shards=self.shards,
+        )
+        tg.start_soon(release_expired_leases, self.port_connector)
+        if self.shards and self.jacktrips:
+            tg.start_soon(sample_shard_cpu, self.shards, self.jacktrips)
+        if any(jacktrip.realtime for jacktrip in self.jacktrips):
+            tg.start_soon(keep_realtime_policy, self.jacktrips)
+
+    async def _start_history(self, tg: TaskGroup) -> None:
+        assert self.history and self.jack_client
+        events = JackEvents(self.jack_client)
+        events.install()
+        await anyio.to_thread.run_sync(self.jack_client.activate, cancellable=True)
+
+        tg.start_soon(record_xruns, events, self.history)
+        tg.start_soon(sample_dsp_load, self.jack_client, self.history)
+        for jacktrip in self.jacktrips:
+            jacktrip.on_output = get_underrun_counter(self.history, self.transport)
+
+    async def _stop_history(self) -> None:
+        if self.history and self.history_path:
+            await anyio.to_thread.run_sync(self.history.dump, self.history_path)
+            manager_log.info(f"Saved metrics history to {self.history_path}")
+
+    async def _stop_loop_lag(self) -> None:
+        if self.loop_lag and self.loop_lag_path:
+            await anyio.to_thread.run_sync(self.loop_lag.dump, self.loop_lag_path)
+
+    async def _start_agent(self, tg: TaskGroup) -> None:
+        assert self.agent_socket and self.port_connector
+        methods = get_agent_methods(
+            self.port_connector,
+            meter=self.meter,
+            recorder=self.recorder,
+            history=self.history,
+            mixer=self.mixer,
+            loop_lag=self.loop_lag,
+        )
+        await tg.start(serve_agent, self.agent_socket, methods)
+
+    async def _start_api(self, tg: TaskGroup) -> None:
+        if self.get_api_process:
+            self.api_process = self.get_api_process()
+            tg.start_soon(self.api_process.start)
+            return
+
+        assert self.api_port and self.port_connector
+        self.api = get_api_server(
+            port_connector=self.port_connector,
+            port=self.api_port,
+            meter=self.meter,
+            recorder=self.recorder,
+            history=self.history,
+            mixer=self.mixer,
+            loop_lag=self.loop_lag,
+        )
         install_api_signal_handlers(server=self.api, scope=tg.cancel_scope)
-        tg.start_soon(self.api.startup)  # pyright: ignore
+        await self.api.startup()  # pyright: ignore
+
+    async def _stop_api(self) -> None:
+        await cleanup(self.api)
+        await cleanup(self.api_process)
+
+    def _get_components(self, tg: TaskGroup) -> list[Component]:
+        # JACK server that is managed elsewhere is still a dependency: wait
+        # for it as long as it takes instead of failing and being restarted
+        components = [
+            Component(
+                "jack_server",
+                start=self._start_jack_server
+                if self.jack_server
+                else self._wait_for_jack_server,
+                stop=self._stop_jack_server,
+                start_timeout=DEFAULT_START_TIMEOUT if self.jack_server else math.inf,
+            ),
+        ]
+        if loop_lag := self.loop_lag:
+            components.append(
+                Component(
+                    "loop_lag",
+                    start=lambda: spawn(tg, loop_lag.run),
+                    stop=self._stop_loop_lag,
+                )
+            )
+        for idx, jacktrip in enumerate(self.jacktrips):
+            components.append(
+                Component(
+                    f"jacktrip_{idx}" if len(self.jacktrips) > 1 else "jacktrip",
+                    start=partial(spawn, tg, jacktrip.start),
+                    stop=partial(cleanup, jacktrip),
+                    depends_on=("jack_server",),
+                )
+            )
+        if self.get_meter:
+            components.append(
+                Component(
+                    "meter",
+                    start=lambda: self._start_meter(tg),
+                    stop=lambda: cleanup(self.meter.client if self.meter else None),
+                    depends_on=("jack_server",),
+                )
+            )
+        if self.get_recorder:
+            components.append(
+                Component(
+                    "recorder",
+                    start=lambda: self._start_recorder(tg),
+                    stop=self._stop_recorder,
+                    depends_on=("jack_server",),
+                )
+            )
+        if self.get_mixer:
+            components.append(
+                Component(
+                    "mixer",
+                    start=self._start_mixer,
+                    stop=lambda: cleanup(self.mixer.client if self.mixer else None),
+                    depends_on=("jack_server",),
+                )
+            )
+        # Connector routes mixed playback ports through mixer
+        components.append(
+            Component(
+                "port_connector",
+                start=lambda: self._start_port_connector(tg),
+                stop=lambda: cleanup(self.jack_client),
+                depends_on=("jack_server", "mixer")
+                if self.get_mixer
+                else ("jack_server",),
+            )
+        )
+        if self.history:
+            components.append(
+                Component(
+                    "history",
+                    start=lambda: self._start_history(tg),
+                    stop=self._stop_history,
+                    depends_on=("port_connector",),
+                )
+            )
+
+        # API (or agent that serves it) reads meter and recorder, so it waits for them
+        api_deps = tuple(
+            c.name for c in components if not c.name.startswith("jacktrip")
+        )
+        if self.agent_socket:
+            components.append(
+                Component(
+                    "agent", start=lambda: self._start_agent(tg), depends_on=api_deps
+                )
+            )
+            api_deps = ("agent",)
+        if self.api_port or self.get_api_process:
+            components.append(
+                Component(
+                    "api",
+                    start=lambda: self._start_api(tg),
+                    stop=self._stop_api,
+                    depends_on=api_deps,
+                )
+            )
+        return components
+
+    async def start(self, tg: TaskGroup) -> None:
+        if self.probe_port:
+            tg.start_soon(serve_echo, self.probe_port)
+        if not self.api_port:
+            install_api_signal_handlers(server=None, scope=tg.cancel_scope)
+
+        tg.start_soon(systemd.feed_watchdog)
+        self.lifecycle = Lifecycle("server", self._get_components(tg))
+        await self.lifecycle.start()
+        systemd.notify("READY=1", "STATUS=Serving")
 
     async def stop(self) -> None:
-        await cleanup_stack(self.api, self.jacktrip, self.jack_client, self.jack_server)
+        if self.lifecycle:
+            await self.lifecycle.stop()
 
 
 class GetJackServer(Protocol):
@@ -77,56 +524,334 @@ class GetJackServer(Protocol):
 
 
 class GetClientJacktrip(Protocol):
-    def __call__(self, receive_count: int, send_count: int) -> StreamingProcess:
+    def __call__(
+        self,
+        server: ServerCandidate,
+        receive_count: int,
+        send_count: int,
+        queue_length: int | None,
+    ) -> StreamingProcess:
+        ...
+
+
+class ProbeNetwork(Protocol):
+    async def __call__(
+        self, host: IPv4Address, port: int, period: float
+    ) -> NetworkReport | None:
         ...
 
 
+@dataclass
+class _Loss:
+    server: ServerCandidate
+    reason: str
+    at: float
+
+
 @dataclass
 class Client:
-    api: APIClient
+    """
+    With several `servers`, session goes to the closest one that would take it
+    and fails over to the next best when API or JackTrip stream of the active
+    one is lost. Whole lifecycle is restarted then: new server may run at
+    other rate or buffer size.
+    """
+
+    servers: list[ServerCandidate]
     connection_map: ConnectionMap
     get_jack_server: GetJackServer
     get_jacktrip: GetClientJacktrip
+    probe_network: ProbeNetwork | None = None
+    shared_http_client: bool = False  # Closed by whoever shares it
+    attach_jack_server: bool = False  # Use JACK server if it's already running
 
+    server: ServerCandidate | None = field(default=None, init=False)  # Active one
+    failovers: list[Failover] = field(default_factory=list[Failover], init=False)
     jack_server_: jack_server.Server | None = field(default=None, init=False)
+    jack_server_attached: bool = field(default=False, init=False)
     jack_client: jack.Client | None = field(default=None, init=False)
     jacktrip: StreamingProcess | None = field(default=None, init=False)
+    init_response: InitResponse | None = field(default=None, init=False)
+    queue_length: int | None = field(default=None, init=False)
+    lifecycle: Lifecycle | None = field(default=None, init=False)
+    connected: anyio.Event | None = field(default=None, init=False)
+    _loss: _Loss | None = field(default=None, init=False)
+
+    @property
+    def api(self) -> APIClient:
+        assert self.server
+        return self.server.api
+
+    @property
+    def can_fail_over(self) -> bool:
+        return len(self.servers) > 1
+
+    async def _keep_session_alive(self, lease_ttl: float) -> None:
+        last_beat = anyio.current_time()
+
+        while True:
+            await anyio.sleep(lease_ttl / 3)
+
+            try:
+                lease_ttl = (await self.api.heartbeat()).lease_ttl
+            except httpx.HTTPError as exc:
+                session_log.warning(f"Failed to send heartbeat: {exc!r}")
+                # Server has dropped our session by now anyway
+                silence = anyio.current_time() - last_beat
+                if self.can_fail_over and silence > lease_ttl:
+                    raise ServerLost(f"No heartbeat for {silence:.1f} s")
+                continue
+            except ServerError as exc:
+                session_log.warning(f"Session was lost, reconnecting: {exc}")
+                try:
+                    lease_ttl = (await self.api.connect(self.connection_map)).lease_ttl
+                except (httpx.HTTPError, ServerError) as exc:
+                    session_log.warning(f"Failed to reconnect: {exc!r}")
+                    continue
+
+            last_beat = anyio.current_time()
+
+    async def _probe_queue_length(self, port: int, period: float) -> int | None:
+        assert self.probe_network and self.server
+
+        with span("client.network.probe"):
+            report = await self.probe_network(
+                host=self.server.host, port=port, period=period
+            )
 
-    async def start(self, tg: TaskGroup) -> None:
-        response = await self.api.init()
+        if not report:
+            session_log.warning("Network probe got no replies, using default queue")
+            return None
+
+        session_log.info(
+            f"Network path: RTT {report.rtt_ms:.1f} ms, jitter {report.jitter_ms:.2f}"
+            + f" ms, loss {report.loss:.1%}; using queue length {report.queue_length}"
+        )
+        try:
+            await self.api.report_network(report)
+        except httpx.HTTPError as exc:
+            session_log.warning(f"Failed to report network path: {exc!r}")
+        return report.queue_length
+
+    async def _init_server(self, receive_count: int, send_count: int) -> InitResponse:
+        self.server = self.servers[0]
+        try:
+            return await self.api.init(
+                receive_channels=receive_count, send_channels=send_count
+            )
+        except ServerError as exc:
+            if isinstance(exc.data, BandwidthExceeded):
+                session_log.error(
+                    "Server doesn't have bandwidth for our channels, it fits"
+                    + f" {exc.data.suggested_receive_channels} receive and"
+                    + f" {exc.data.suggested_send_channels} send channels"
+                )
+            raise
+
+    async def _choose_server(self, receive_count: int, send_count: int) -> InitResponse:
+        with span("client.choose_server"):
+            results = await probe_servers(self.servers, receive_count, send_count)
+
+        for result in results:
+            if result.rtt is None:
+                session_log.warning(
+                    f"Server {result.candidate} is unavailable: {result.error}"
+                )
+            else:
+                session_log.info(
+                    f"Server {result.candidate}: RTT {result.rtt * 1000:.1f} ms"
+                )
+
+        # Server that was just lost is the last resort
+        chosen = choose_server(results, avoid=self.server)
+        assert chosen.init
+        session_log.info(f"Using server [bold green]{chosen.candidate}[/bold green]")
+        self.server = chosen.candidate
+        return chosen.init
+
+    async def _init(self) -> None:
+        receive_count, send_count = count_channels(self.connection_map)
+        if self.can_fail_over:
+            response = await self._choose_server(receive_count, send_count)
+        else:
+            response = await self._init_server(receive_count, send_count)
+
+        self.init_response = response
+
+        if self.probe_network and response.probe_port:
+            self.queue_length = await self._probe_queue_length(
+                port=response.probe_port, period=response.buffer_size / response.rate
+            )
+
+    async def _close_api(self) -> None:
+        if not self.shared_http_client:
+            for server in self.servers:
+                await server.api.client.aclose()
 
+    async def _start_jack_server(self) -> None:
+        assert self.init_response
         self.jack_server_ = self.get_jack_server(
-            rate=response.rate, period=response.buffer_size
+            rate=self.init_response.rate, period=self.init_response.buffer_size
         )
-        set_jack_server_streams()
-        self.jack_server_.start()
+        self.jack_server_attached = await anyio.to_thread.run_sync(
+            start_jack_server,
+            self.jack_server_,
+            self.attach_jack_server,
+            cancellable=True,
+        )
+
+    async def _stop_jack_server(self) -> None:
+        if not self.jack_server_attached:
+            await cleanup(self.jack_server_)
+
+    async def _start_jack_client(self) -> None:
+        assert self.jack_server_
+        self.jack_client = await anyio.to_thread.run_sync(
+            get_jack_client, self.jack_server_.name, cancellable=True
+        )
+
+    async def _start_jacktrip(self, tg: TaskGroup) -> None:
+        assert self.init_response and self.server
+        receive_count, send_count = count_receive_send_channels(
+            connection_map=self.connection_map,
+            inputs_limit=self.init_response.inputs,
+            outputs_limit=self.init_response.outputs,
+        )
+        server = self.server
+        if port := self.init_response.jacktrip_port:  # Shard we were assigned to
+            server = replace(server, jacktrip_port=port)
+        self.jacktrip = self.get_jacktrip(
+            server=server,
+            receive_count=receive_count,
+            send_count=send_count,
+            queue_length=self.queue_length,
+        )
+        tg.start_soon(self.jacktrip.start)
 
-        self.jack_client = get_jack_client(self.jack_server_.name)
+    async def _start_session(self, tg: TaskGroup) -> None:
+        async def connect_on_server(connection_map: ConnectionMap) -> None:
+            lease_ttl = (await self.api.connect(connection_map)).lease_ttl
+            if self.connected:
+                self.connected.set()
+            tg.start_soon(self._keep_session_alive, lease_ttl)
 
         async def connect_ports() -> None:
             assert self.jack_client
             await connect_server_and_client_ports(
                 client=self.jack_client,
                 connection_map=self.connection_map,
-                connect_on_server=self.api.connect,
+                connect_on_server=connect_on_server,
             )
+            # Bridge ports are there, so are JackTrip's audio and UDP threads
+            if self.jacktrip:
+                self.jacktrip.apply_realtime()
 
         tg.start_soon(connect_ports)
 
-        receive_count, send_count = count_receive_send_channels(
-            connection_map=self.connection_map,
-            inputs_limit=response.inputs,
-            outputs_limit=response.outputs,
+    async def _stop_session(self) -> None:
+        try:
+            await self.api.disconnect()
+        except (httpx.HTTPError, ServerError) as exc:
+            session_log.warning(f"Failed to disconnect from server: {exc!r}")
+
+    def _get_components(self, tg: TaskGroup) -> list[Component]:
+        return [
+            Component("api", start=self._init),
+            Component(
+                "jack_server",
+                start=self._start_jack_server,
+                stop=self._stop_jack_server,
+                depends_on=("api",),
+            ),
+            Component(
+                "jack_client",
+                start=self._start_jack_client,
+                stop=lambda: cleanup(self.jack_client),
+                depends_on=("jack_server",),
+            ),
+            Component(
+                "jacktrip",
+                start=lambda: self._start_jacktrip(tg),
+                stop=lambda: cleanup(self.jacktrip),
+                depends_on=("api", "jack_server"),
+            ),
+            # Session is torn down first so server drops our connections
+            # before JackTrip goes away
+            Component(
+                "session",
+                start=lambda: self._start_session(tg),
+                stop=self._stop_session,
+                depends_on=("jack_client", "jacktrip"),
+                stop_timeout=2,
+            ),
+        ]
+
+    async def _stop_lifecycle(self) -> None:
+        lifecycle, self.lifecycle = self.lifecycle, None
+        if lifecycle:
+            with anyio.CancelScope(shield=True):
+                await lifecycle.stop()
+
+    async def _record_failover(self, loss: _Loss) -> None:
+        assert self.connected
+        await self.connected.wait()
+        assert self.server
+
+        failover = Failover(
+            lost=loss.server,
+            chosen=self.server,
+            reason=loss.reason,
+            duration=anyio.current_time() - loss.at,
         )
-        self.jacktrip = self.get_jacktrip(
-            receive_count=receive_count, send_count=send_count
+        self.failovers.append(failover)
+        self._loss = None
+        session_log.warning(
+            f"Failed over from {failover.lost} to {failover.chosen} in"
+            + f" {failover.duration:.2f} s: {failover.reason}"
         )
-        tg.start_soon(self.jacktrip.start)
+
+    async def _run(
+        self, *, task_status: TaskStatus = anyio.TASK_STATUS_IGNORED
+    ) -> None:
+        """Run lifecycle. Restart it against another server if this one is lost."""
+        started = False
+        attempt = 0
+
+        while True:
+            self.connected = anyio.Event()
+            try:
+                async with anyio.create_task_group() as tg:
+                    self.lifecycle = Lifecycle("client", self._get_components(tg))
+                    await self.lifecycle.start()
+                    if not started:
+                        task_status.started()
+                        started = True
+                    if self._loss:
+                        tg.start_soon(self._record_failover, self._loss)
+                    attempt = 0
+            except Exception as exc:
+                if not (started and self.can_fail_over):
+                    raise
+                error = exc
+            else:
+                return
+
+            await self._stop_lifecycle()
+            if self._loss:
+                session_log.error(f"Failed to fail over: {error!r}")
+                await anyio.sleep(self.api.backoff.delay(attempt))
+                attempt += 1
+            else:
+                assert self.server
+                self._loss = _Loss(self.server, repr(error), anyio.current_time())
+                session_log.error(f"Lost server {self.server}: {error!r}")
+
+    async def start(self, tg: TaskGroup) -> None:
+        await tg.start(self._run)
 
     async def stop(self) -> None:
-        await cleanup_stack(
-            self.api.client, self.jack_client, self.jacktrip, self.jack_server_
-        )
+        await self._stop_lifecycle()
+        await self._close_api()
 
 
 @singledispatch
@@ -144,28 +869,21 @@ async def _(v: uvicorn.Server):
     await v.shutdown()
 
 
+# Blocking calls run in worker threads so lifecycle deadline can abandon them
+
+
 @cleanup.register(jack.Client)
 async def _(v: jack.Client):
     block_jack_client_streams()
-    v.deactivate()
+    await anyio.to_thread.run_sync(v.deactivate, cancellable=True)
 
 
 @cleanup.register(jack_server.Server)
 async def _(v: jack_server.Server):
     block_jack_server_streams()
-    v.stop()
-
-
-@cleanup.register(httpx.AsyncClient)
-async def _(v: httpx.AsyncClient):
-    await v.aclose()
+    await anyio.to_thread.run_sync(v.stop, cancellable=True)
 
 
 @cleanup.register(StreamingProcess)
 async def _(v: StreamingProcess):
     await v.stop()
-
-
-async def cleanup_stack(*stack: Any) -> None:
-    for v in stack:
-        await cleanup(v)
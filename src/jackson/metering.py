@@ -0,0 +1,136 @@
+from dataclasses import dataclass, field
+
+import jack
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel
+
+from jackson.tap import (
+    PortTaps,
+    get_output_ports,
+    is_bridge_receive_port,
+    is_capture_port,
+    register_inputs,
+)
+
+METER_CLIENT_NAME = "Meter"
+MIN_DB = -120.0
+
+Float32Array = npt.NDArray[np.float32]
+
+
+class PortLevels(BaseModel):
+    port: str
+    peak: float  # In dBFS
+    rms: float  # In dBFS
+
+
+def _to_db(values: Float32Array) -> list[float]:
+    with np.errstate(divide="ignore"):
+        db = 20 * np.log10(values)
+    return np.maximum(db, MIN_DB).tolist()
+
+
+@dataclass
+class LevelRing:
+    """
+    Fixed-size ring of per-block peak and mean square values.
+
+    Single producer (process callback) writes a slot, then bumps `written`.
+    Readers never block the producer: they just read the latest slots.
+    """
+
+    slots: int
+    channels: int
+
+    values: Float32Array = field(init=False)
+    written: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        self.values = np.zeros((self.slots, 2, self.channels), dtype=np.float32)
+
+    def next_slot(self) -> Float32Array:
+        return self.values[self.written % self.slots]
+
+    def commit(self) -> None:
+        self.written += 1
+
+    def read(self, count: int) -> tuple[Float32Array, Float32Array]:
+        """Aggregate last `count` blocks into peak and RMS."""
+        count = max(1, min(count, self.slots, self.written))
+        end = self.written
+        idxs = np.arange(end - count, end) % self.slots
+        values = self.values[idxs]
+        return values[:, 0].max(axis=0), np.sqrt(values[:, 1].mean(axis=0))
+
+
+@dataclass
+class LevelMeter:
+    """
+    JACK client that taps every audio output port in the graph (system captures
+    and bridge receives) and measures block peak and RMS.
+    """
+
+    client: jack.Client
+    channels: int
+    publish_rate: float  # In Hz
+
+    ring: LevelRing = field(init=False)
+    taps: PortTaps = field(init=False)
+
+    _block: Float32Array = field(init=False)
+    _scratch: Float32Array = field(init=False)
+
+    def __post_init__(self) -> None:
+        ports = register_inputs(self.client, self.channels)
+        self.taps = PortTaps(client=self.client, ports=ports)
+
+        self._allocate_blocks(self.client.blocksize)
+        blocks_per_second = self.client.samplerate / self.client.blocksize
+        slots = int(blocks_per_second * max(1, 1 / self.publish_rate)) + 1
+        self.ring = LevelRing(slots=slots, channels=self.channels)
+
+        self.client.set_blocksize_callback(self._allocate_blocks)
+        self.client.set_process_callback(self._process)
+
+    def _allocate_blocks(self, blocksize: int) -> None:
+        self._block = np.zeros((self.channels, blocksize), dtype=np.float32)
+        self._scratch = np.zeros_like(self._block)
+
+    def _process(self, frames: int) -> None:
+        # Everything here writes into preallocated arrays.
+        block, scratch = self._block, self._scratch
+        for idx, port in enumerate(self.taps.ports):
+            block[idx] = port.get_array()
+
+        slot = self.ring.next_slot()
+        np.abs(block, out=scratch)
+        np.max(scratch, axis=1, out=slot[0])
+        np.square(block, out=scratch)
+        np.mean(scratch, axis=1, out=slot[1])
+        self.ring.commit()
+
+    def sync_taps(self) -> None:
+        self.taps.sync(
+            get_output_ports(
+                self.client, lambda n: is_capture_port(n) or is_bridge_receive_port(n)
+            )
+        )
+
+    def levels(self) -> list[PortLevels]:
+        blocks = self.client.samplerate / self.client.blocksize / self.publish_rate
+        peak, rms = self.ring.read(round(blocks))
+        peak_db, rms_db = _to_db(peak), _to_db(rms)
+        return [
+            PortLevels(port=name, peak=peak_db[idx], rms=rms_db[idx])
+            for idx, name in sorted(self.taps.snapshot().items(), key=lambda i: i[1])
+        ]
+
+
+def get_level_meter(server_name: str, channels: int, publish_rate: float) -> LevelMeter:
+    client = jack.Client(
+        METER_CLIENT_NAME, no_start_server=True, servername=server_name
+    )
+    meter = LevelMeter(client=client, channels=channels, publish_rate=publish_rate)
+    client.activate()
+    return meter
@@ -0,0 +1,256 @@
+"""
+Network impairment proxy for benchmarking on one box: sits between client's
+JackTrip and server's `jacktrip_port` and delays, drops, reorders and
+throttles audio packets as profile says.
+
+JackTrip hub client introduces itself over TCP: it sends its UDP port
+(native int32, then optional name) and gets server's UDP port back. Proxy
+relays that conversation and swaps both ports for its own UDP sockets, so
+every audio packet in both directions goes through it.
+"""
+
+import heapq
+import random
+import socket
+import struct
+from dataclasses import dataclass, field
+from ipaddress import IPv4Address
+
+import anyio
+from anyio.abc import SocketAttribute, SocketStream, UDPSocket
+from anyio.streams.buffered import BufferedByteReceiveStream
+from pydantic import BaseModel, Field
+
+from jackson.logging import netsim_log
+
+_UDP_PORT = struct.Struct("=i")  # As JackTrip writes it
+STATS_INTERVAL = 10.0  # In seconds
+DEFAULT_LISTEN_PORT = 14464  # Not JackTrip's 4464, so both fit on one host
+
+
+class LinkProfile(BaseModel):
+    latency_ms: float = Field(default=0, ge=0)
+    jitter_ms: float = Field(default=0, ge=0)  # Standard deviation of latency
+    loss: float = Field(default=0, ge=0, le=1)
+    # Share of packets held back by `reorder_gap_ms` so later ones overtake
+    # them. Otherwise jitter keeps order, like a single path would.
+    reorder: float = Field(default=0, ge=0, le=1)
+    reorder_gap_ms: float = Field(default=5, ge=0)
+    bandwidth_kbps: float | None = Field(default=None, gt=0)
+    queue_ms: float = Field(default=50, ge=0)  # Longer queue at the cap drops
+
+
+class NetsimProfile(BaseModel):
+    upstream: LinkProfile = LinkProfile()  # Client to server
+    downstream: LinkProfile = LinkProfile()
+    seed: int | None = None  # Same seed, same impairments for the same traffic
+
+
+@dataclass
+class LinkStats:
+    forwarded: int = 0
+    lost: int = 0
+    queue_drops: int = 0
+    reordered: int = 0
+
+
+@dataclass
+class Link:
+    """Decides fate of each packet going one way."""
+
+    profile: LinkProfile
+    rng: random.Random = field(default_factory=random.Random)
+
+    stats: LinkStats = field(default_factory=LinkStats, init=False)
+    _busy_until: float = field(default=0, init=False)  # Cap is sending till then
+    _last_delivery: float = field(default=0, init=False)
+
+    def schedule(self, now: float, size: int) -> float | None:
+        """Delivery time for packet of `size` bytes sent at `now`, None if dropped."""
+        p = self.profile
+        if self.rng.random() < p.loss:
+            self.stats.lost += 1
+            return None
+
+        sent_at = now
+        if p.bandwidth_kbps:
+            start = max(now, self._busy_until)
+            if start - now > p.queue_ms / 1000:
+                self.stats.queue_drops += 1
+                return None
+            sent_at = self._busy_until = start + size * 8 / (p.bandwidth_kbps * 1000)
+
+        delay = max(0, self.rng.gauss(p.latency_ms, p.jitter_ms)) / 1000
+        deliver_at = sent_at + delay
+        if p.reorder and self.rng.random() < p.reorder:
+            self.stats.reordered += 1
+            deliver_at = max(deliver_at, self._last_delivery) + p.reorder_gap_ms / 1000
+        else:
+            deliver_at = self._last_delivery = max(deliver_at, self._last_delivery)
+
+        self.stats.forwarded += 1
+        return deliver_at
+
+
+@dataclass
+class DelayLine:
+    """Sends packets out at their delivery times."""
+
+    socket: UDPSocket
+    _queue: list[tuple[float, int, bytes, tuple[str, int]]] = field(
+        default_factory=list[tuple[float, int, bytes, tuple[str, int]]], init=False
+    )
+    _seq: int = field(default=0, init=False)  # Keeps order of equal times
+    _added: anyio.Event = field(default_factory=anyio.Event, init=False)
+
+    def put(self, deliver_at: float, packet: bytes, address: tuple[str, int]) -> None:
+        heapq.heappush(self._queue, (deliver_at, self._seq, packet, address))
+        self._seq += 1
+        self._added.set()
+
+    async def run(self) -> None:
+        while True:
+            if not self._queue:
+                await self._added.wait()
+                self._added = anyio.Event()
+                continue
+
+            deliver_at, _, packet, (host, port) = self._queue[0]
+            if (wait := deliver_at - anyio.current_time()) > 0:
+                with anyio.move_on_after(wait):
+                    await self._added.wait()
+                    self._added = anyio.Event()
+                continue
+
+            heapq.heappop(self._queue)
+            await self.socket.sendto(packet, host, port)
+
+
+@dataclass
+class _Session:
+    """One client's JackTrip: both directions of its audio."""
+
+    client_address: tuple[str, int]  # Updated from packets it sends
+    server_address: tuple[str, int]
+    to_client: UDPSocket  # Client sends here, we reply from here
+    to_server: UDPSocket
+    last_packet: float = field(default_factory=anyio.current_time)
+
+
+@dataclass
+class Netsim:
+    profile: NetsimProfile
+    server_host: IPv4Address
+    server_port: int
+    listen_host: str = "0.0.0.0"
+    listen_port: int = DEFAULT_LISTEN_PORT
+    # Session is over when client sends nothing for that long, in seconds
+    idle_timeout: float = 10.0
+
+    upstream: Link = field(init=False)
+    downstream: Link = field(init=False)
+
+    def __post_init__(self) -> None:
+        rnd = random.Random(self.profile.seed)
+        self.upstream = Link(self.profile.upstream, random.Random(rnd.random()))
+        self.downstream = Link(self.profile.downstream, random.Random(rnd.random()))
+
+    async def _forward_upstream(self, session: _Session, out: DelayLine) -> None:
+        async for packet, address in session.to_client:
+            session.client_address = address
+            session.last_packet = now = anyio.current_time()
+            if (deliver_at := self.upstream.schedule(now, len(packet))) is not None:
+                out.put(deliver_at, packet, session.server_address)
+
+    async def _forward_downstream(self, session: _Session, out: DelayLine) -> None:
+        async for packet, _ in session.to_server:
+            now = anyio.current_time()
+            if (deliver_at := self.downstream.schedule(now, len(packet))) is not None:
+                out.put(deliver_at, packet, session.client_address)
+
+    async def _run_session(self, session: _Session) -> None:
+        async with anyio.create_task_group() as tg:
+            up = DelayLine(session.to_server)
+            down = DelayLine(session.to_client)
+            tg.start_soon(up.run)
+            tg.start_soon(down.run)
+            tg.start_soon(self._forward_upstream, session, up)
+            tg.start_soon(self._forward_downstream, session, down)
+
+            while anyio.current_time() - session.last_packet < self.idle_timeout:
+                await anyio.sleep(1)
+            tg.cancel_scope.cancel()
+
+    async def _relay_handshake(self, client: SocketStream, session: _Session) -> None:
+        """Pass ports over as if our sockets were the peers."""
+        buffered = BufferedByteReceiveStream(client)
+        (client_udp_port,) = _UDP_PORT.unpack(await buffered.receive_exactly(4))
+        session.client_address = (session.client_address[0], client_udp_port)
+        to_server_port = session.to_server.extra(SocketAttribute.local_port)
+
+        async with await anyio.connect_tcp(
+            str(self.server_host), self.server_port
+        ) as server:
+            # Client name may follow the port
+            rest = buffered.buffer
+            with anyio.move_on_after(0.1):
+                while True:
+                    rest += await buffered.receive()
+            await server.send(_UDP_PORT.pack(to_server_port) + rest)
+
+            server_buffered = BufferedByteReceiveStream(server)
+            (server_udp_port,) = _UDP_PORT.unpack(
+                await server_buffered.receive_exactly(4)
+            )
+
+        session.server_address = (str(self.server_host), server_udp_port)
+        to_client_port = session.to_client.extra(SocketAttribute.local_port)
+        await client.send(_UDP_PORT.pack(to_client_port))
+
+    async def _handle_client(self, client: SocketStream) -> None:
+        client_host = client.extra(SocketAttribute.remote_address)[0]
+        async with client, await self._open_udp(
+            self.listen_host
+        ) as to_client, await self._open_udp("0.0.0.0") as to_server:
+            session = _Session(
+                client_address=(client_host, 0),
+                server_address=(str(self.server_host), 0),
+                to_client=to_client,
+                to_server=to_server,
+            )
+            try:
+                await self._relay_handshake(client, session)
+            except (anyio.EndOfStream, anyio.IncompleteRead, OSError) as exc:
+                netsim_log.warning(f"Handshake with {client_host} failed: {exc!r}")
+                return
+
+            netsim_log.info(
+                f"Relaying {session.client_address[0]}:{session.client_address[1]}"
+                + f" to server UDP port {session.server_address[1]}"
+            )
+            await client.aclose()
+            await self._run_session(session)
+            netsim_log.info(f"Session of {client_host} is idle, dropped it")
+
+    async def _open_udp(self, host: str) -> UDPSocket:
+        return await anyio.create_udp_socket(
+            family=socket.AF_INET, local_host=host, local_port=0
+        )
+
+    async def _log_stats(self) -> None:
+        while True:
+            await anyio.sleep(STATS_INTERVAL)
+            netsim_log.info(f"Upstream {self.upstream.stats}")
+            netsim_log.info(f"Downstream {self.downstream.stats}")
+
+    async def run(self) -> None:
+        listener = await anyio.create_tcp_listener(
+            local_host=self.listen_host, local_port=self.listen_port
+        )
+        netsim_log.info(
+            f"Listening on {self.listen_host}:{self.listen_port}, forwarding to"
+            + f" {self.server_host}:{self.server_port}"
+        )
+        async with listener, anyio.create_task_group() as tg:
+            tg.start_soon(self._log_stats)
+            await listener.serve(self._handle_client)
@@ -1,5 +1,7 @@
-from collections.abc import Iterable
-from typing import Literal, NewType, cast
+import re
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any, Literal, NewType, cast
 
 from pydantic import BaseModel
 
@@ -28,6 +30,84 @@ class PortName(BaseModel, frozen=True):
         return cls(client=client, type=cast(PortType, type), idx=int(idx))
 
 
+_PORT_RANGE_RE = re.compile(
+    r"^(?P<client>.+):(?P<type>send|receive|capture|playback)"
+    + r"_(?P<start>\d+)(\.\.(?P<stop>\d+))?$"
+)
+
+
+def parse_idx_range(value: int | str) -> range:
+    """Parse port index or inclusive range of indexes like "1..16"."""
+    if isinstance(value, int):
+        return range(value, value + 1)
+
+    start, _, stop = value.partition("..")
+    result = range(int(start), int(stop or start) + 1)
+    if not result:
+        raise ValueError(f"Empty port range: {value}")
+    return result
+
+
+def expand_port_ranges(ports: dict[int | str, int | str]) -> dict[int, int]:
+    """Expand port index mapping like {"1..4": "11..14"} into {1: 11, 2: 12, ...}."""
+    result: dict[int, int] = {}
+
+    for local, remote in ports.items():
+        local_idxs, remote_idxs = parse_idx_range(local), parse_idx_range(remote)
+        if len(local_idxs) != len(remote_idxs):
+            raise ValueError(f"Port ranges differ in length: {local}: {remote}")
+        result.update(zip(local_idxs, remote_idxs))
+
+    return result
+
+
+@dataclass(frozen=True)
+class PortRange:
+    """Inclusive range of JACK ports of the same client and type, like "system:capture_1..64"."""
+
+    client: str
+    type: PortType
+    start: int
+    stop: int
+
+    def __str__(self) -> str:
+        if self.start == self.stop:
+            return f"{self.client}:{self.type}_{self.start}"
+        return f"{self.client}:{self.type}_{self.start}..{self.stop}"
+
+    def __len__(self) -> int:
+        return self.stop - self.start + 1
+
+    def names(self) -> Iterator[str]:
+        for idx in range(self.start, self.stop + 1):
+            yield f"{self.client}:{self.type}_{idx}"
+
+    @classmethod
+    def parse(cls, value: str) -> "PortRange":
+        if not (match := _PORT_RANGE_RE.match(value)):
+            raise ValueError(f"Invalid port range: {value}")
+
+        start = int(match["start"])
+        stop = int(match["stop"] or start)
+        if stop < start:
+            raise ValueError(f"Empty port range: {value}")
+
+        type = cast(PortType, match["type"])
+        return cls(client=match["client"], type=type, start=start, stop=stop)
+
+    @classmethod
+    def __get_validators__(cls) -> Iterator[Callable[[Any], "PortRange"]]:
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, value: Any) -> "PortRange":
+        if isinstance(value, cls):
+            return value
+        if not isinstance(value, str):
+            raise TypeError("string required")
+        return cls.parse(value)
+
+
 ClientShould = Literal["send", "receive"]
 
 
@@ -70,7 +150,7 @@ def _build_connection(
 ) -> PortConnection:
     """
     Build port connection based on client role, name and port indexes
-    assuming that JackTrip is used.
+    assuming JackTrip-style `send_N`/`receive_N` bridge naming.
     """
     if client_should == "send":
         source_idx, destination_idx = local, remote
@@ -91,12 +171,16 @@ def _build_connection(
 
 
 def _build_specific_connections(
-    client_name: str, client_should: ClientShould, ports: dict[int, int]
+    client_name: str,
+    client_should: ClientShould,
+    ports: dict[int, int],
+    local_bridge_client_name: str = jacktrip.JACK_CLIENT_NAME,
 ) -> Iterable[PortConnection]:
     """Build port connection for `client_should`."""
     for idx, (local, remote) in enumerate(ports.items(), start=1):
         yield _build_connection(
             client_name=client_name,
+            local_bridge_client_name=local_bridge_client_name,
             client_should=client_should,
             local=local,
             remote=remote,
@@ -108,15 +192,22 @@ def build_connection_map(
     client_name: str,
     receive: dict[int, int],
     send: dict[int, int],
+    local_bridge_client_name: str = jacktrip.JACK_CLIENT_NAME,
 ) -> ConnectionMap:
     """Build connection map based on port indexes. Takes in account limits and client name."""
 
     def gen():
         yield from _build_specific_connections(
-            client_name=client_name, client_should="send", ports=send
+            client_name=client_name,
+            local_bridge_client_name=local_bridge_client_name,
+            client_should="send",
+            ports=send,
         )
         yield from _build_specific_connections(
-            client_name=client_name, client_should="receive", ports=receive
+            client_name=client_name,
+            local_bridge_client_name=local_bridge_client_name,
+            client_should="receive",
+            ports=receive,
         )
 
     return {RegisteredJackTripPort(conn.local_bridge): conn for conn in gen()}
@@ -130,10 +221,8 @@ def _validate_bridge_limit(
         raise RuntimeError(f"Limit of available {client_should} ports exceeded.")
 
 
-def count_receive_send_channels(
-    connection_map: ConnectionMap, inputs_limit: int, outputs_limit: int
-) -> tuple[int, int]:
-    """Count number of used receive and send ports for bridge limit allocation (JackTrip)."""
+def count_channels(connection_map: ConnectionMap) -> tuple[int, int]:
+    """Count number of used receive and send ports of bridge (JackTrip)."""
 
     receive, send = 0, 0
 
@@ -143,6 +232,16 @@ def count_receive_send_channels(
         else:
             receive += 1
 
+    return receive, send
+
+
+def count_receive_send_channels(
+    connection_map: ConnectionMap, inputs_limit: int, outputs_limit: int
+) -> tuple[int, int]:
+    """Count number of used receive and send ports for bridge limit allocation (JackTrip)."""
+
+    receive, send = count_channels(connection_map)
+
     _validate_bridge_limit(limit=inputs_limit, bridge_idx=send, client_should="send")
     _validate_bridge_limit(
         limit=outputs_limit, bridge_idx=receive, client_should="receive"
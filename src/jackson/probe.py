@@ -0,0 +1,123 @@
+import socket
+import statistics
+import struct
+import time
+from ipaddress import IPv4Address
+
+import anyio
+from pydantic import BaseModel
+
+_PACKET = struct.Struct("!Id")  # Sequence number, send time
+
+
+class NetworkReport(BaseModel):
+    rtt_ms: float
+    jitter_ms: float
+    loss: float
+    queue_length: int
+    predicted_underrun_rate: float
+
+
+async def serve_echo(port: int) -> None:
+    """Echo every UDP datagram back to sender so clients can measure the path."""
+    async with await anyio.create_udp_socket(
+        family=socket.AF_INET, local_host="0.0.0.0", local_port=port
+    ) as udp:
+        async for packet, (host, port_) in udp:
+            await udp.sendto(packet, host, port_)
+
+
+async def measure_rtts(
+    host: IPv4Address, port: int, count: int, interval: float, timeout: float
+) -> list[float | None]:
+    """Send `count` packets in a burst. Returns RTT in seconds, None for lost packets."""
+    rtts: list[float | None] = [None] * count
+
+    async with await anyio.create_connected_udp_socket(
+        str(host), port, family=socket.AF_INET
+    ) as udp:
+
+        async def receive() -> None:
+            async for packet in udp:
+                seq, sent_at = _PACKET.unpack(packet)
+                if seq < count:
+                    rtts[seq] = time.perf_counter() - sent_at
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(receive)
+
+            for seq in range(count):
+                await udp.send(_PACKET.pack(seq, time.perf_counter()))
+                await anyio.sleep(interval)
+
+            await anyio.sleep(timeout)
+            tg.cancel_scope.cancel()
+
+    return rtts
+
+
+def predict_underrun_rate(delays: list[float], period: float, queue: int) -> float:
+    """
+    Fraction of packets that arrive later than `queue` packets of buffering can hide.
+    `delays` are one-way delay variations in seconds.
+    """
+    if not delays:
+        return 0
+    return sum(d > queue * period for d in delays) / len(delays)
+
+
+def choose_queue_length(
+    delays: list[float],
+    period: float,
+    target: float,
+    min_length: int = 2,
+    max_length: int = 64,
+) -> int:
+    """Smallest queue length that keeps predicted underrun rate under `target`."""
+    for queue in range(min_length, max_length + 1):
+        if predict_underrun_rate(delays, period, queue) <= target:
+            return queue
+    return max_length
+
+
+def _mean_consecutive_difference(values: list[float]) -> float:
+    if len(values) < 2:
+        return 0
+    return statistics.fmean(abs(a - b) for a, b in zip(values, values[1:]))
+
+
+def build_network_report(
+    rtts: list[float | None], period: float, target: float
+) -> NetworkReport | None:
+    """Returns None if no packets came back."""
+    if not (received := [rtt for rtt in rtts if rtt is not None]):
+        return None
+
+    # Half of round trip variation approximates one-way delay variation
+    min_rtt = min(received)
+    delays = [(rtt - min_rtt) / 2 for rtt in received]
+    queue = choose_queue_length(delays, period, target)
+    loss = 1 - len(received) / len(rtts)
+
+    return NetworkReport(
+        rtt_ms=statistics.median(received) * 1000,
+        jitter_ms=_mean_consecutive_difference(received) * 1000,
+        loss=loss,
+        queue_length=queue,
+        predicted_underrun_rate=min(
+            1, predict_underrun_rate(delays, period, queue) + loss
+        ),
+    )
+
+
+async def probe_network(
+    host: IPv4Address,
+    port: int,
+    period: float,
+    target_underrun_rate: float,
+    count: int = 200,
+    interval: float = 0.002,
+) -> NetworkReport | None:
+    """Measure path to server's echo responder and pick JackTrip queue length."""
+    rtts = await measure_rtts(host, port, count=count, interval=interval, timeout=1)
+    return build_network_report(rtts, period=period, target=target_underrun_rate)
@@ -0,0 +1,127 @@
+"""
+Realtime scheduling of child processes (JackTrip) and memory locking of our
+own. Linux only: elsewhere policy is reported as unsupported and skipped.
+
+Needs `LimitRTPRIO` and `LimitMEMLOCK` (or CAP_SYS_NICE and CAP_IPC_LOCK).
+Without them it's logged and process runs with what it got.
+
+JackTrip starts its JACK process thread and, with `--udprt`, realtime UDP
+threads only once it's connected, and sets their scheduling itself. So policy
+is applied after bridge ports appear and again for threads that come later.
+It replaces what JackTrip chose for every thread; `--udprt` only matters
+until then or when no priority is configured.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import sys
+from dataclasses import dataclass
+
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+
+@dataclass(frozen=True)
+class RealtimePolicy:
+    priority: int | None = None  # SCHED_FIFO priority, 1-99
+    cpus: frozenset[int] | None = None  # Pin to these CPUs
+
+
+@dataclass(frozen=True)
+class Scheduling:
+    """Effective scheduling of one thread."""
+
+    policy: str
+    priority: int
+    cpus: frozenset[int]
+
+    def __str__(self) -> str:
+        cpus = ",".join(map(str, sorted(self.cpus)))
+        return f"{self.policy} priority {self.priority}, CPUs {cpus}"
+
+
+def is_supported() -> bool:
+    return sys.platform == "linux"
+
+
+def get_thread_ids(pid: int) -> list[int]:
+    return [int(tid) for tid in os.listdir(f"/proc/{pid}/task")]
+
+
+def get_scheduling(tid: int) -> Scheduling:
+    names = {
+        os.SCHED_OTHER: "SCHED_OTHER",
+        os.SCHED_FIFO: "SCHED_FIFO",
+        os.SCHED_RR: "SCHED_RR",
+    }
+    policy = os.sched_getscheduler(tid)
+    return Scheduling(
+        policy=names.get(policy, str(policy)),
+        priority=os.sched_getparam(tid).sched_priority,
+        cpus=frozenset(os.sched_getaffinity(tid)),
+    )
+
+
+def matches(scheduling: Scheduling, policy: RealtimePolicy) -> bool:
+    if policy.priority is not None and (
+        scheduling.policy != "SCHED_FIFO" or scheduling.priority != policy.priority
+    ):
+        return False
+    return not policy.cpus or scheduling.cpus == policy.cpus
+
+
+def _set_scheduling(tid: int, policy: RealtimePolicy) -> None:
+    if policy.priority is not None:
+        param = os.sched_param(policy.priority)
+        os.sched_setscheduler(tid, os.SCHED_FIFO, param)
+    if policy.cpus:
+        os.sched_setaffinity(tid, policy.cpus)
+
+
+def apply_policy(pid: int, policy: RealtimePolicy, log: logging.Logger) -> bool:
+    """
+    Apply to threads of process that don't run with policy yet and read back
+    effective scheduling of each. Logs only if something changed. Returns
+    False if policy can't be applied at all.
+    """
+    if not is_supported():
+        log.warning(f"Realtime policy is not supported on {sys.platform}")
+        return False
+
+    applied: dict[int, Scheduling] = {}
+    try:
+        for tid in get_thread_ids(pid):
+            try:
+                if matches(get_scheduling(tid), policy):
+                    continue
+                _set_scheduling(tid, policy)
+                applied[tid] = get_scheduling(tid)
+            except ProcessLookupError:  # Thread has exited meanwhile
+                continue
+    except OSError as exc:  # No permission or process is gone already
+        log.warning(f"Failed to apply realtime policy to process {pid}: {exc}")
+        return False
+
+    if wrong := {t: s for t, s in applied.items() if not matches(s, policy)}:
+        threads = ", ".join(f"thread {tid} with {s}" for tid, s in wrong.items())
+        log.warning(f"Process {pid} runs {threads}, wanted {policy}")
+    elif applied:
+        scheduling = next(iter(applied.values()))
+        log.info(f"Process {pid} runs with {scheduling} ({len(applied)} threads set)")
+    return True
+
+
+def lock_memory(log: logging.Logger) -> None:
+    """Keep our pages, including ones mapped later, in RAM: no page faults."""
+    if not is_supported():
+        log.warning(f"Memory locking is not supported on {sys.platform}")
+        return
+
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+        errno = ctypes.get_errno()
+        log.warning(f"Failed to lock memory: {os.strerror(errno)}")
+    else:
+        log.info("Locked memory")
@@ -0,0 +1,322 @@
+import json
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO
+
+import jack
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel
+
+from jackson.logging import recorder_log as log
+from jackson.tap import (
+    PortTaps,
+    get_output_ports,
+    is_bridge_receive_port,
+    register_inputs,
+)
+
+RECORDER_CLIENT_NAME = "Recorder"
+WAV_HEADER_SIZE = 58
+PREALLOCATE_SIZE = 16 * 1024 * 1024
+
+Float32Array = npt.NDArray[np.float32]
+
+
+class RecorderStatus(BaseModel):
+    directory: str
+    frames: int
+    overruns: int
+    tracks: dict[int, str]
+
+
+@dataclass
+class BlockRing:
+    """
+    Preallocated ring of multichannel blocks.
+
+    Single producer (process callback) and single consumer (writer thread).
+    Producer drops block and counts overrun instead of waiting when ring is full.
+    """
+
+    slots: int
+    channels: int
+    blocksize: int
+    start_frame: int = 0  # Frames recorded before this ring
+
+    values: Float32Array = field(init=False)
+    written: int = field(default=0, init=False)
+    read: int = field(default=0, init=False)
+    overruns: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        shape = (self.slots, self.channels, self.blocksize)
+        self.values = np.zeros(shape, dtype=np.float32)
+
+    def next_slot(self) -> Float32Array | None:
+        if self.written - self.read >= self.slots:
+            self.overruns += 1
+            return None
+        return self.values[self.written % self.slots]
+
+    def commit(self) -> None:
+        self.written += 1
+
+    def pending(self) -> Float32Array:
+        """Contiguous run of written but not yet consumed slots."""
+        start = self.read % self.slots
+        count = min(self.written - self.read, self.slots - start)
+        return self.values[start : start + count]
+
+    def consume(self, count: int) -> None:
+        self.read += count
+
+    @property
+    def written_frames(self) -> int:
+        return self.start_frame + self.written * self.blocksize
+
+    @property
+    def read_frames(self) -> int:
+        return self.start_frame + self.read * self.blocksize
+
+
+def _build_wav_header(rate: int, frames: int) -> bytes:
+    """
+    Mono 32-bit float WAV header. Non-PCM formats need the extended `fmt `
+    chunk (with `cbSize`) and a `fact` chunk with the number of samples.
+    """
+    data_size = frames * 4
+    return struct.pack(
+        "<4sI4s4sIHHIIHHH4sII4sI",
+        b"RIFF",
+        WAV_HEADER_SIZE - 8 + data_size,
+        b"WAVE",
+        b"fmt ",
+        18,
+        3,  # WAVE_FORMAT_IEEE_FLOAT
+        1,
+        rate,
+        rate * 4,
+        4,
+        32,
+        0,  # cbSize
+        b"fact",
+        4,
+        frames,
+        b"data",
+        data_size,
+    )
+
+
+@dataclass
+class WavTrack:
+    """Mono float WAV file that preallocates disk space ahead of writes."""
+
+    path: Path
+    rate: int
+
+    file: BinaryIO = field(init=False)
+    frames: int = field(default=0, init=False)
+    allocated: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        self.file = open(self.path, "wb")
+        self.file.write(_build_wav_header(self.rate, 0))
+
+    def _preallocate(self, size: int) -> None:
+        if not hasattr(os, "posix_fallocate") or size <= self.allocated:
+            return
+
+        self.allocated += max(size - self.allocated, PREALLOCATE_SIZE)
+        os.posix_fallocate(self.file.fileno(), 0, self.allocated)
+
+    def write(self, samples: Float32Array) -> None:
+        self.frames += len(samples)
+        self._preallocate(WAV_HEADER_SIZE + self.frames * 4)
+        self.file.write(samples.data)
+
+    def close(self) -> None:
+        self.file.flush()
+        self.file.truncate(WAV_HEADER_SIZE + self.frames * 4)
+        self.file.seek(0)
+        self.file.write(_build_wav_header(self.rate, self.frames))
+        self.file.close()
+
+
+@dataclass
+class Recorder:
+    """
+    JACK client that records every bridged channel (bridge clients' `receive_N`
+    ports) into a track per input.
+
+    Process callback only copies blocks into the ring, the writer thread drains
+    it to disk in large sequential writes. Frame at which each track file starts
+    and which port was tapped into it from which frame are written to
+    `tracks.jsonl`.
+
+    Blocks in a ring have one size, so when JACK buffer size changes, a new
+    ring takes over and the old one is drained before it.
+    """
+
+    client: jack.Client
+    directory: Path
+    channels: int
+    buffer_seconds: float
+
+    ring: BlockRing = field(init=False)
+    taps: PortTaps = field(init=False)
+    tracks: dict[int, WavTrack] = field(default_factory=dict[int, WavTrack], init=False)
+
+    _retired: list[BlockRing] = field(default_factory=list[BlockRing], init=False)
+    _ring_lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+    _scratch: Float32Array = field(init=False)
+    _stopping: threading.Event = field(default_factory=threading.Event, init=False)
+    _writer: threading.Thread = field(init=False)
+    _reported_overruns: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        ports = register_inputs(self.client, self.channels)
+        self.taps = PortTaps(client=self.client, ports=ports)
+
+        self.ring = self._get_ring(self.client.blocksize, start_frame=0)
+        self._scratch = np.zeros(0, dtype=np.float32)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.client.set_blocksize_callback(self._replace_ring)
+        self.client.set_process_callback(self._process)
+        self._writer = threading.Thread(target=self._write_forever, daemon=True)
+
+    def _get_ring(self, blocksize: int, start_frame: int) -> BlockRing:
+        slots = int(self.buffer_seconds * self.client.samplerate / blocksize) + 1
+        return BlockRing(
+            slots=slots,
+            channels=self.channels,
+            blocksize=blocksize,
+            start_frame=start_frame,
+        )
+
+    def _replace_ring(self, blocksize: int) -> None:
+        # Process callback doesn't run meanwhile, writer thread may
+        if blocksize == (old := self.ring).blocksize:
+            return
+        ring = self._get_ring(blocksize, start_frame=old.written_frames)
+        ring.overruns = old.overruns
+        with self._ring_lock:
+            self._retired.append(old)
+            self.ring = ring
+        log.info(f"Recorder buffer size changed to {blocksize}")
+
+    def _process(self, frames: int) -> None:
+        if (slot := self.ring.next_slot()) is None:
+            return
+
+        for idx, port in enumerate(self.taps.ports):
+            slot[idx] = port.get_array()
+
+        self.ring.commit()
+
+    def _log_track_event(self, **event: int | str) -> None:
+        with open(self.directory / "tracks.jsonl", "a") as f:
+            f.write(json.dumps(event) + "\n")
+
+    def _open_new_tracks(self, frame: int) -> None:
+        for idx in self.taps.snapshot():
+            if idx in self.tracks:
+                continue
+
+            path = self.directory / f"track_{idx + 1:02}.wav"
+            self.tracks[idx] = WavTrack(path=path, rate=self.client.samplerate)
+            self._log_track_event(track=idx + 1, file=path.name, frame=frame)
+
+    def _write_pending(self) -> int:
+        # Blocks of previous buffer sizes go first
+        with self._ring_lock:
+            while self._retired and not len(self._retired[0].pending()):
+                self._retired.pop(0)
+            ring = self._retired[0] if self._retired else self.ring
+
+        blocks = ring.pending()
+        if not (count := len(blocks)):
+            return 0
+
+        self._open_new_tracks(frame=ring.read_frames)
+
+        shape = (self.channels, ring.slots, ring.blocksize)
+        if self._scratch.shape != shape:
+            self._scratch = np.zeros(shape, dtype=np.float32)
+
+        # Transpose into per-channel contiguous runs of samples
+        scratch = self._scratch[:, :count]
+        np.copyto(scratch, blocks.transpose(1, 0, 2))
+        ring.consume(count)
+
+        for idx, track in self.tracks.items():
+            track.write(scratch[idx].reshape(-1))
+
+        return count
+
+    def _report_overruns(self) -> None:
+        if (overruns := self.ring.overruns) != self._reported_overruns:
+            log.warning(f"Recorder buffer overruns: {overruns}")
+            self._reported_overruns = overruns
+
+    def _write_forever(self) -> None:
+        while not self._stopping.is_set():
+            if not self._write_pending():
+                time.sleep(0.05)
+            self._report_overruns()
+
+        while self._write_pending():
+            pass
+
+    def sync_taps(self) -> None:
+        sources = get_output_ports(self.client, is_bridge_receive_port)
+        frame = self.ring.written_frames
+
+        for idx, source in self.taps.sync(sources).items():
+            self._log_track_event(track=idx + 1, source=source, frame=frame)
+            log.info(f"Recording [bold green]{source}[/bold green] on track {idx + 1}")
+
+    def start(self) -> None:
+        self._writer.start()
+        self.client.activate()
+
+    def close(self) -> None:
+        self.client.deactivate()
+        self._stopping.set()
+        self._writer.join()
+
+        for track in self.tracks.values():
+            track.close()
+
+        self._report_overruns()
+
+    def status(self) -> RecorderStatus:
+        return RecorderStatus(
+            directory=str(self.directory),
+            frames=self.ring.written_frames,
+            overruns=self.ring.overruns,
+            tracks={idx + 1: name for idx, name in self.taps.snapshot().items()},
+        )
+
+
+def get_recorder(
+    server_name: str, directory: str, channels: int, buffer_seconds: float
+) -> Recorder:
+    client = jack.Client(
+        RECORDER_CLIENT_NAME, no_start_server=True, servername=server_name
+    )
+    session = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    recorder = Recorder(
+        client=client,
+        directory=Path(directory) / session,
+        channels=channels,
+        buffer_seconds=buffer_seconds,
+    )
+    recorder.start()
+    return recorder
@@ -0,0 +1,41 @@
+from collections.abc import Iterable
+
+from pydantic import BaseModel
+
+from jackson.lease import Edge
+from jackson.port_connection import PortRange
+
+SceneSpec = list[tuple[PortRange, PortRange]]  # (source, destination) ranges
+
+
+class ScenesResponse(BaseModel):
+    scenes: list[str]
+    current: str | None
+
+
+class SceneSwitchResponse(BaseModel):
+    scene: str
+    connected: int
+    disconnected: int
+    duration_ms: float
+
+
+class SceneNotFound(BaseModel):
+    name: str
+
+
+def expand_scene(spec: SceneSpec) -> frozenset[Edge]:
+    edges: set[Edge] = set()
+    for source, destination in spec:
+        if len(source) != len(destination):
+            raise ValueError(f"Ranges differ in length: {source} -> {destination}")
+        edges.update(zip(source.names(), destination.names()))
+    return frozenset(edges)
+
+
+def diff_edges(
+    current: Iterable[Edge], target: Iterable[Edge]
+) -> tuple[list[Edge], list[Edge]]:
+    """Edges to connect and to disconnect to get from `current` to `target`."""
+    current, target = set(current), set(target)
+    return sorted(target - current), sorted(current - target)
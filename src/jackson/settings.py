@@ -2,9 +2,26 @@ from ipaddress import IPv4Address
 from typing import Any
 
 from jack_server import SampleRate
-from pydantic import AnyHttpUrl, BaseModel
+from pydantic import validator  # pyright: ignore[reportUnknownVariableType]
+from pydantic import AnyHttpUrl, BaseModel, Field
 
-from jackson.port_connection import ConnectionMap, build_connection_map
+from jackson.admission import DEFAULT_MAX_PENDING
+from jackson.lease import DEFAULT_LEASE_TTL
+from jackson.port_connection import (
+    ConnectionMap,
+    build_connection_map,
+    expand_port_ranges,
+)
+from jackson.realtime import RealtimePolicy
+from jackson.scenes import SceneSpec, expand_scene
+from jackson.shards import MAX_SHARDS
+from jackson.transport import TransportName, get_transport
+
+
+def _check_channels_driver(value: int | None, values: dict[str, Any]) -> int | None:
+    if value is not None and values.get("driver") != "dummy":
+        raise ValueError("channels can only be set for dummy driver")
+    return value
 
 
 class _ServerAudio(BaseModel):
@@ -13,22 +30,132 @@ class _ServerAudio(BaseModel):
     jack_server_name: str = "JacksonServer"
     sample_rate: SampleRate
     buffer_size: int  # In samples
+    # Use JACK server with this name if it's already running (rate and buffer
+    # size must match) instead of starting one
+    attach: bool = False
+    # Capture and playback ports of dummy driver, others take them from device
+    channels: int | None = Field(default=None, ge=1)
+
+    @validator("channels")
+    def _validate_channels(
+        cls, value: int | None, values: dict[str, Any]
+    ) -> int | None:
+        return _check_channels_driver(value, values)
 
 
 class _ServerServer(BaseModel):
     jacktrip_port: int
+    # JackTrip hubs on ports from `jacktrip_port` on, clients are spread
+    # between them at `/init`
+    jacktrip_shards: int = Field(default=1, ge=1, le=MAX_SHARDS)
     api_port: int
+    lease_ttl: float = DEFAULT_LEASE_TTL  # In seconds
+    probe_port: int | None = None  # UDP echo responder for clients' path probing
+    # Graph operations allowed to run or wait at once, rest get 429
+    max_pending_operations: int = DEFAULT_MAX_PENDING
+    # Serve JACK side over Unix socket and run API in separate worker processes
+    agent_socket: str | None = None
+    api_workers: int = 1
+
+
+class _Realtime(BaseModel):
+    # SCHED_FIFO priority and CPUs to pin JackTrip to, by default left to
+    # JackTrip (`--udprt`) and system
+    jacktrip_priority: int | None = Field(default=None, ge=1, le=99)
+    jacktrip_cpus: list[int] | None = None
+    lock_memory: bool = False  # Lock pages of Jackson process in RAM
+
+    @property
+    def jacktrip_policy(self) -> RealtimePolicy | None:
+        if self.jacktrip_priority is None and not self.jacktrip_cpus:
+            return None
+        cpus = frozenset(self.jacktrip_cpus) if self.jacktrip_cpus else None
+        return RealtimePolicy(priority=self.jacktrip_priority, cpus=cpus)
+
+    def get_shard_policy(self, shard: int, shards: int) -> RealtimePolicy | None:
+        """Each of several shards is pinned to one of `jacktrip_cpus` in turn."""
+        policy = self.jacktrip_policy
+        if not policy or shards == 1 or not self.jacktrip_cpus:
+            return policy
+        cpu = self.jacktrip_cpus[shard % len(self.jacktrip_cpus)]
+        return RealtimePolicy(priority=self.jacktrip_priority, cpus=frozenset({cpu}))
+
+
+class _LoopLag(BaseModel):
+    # Measure event loop lag, log where loop is stuck when it stalls longer
+    # than threshold
+    enabled: bool = False
+    stall_threshold_ms: float = 100
+
+
+class _ServerBandwidth(BaseModel):
+    # Capacity for JackTrip streams, clients that don't fit are turned away
+    uplink_kbps: float | None = None
+    downlink_kbps: float | None = None
+
+
+class _ServerHistory(BaseModel):
+    enabled: bool = True
+    path: str | None = "log/server/history.json.gz"  # Dumped there on shutdown
+
+
+class _ServerMetering(BaseModel):
+    enabled: bool = False
+    channels: int = 64
+    publish_rate: float = 10  # In Hz
+
+
+class _ServerRecorder(BaseModel):
+    enabled: bool = False
+    directory: str = "recordings"
+    channels: int = 64
+    buffer_seconds: float = 2
+
+
+class _ServerMixer(BaseModel):
+    # Sum client streams that go to the same playback port instead of
+    # rejecting all but the first one
+    enabled: bool = False
+    inputs: int = 32
+    outputs: int = 16  # First playback ports, rest stay exclusive
+    smoothing_ms: float = 20  # Gain changes glide over about that long
 
 
 class ServerSettings(BaseModel):
     audio: _ServerAudio
     server: _ServerServer
+    transport: TransportName = "jacktrip"  # Same on server and its clients
+    bandwidth: _ServerBandwidth = _ServerBandwidth()
+    history: _ServerHistory = _ServerHistory()
+    realtime: _Realtime = _Realtime()
+    loop_lag: _LoopLag = _LoopLag()
+    metering: _ServerMetering = _ServerMetering()
+    recorder: _ServerRecorder = _ServerRecorder()
+    mixer: _ServerMixer = _ServerMixer()
+    scenes: dict[str, SceneSpec] = {}
+
+    @validator("scenes")
+    def _validate_scenes(cls, value: dict[str, SceneSpec]) -> dict[str, SceneSpec]:
+        for spec in value.values():
+            expand_scene(spec)
+        return value
 
 
 class _ClientAudio(BaseModel):
     driver: str
     device: str | None
     jack_server_name: str = "JacksonClient"
+    # Use JACK server with this name if it's already running (rate and buffer
+    # size must match server's) instead of starting one
+    attach: bool = False
+    # Capture and playback ports of dummy driver, others take them from device
+    channels: int | None = Field(default=None, ge=1)
+
+    @validator("channels")
+    def _validate_channels(
+        cls, value: int | None, values: dict[str, Any]
+    ) -> int | None:
+        return _check_channels_driver(value, values)
 
 
 class _ClientServer(BaseModel):
@@ -43,30 +170,73 @@ class _ClientServer(BaseModel):
         )
 
 
+class _ClientNetwork(BaseModel):
+    probe: bool = True
+    target_underrun_rate: float = 0.001
+
+
 class _ClientPorts(BaseModel):
+    # Keys and values are either port indexes or ranges like "1..16"
     receive: dict[int, int]
     send: dict[int, int]
 
+    @validator("receive", "send", pre=True)
+    def _expand_ranges(cls, value: dict[int | str, int | str]) -> dict[int, int]:
+        return expand_port_ranges(value)
+
 
 class _FileClientSettings(BaseModel):
     name: str
     audio: _ClientAudio
-    server: _ClientServer
+    server: _ClientServer | None = None
+    # Candidates instead of `server`: the closest healthy one is used and
+    # session fails over to the next best if it's lost
+    servers: list[_ClientServer] = []
+    transport: TransportName = "jacktrip"
+    network: _ClientNetwork = _ClientNetwork()
+    realtime: _Realtime = _Realtime()
+    loop_lag: _LoopLag = _LoopLag()
     ports: _ClientPorts
 
+    @validator("servers", always=True)
+    def _validate_servers(
+        cls, value: list[_ClientServer], values: dict[str, Any]
+    ) -> list[_ClientServer]:
+        if bool(values.get("server")) == bool(value):
+            raise ValueError("Either server or servers should be set")
+        return value
+
+    @property
+    def candidates(self) -> list[_ClientServer]:
+        return [self.server] if self.server else self.servers
+
 
 class ClientSettings(BaseModel):
     name: str
     audio: _ClientAudio
-    server: _ClientServer
+    servers: list[_ClientServer]
+    transport: TransportName = "jacktrip"
+    network: _ClientNetwork = _ClientNetwork()
+    realtime: _Realtime = _Realtime()
+    loop_lag: _LoopLag = _LoopLag()
     connection_map: ConnectionMap
 
     @staticmethod
     def load(content: Any) -> "ClientSettings":
         f = _FileClientSettings(**content)
         map = build_connection_map(
-            client_name=f.name, receive=f.ports.receive, send=f.ports.send
+            client_name=f.name,
+            receive=f.ports.receive,
+            send=f.ports.send,
+            local_bridge_client_name=get_transport(f.transport).bridge_client_name,
         )
         return ClientSettings(
-            name=f.name, audio=f.audio, server=f.server, connection_map=map
+            name=f.name,
+            audio=f.audio,
+            servers=f.candidates,
+            transport=f.transport,
+            network=f.network,
+            realtime=f.realtime,
+            loop_lag=f.loop_lag,
+            connection_map=map,
         )
@@ -0,0 +1,129 @@
+"""
+JackTrip hub servers on consecutive ports, so streams of many clients are
+spread over cores instead of saturating one. Each shard is a separate
+process; client is told at `/init` which port to stream to. Hubs name
+client's ports after it whatever the shard, so connections don't change.
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+
+from pydantic import BaseModel
+
+from jackson.lease import DEFAULT_LEASE_TTL
+
+# Every hub hands out UDP ports to its clients (one each) from its own base:
+# ports from JackTrip's default base up are split between hubs
+UDP_BASE_PORT = 61002  # JackTrip default, `--udpbaseport`
+UDP_PORT_LIMIT = 65535
+MIN_UDP_PORTS_PER_SHARD = 100
+MAX_SHARDS = (UDP_PORT_LIMIT + 1 - UDP_BASE_PORT) // MIN_UDP_PORTS_PER_SHARD
+
+
+class ShardLoad(BaseModel):
+    port: int
+    clients: list[str]
+    channels: int  # Receive and send channels of its clients
+    cpu_percent: float | None  # Of one core, None until sampled
+
+
+class ShardsUsage(BaseModel):
+    shards: list[ShardLoad]
+
+
+@dataclass
+class _Assignment:
+    shard: int
+    channels: int
+    assigned_at: float
+    connected: bool = False
+
+
+def get_shard_ports(first_port: int, count: int) -> list[int]:
+    return list(range(first_port, first_port + count))
+
+
+def get_udp_base_port(shard: int, shards: int) -> int:
+    return UDP_BASE_PORT + shard * ((UDP_PORT_LIMIT + 1 - UDP_BASE_PORT) // shards)
+
+
+def read_cpu_seconds(pid: int) -> float | None:
+    """User and system CPU time of process so far. None if it's unknown."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+
+    # Process name may have spaces, fields after it don't
+    fields = stat[stat.rindex(")") + 2 :].split()
+    utime, stime = int(fields[11]), int(fields[12])
+    return (utime + stime) / os.sysconf("SC_CLK_TCK")
+
+
+@dataclass
+class ShardPool:
+    """
+    Client goes to the shard that carries fewest channels. Assignment made at
+    `/init` is held for `pending_ttl` unless client connects, so probes of
+    candidate servers don't pile up. Not thread-safe.
+    """
+
+    ports: list[int]
+    pending_ttl: float = DEFAULT_LEASE_TTL
+
+    assignments: dict[str, _Assignment] = field(
+        default_factory=dict[str, _Assignment], init=False
+    )
+    cpu_percent: dict[int, float] = field(default_factory=dict[int, float], init=False)
+
+    def _expire_pending(self, now: float) -> None:
+        for name, a in list(self.assignments.items()):
+            if not a.connected and now - a.assigned_at > self.pending_ttl:
+                del self.assignments[name]
+
+    def _channels(self, shard: int) -> int:
+        return sum(a.channels for a in self.assignments.values() if a.shard == shard)
+
+    def assign(self, client_name: str, channels: int) -> int:
+        """Port of client's shard. Client keeps its shard on repeated calls."""
+        now = time.monotonic()
+        self._expire_pending(now)
+
+        if current := self.assignments.get(client_name):
+            current.channels = channels
+            if not current.connected:
+                current.assigned_at = now
+            return self.ports[current.shard]
+
+        shard = min(range(len(self.ports)), key=self._channels)
+        self.assignments[client_name] = _Assignment(shard, channels, now)
+        return self.ports[shard]
+
+    def activate(self, client_name: str) -> None:
+        """Client connected, its assignment lasts until it's released."""
+        if a := self.assignments.get(client_name):
+            a.connected = True
+
+    def release(self, client_name: str) -> None:
+        self.assignments.pop(client_name, None)
+
+    def record_cpu(self, shard: int, percent: float) -> None:
+        self.cpu_percent[shard] = percent
+
+    def usage(self) -> ShardsUsage:
+        self._expire_pending(time.monotonic())
+        return ShardsUsage(
+            shards=[
+                ShardLoad(
+                    port=port,
+                    clients=sorted(
+                        name for name, a in self.assignments.items() if a.shard == idx
+                    ),
+                    channels=self._channels(idx),
+                    cpu_percent=self.cpu_percent.get(idx),
+                )
+                for idx, port in enumerate(self.ports)
+            ]
+        )
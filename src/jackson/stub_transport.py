@@ -0,0 +1,118 @@
+"""
+Stand-in for `jacktrip` executable that moves no audio, run by "stub"
+transport as `python -m jackson.stub_transport`.
+
+Takes the same arguments Jackson passes and registers the same JACK ports
+real JackTrip does, on the server set in JACK_DEFAULT_SERVER:
+- hub server: `<remote name>:receive_N` / `<remote name>:send_N` once
+  a client introduces itself over TCP on --bindport,
+- client: `<client name>:send_N` / `<client name>:receive_N` after it got
+  through to the hub on --peerport.
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from types import FrameType
+from typing import Any
+
+import jack
+
+clients: list[jack.Client] = []
+
+
+def say(message: str) -> None:
+    print(message, file=sys.stderr, flush=True)
+
+
+def register_bridge(name: str, send: int, receive: int) -> None:
+    """`send_N` ports take audio in from the graph, `receive_N` put it out."""
+    client = jack.Client(name, no_start_server=True)
+    for idx in range(1, send + 1):
+        client.inports.register(f"send_{idx}")
+    for idx in range(1, receive + 1):
+        client.outports.register(f"receive_{idx}")
+    client.activate()
+    clients.append(client)
+
+
+class HubHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        hello: dict[str, Any] = json.loads(self.rfile.readline())
+        host = self.client_address[0]
+        say(f"JackTrip HUB SERVER: Client Connection Received from IP : {host}")
+
+        # Client's sends arrive on our receives and vice versa
+        register_bridge(hello["name"], send=hello["receive"], receive=hello["send"])
+        say(f"JackTrip HUB SERVER: Total Running Threads:  {len(clients)}")
+        self.wfile.write(b"ok\n")
+
+
+def run_server(port: int) -> None:
+    say("JackTrip HUB SERVER: Waiting for client connections...")
+    server = socketserver.ThreadingTCPServer(("0.0.0.0", port), HubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def connect_to_hub(host: str, port: int) -> socket.socket:
+    while True:
+        try:
+            return socket.create_connection((host, port))
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+
+
+def run_client(args: argparse.Namespace) -> None:
+    say(f"JackTrip TCP Client: Connecting to {args.pingtoserver}:{args.peerport}")
+    sock = connect_to_hub(args.pingtoserver, args.peerport)
+    hello = {
+        "name": args.remotename,
+        "send": args.sendchannels,
+        "receive": args.receivechannels,
+    }
+    sock.sendall(json.dumps(hello).encode() + b"\n")
+    sock.makefile().readline()
+
+    say("Received Connection from Peer!")
+    register_bridge(
+        args.clientname, send=args.sendchannels, receive=args.receivechannels
+    )
+
+
+def exit_on_sigterm(sig: int, frame: FrameType | None) -> None:
+    sys.exit(0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jacktripserver", action="store_true")
+    parser.add_argument("--bindport", type=int, default=4464)
+    parser.add_argument("--pingtoserver")
+    parser.add_argument("--peerport", type=int, default=4464)
+    parser.add_argument("--receivechannels", type=int, default=2)
+    parser.add_argument("--sendchannels", type=int, default=2)
+    parser.add_argument("--clientname", default="JackTrip")
+    parser.add_argument("--remotename")
+    args, _ = parser.parse_known_args()
+
+    say(
+        f"WEAK-JACK: initializing (stub, server {os.environ.get('JACK_DEFAULT_SERVER')})"
+    )
+    if args.jacktripserver:
+        run_server(args.bindport)
+    else:
+        run_client(args)
+
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
+    signal.pause()
+
+
+if __name__ == "__main__":
+    main()
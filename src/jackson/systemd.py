@@ -0,0 +1,50 @@
+"""
+sd_notify(3) without libsystemd: readiness, status and watchdog pings for
+units with `Type=notify` and `WatchdogSec=`. Does nothing outside systemd.
+
+Watchdog is fed from the event loop, so a loop that is stuck stops feeding
+it and systemd restarts the service.
+"""
+
+import os
+import socket
+
+import anyio
+
+
+def notify(*states: str) -> bool:
+    """Send states like "READY=1". Returns whether systemd listens."""
+    if not (path := os.environ.get("NOTIFY_SOCKET")):
+        return False
+    if path.startswith("@"):  # Abstract namespace
+        path = "\0" + path[1:]
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        try:
+            sock.sendto("\n".join(states).encode(), path)
+        except OSError:
+            return False
+    return True
+
+
+def get_watchdog_interval(from_child: bool = False) -> float | None:
+    """
+    How often to ping, in seconds: half of `WatchdogSec` like
+    sd_watchdog_enabled(3) suggests. None if this process isn't watched.
+    With `from_child`, worker processes of the watched one ping on its behalf
+    (needs `NotifyAccess=all`).
+    """
+    if not (usec := os.environ.get("WATCHDOG_USEC")):
+        return None
+    pids = {os.getpid(), os.getppid()} if from_child else {os.getpid()}
+    if (pid := os.environ.get("WATCHDOG_PID")) and int(pid) not in pids:
+        return None
+    return int(usec) / 1_000_000 / 2
+
+
+async def feed_watchdog(from_child: bool = False) -> None:
+    if not (interval := get_watchdog_interval(from_child)):
+        return
+    while True:
+        notify("WATCHDOG=1")
+        await anyio.sleep(interval)
@@ -0,0 +1,69 @@
+import re
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import cast
+
+import jack
+
+
+def register_inputs(client: jack.Client, count: int) -> list[jack.OwnPort]:
+    ports: list[jack.OwnPort] = []
+    for idx in range(1, count + 1):
+        port = client.inports.register(f"in_{idx}")
+        ports.append(cast(jack.OwnPort, port))
+    return ports
+
+
+def is_capture_port(name: str) -> bool:
+    return name.startswith("system:capture_")
+
+
+def is_bridge_receive_port(name: str) -> bool:
+    """Audio coming from the other side: bridge clients' `receive_N` outputs."""
+    return re.fullmatch(r"receive_\d+", name.partition(":")[2]) is not None
+
+
+def get_output_ports(
+    client: jack.Client, include: Callable[[str], bool] = lambda _: True
+) -> set[str]:
+    """Get names of audio output ports not owned by `client`."""
+    prefix = f"{client.name}:"
+    return {
+        p.name
+        for p in client.get_ports(is_audio=True, is_output=True)
+        if not p.name.startswith(prefix) and include(p.name)
+    }
+
+
+@dataclass
+class PortTaps:
+    """Keeps output ports of other clients connected to a fixed set of own inputs."""
+
+    client: jack.Client
+    ports: list[jack.OwnPort]
+
+    taps: dict[int, str] = field(default_factory=dict[int, str], init=False)
+
+    def sync(self, sources: Iterable[str]) -> dict[int, str]:
+        """Forget gone sources and tap new ones. Returns newly made taps."""
+        sources = set(sources)
+
+        for idx, name in list(self.taps.items()):
+            if name not in sources:
+                del self.taps[idx]
+
+        tapped = set(self.taps.values())
+        free = (i for i in range(len(self.ports)) if i not in self.taps)
+        new: dict[int, str] = {}
+
+        for name in sorted(sources - tapped):
+            if (idx := next(free, None)) is None:
+                break
+            self.client.connect(name, self.ports[idx])
+            self.taps[idx] = new[idx] = name
+
+        return new
+
+    def snapshot(self) -> dict[int, str]:
+        """Thread-safe copy of current taps."""
+        return self.taps.copy()
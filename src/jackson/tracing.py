@@ -0,0 +1,135 @@
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Generator
+from dataclasses import dataclass, field
+from types import FrameType
+from typing import IO, Any
+
+
+def _get_track_id() -> int:
+    """Current asyncio task (so concurrent tasks don't overlap), or thread."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return id(task) if task else threading.get_ident()
+
+
+@dataclass
+class Tracer:
+    """
+    Writes timing spans as Chrome Trace Event Format "complete" events.
+
+    Events are appended one per line to a JSON array that is never closed
+    which is allowed by the format: trace is readable even if process crashed.
+    Open it in chrome://tracing or https://ui.perfetto.dev.
+    """
+
+    file: IO[str] | None = field(default=None, init=False)
+    lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+
+    def open(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "w")
+        self.file.write("[\n")
+
+    def close(self) -> None:
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def _write(self, event: dict[str, Any]) -> None:
+        with self.lock:
+            if self.file:
+                self.file.write(json.dumps(event) + ",\n")
+                self.file.flush()
+
+    @contextlib.contextmanager
+    def _span(self, name: str, args: dict[str, Any]) -> Generator[None, None, None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._write(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": start * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": os.getpid(),
+                    "tid": _get_track_id(),
+                    "args": args,
+                }
+            )
+
+    def span(self, name: str, **args: Any) -> contextlib.AbstractContextManager[None]:
+        if not self.file:
+            return contextlib.nullcontext()
+        return self._span(name, args)
+
+
+tracer = Tracer()
+span = tracer.span
+
+
+def format_frame(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def collapse_stack(frame: FrameType | None) -> str:
+    """Format stack from outermost to innermost frame, separated by ";"."""
+    frames: list[str] = []
+    while frame:
+        frames.append(format_frame(frame))
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+@dataclass
+class SamplingProfiler:
+    """
+    Samples stacks of all threads in background thread at fixed interval.
+    Result is in collapsed stacks format that flamegraph.pl and speedscope read.
+    """
+
+    path: str
+    interval: float = 0.005  # In seconds
+
+    samples: Counter[str] = field(default_factory=Counter[str], init=False)
+    _stopping: threading.Event = field(default_factory=threading.Event, init=False)
+    _thread: threading.Thread | None = field(default=None, init=False)
+
+    def _sample(self) -> None:
+        own_ident = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+
+        for ident, frame in sys._current_frames().items():
+            if ident != own_ident:
+                thread_name = names.get(ident, str(ident))
+                self.samples[f"{thread_name};{collapse_stack(frame)}"] += 1
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread:
+            self._thread.join()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
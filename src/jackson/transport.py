@@ -0,0 +1,113 @@
+"""
+Audio transport between client's and server's JACK graphs. Backend decides
+how its processes are started, which local JACK client holds bridge ports
+and what its output says about link health. JackTrip is the default one.
+
+Bridge ports keep `send_N`/`receive_N` naming whatever the backend: that's
+what connection map and server's API speak. Bridge is ready once local bridge
+ports of connection map are registered, see `connector_client`.
+"""
+
+import logging
+import sys
+from dataclasses import dataclass
+from ipaddress import IPv4Address
+from typing import Literal, Protocol
+
+from jackson.jacktrip import JackTripBackend, StreamingProcess
+from jackson.realtime import RealtimePolicy
+
+TransportName = Literal["jacktrip", "stub"]
+
+
+class TransportBackend(Protocol):
+    name: str
+    bridge_client_name: str  # Local JACK client with `send_N`/`receive_N` ports
+
+    def build_server_cmd(
+        self, *, port: int, udp_base_port: int | None = None
+    ) -> list[str]:
+        ...
+
+    def build_client_cmd(
+        self,
+        *,
+        server_host: IPv4Address,
+        server_port: int,
+        receive_channels: int,
+        send_channels: int,
+        remote_name: str,
+        queue_length: int | None,
+        exit_on_timeout: bool = False,
+    ) -> list[str]:
+        ...
+
+    def is_underrun(self, line: str) -> bool:
+        """Whether output line says receive side ran out of packets."""
+        ...
+
+
+@dataclass
+class StubBackend(JackTripBackend):
+    """
+    Speaks JackTrip's command line and registers the same ports but moves no
+    audio (`jackson.stub_transport`). Needs no binary besides Python.
+    """
+
+    name: str = "stub"
+    bridge_client_name: str = "StubBridge"
+    executable: tuple[str, ...] = (sys.executable, "-m", "jackson.stub_transport")
+
+
+def get_transport(name: TransportName) -> TransportBackend:
+    if name == "stub":
+        return StubBackend()
+    return JackTripBackend()
+
+
+def get_server(
+    backend: TransportBackend,
+    *,
+    jack_server_name: str,
+    port: int,
+    log: logging.Logger,
+    realtime: RealtimePolicy | None = None,
+    udp_base_port: int | None = None,
+) -> StreamingProcess:
+    return StreamingProcess(
+        cmd=backend.build_server_cmd(port=port, udp_base_port=udp_base_port),
+        env={"JACK_DEFAULT_SERVER": jack_server_name},
+        log=log,
+        realtime=realtime,
+    )
+
+
+def get_client(
+    backend: TransportBackend,
+    *,
+    jack_server_name: str,
+    server_host: IPv4Address,
+    server_port: int,
+    receive_channels: int,
+    send_channels: int,
+    remote_name: str,
+    queue_length: int | None,
+    log: logging.Logger,
+    realtime: RealtimePolicy | None = None,
+    exit_on_timeout: bool = False,
+) -> StreamingProcess:
+    cmd = backend.build_client_cmd(
+        server_host=server_host,
+        server_port=server_port,
+        receive_channels=receive_channels,
+        send_channels=send_channels,
+        remote_name=remote_name,
+        queue_length=queue_length,
+        exit_on_timeout=exit_on_timeout,
+    )
+    return StreamingProcess(
+        cmd=cmd,
+        env={"JACK_DEFAULT_SERVER": jack_server_name},
+        log=log,
+        realtime=realtime,
+    )
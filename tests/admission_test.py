@@ -0,0 +1,32 @@
+from jackson.admission import AdmissionControl, Overloaded
+
+
+def test_rejects_over_limit():
+    admission = AdmissionControl(max_pending=2)
+
+    assert admission.enter() is None
+    assert admission.enter() is None
+    assert admission.enter() == Overloaded(pending=2, retry_after=1)
+
+    admission.leave(0.01)
+    assert admission.enter() is None
+
+    metrics = admission.metrics()
+    assert metrics.pending == 2
+    assert metrics.peak_pending == 2
+    assert metrics.admitted == 3
+    assert metrics.rejected == 1
+
+
+def test_retry_after_follows_latency():
+    admission = AdmissionControl(max_pending=1, smoothing=0.5)
+
+    admission.enter()
+    admission.leave(2)
+    admission.enter()
+    admission.leave(4)
+    assert admission.metrics().average_latency_ms == 3000
+
+    admission.enter()
+    overloaded = admission.enter()
+    assert overloaded and overloaded.retry_after == 3
@@ -0,0 +1,219 @@
+import json
+import socket
+import threading
+from pathlib import Path
+from typing import Any
+
+import anyio
+import httpx
+import pytest
+
+from jackson import systemd
+from jackson.agent import (
+    AgentClient,
+    AgentError,
+    AgentPortConnector,
+    LazyAgentApp,
+    Methods,
+    execute_batch,
+    serve_agent,
+)
+from jackson.connector_server import (
+    ConnectionRange,
+    ConnectResponse,
+    InitResponse,
+    NotReady,
+    PortConnectorError,
+    PortNotFound,
+)
+from jackson.port_connection import PortName
+
+
+def connect(client_name: str, connections: list[Any]) -> ConnectResponse:
+    if client_name == "missing":
+        name = PortName(client="system", type="playback", idx=1)
+        raise PortConnectorError(PortNotFound(type="destination", name=name))
+    return ConnectResponse(lease_ttl=len(connections))
+
+
+def init(**params: Any) -> InitResponse:
+    return InitResponse(inputs=2, outputs=2, rate=48000, buffer_size=256)
+
+
+def fail() -> None:
+    raise RuntimeError("boom")
+
+
+methods: Methods = {
+    "init": init,
+    "connect": connect,
+    "fail": fail,
+}
+
+
+def test_execute_batch():
+    message = json.dumps(
+        [
+            ["init", {}],
+            ["connect", {"client_name": "missing", "connections": []}],
+            ["fail", {}],
+        ]
+    )
+    init, missing, failed = json.loads(execute_batch(methods, message.encode()))
+
+    assert init == [
+        True,
+        {
+            "inputs": 2,
+            "outputs": 2,
+            "rate": 48000,
+            "buffer_size": 256,
+            "probe_port": None,
+            "jacktrip_port": None,
+        },
+    ]
+    assert missing == [
+        False,
+        {
+            "type": "PortNotFound",
+            "data": {
+                "type": "destination",
+                "name": {"client": "system", "type": "playback", "idx": 1},
+            },
+        },
+    ]
+    assert failed[0] is False
+    assert failed[1]["type"] == "AgentError"
+
+
+@pytest.mark.anyio
+async def test_agent_round_trip(tmp_path: Path):
+    path = str(tmp_path / "agent.sock")
+
+    def run_client():
+        connector = AgentPortConnector(AgentClient(path))
+        assert connector.init().buffer_size == 256
+
+        conn = ConnectionRange.parse_obj(
+            {
+                "source": "system:capture_1..2",
+                "destination": "Lev:send_1..2",
+                "client_should": "send",
+            }
+        )
+        assert connector.connect("Lev", [conn]).lease_ttl == 1
+
+        with pytest.raises(PortConnectorError) as exc_info:
+            connector.connect("missing", [conn])
+        assert isinstance(exc_info.value.data, PortNotFound)
+
+        with pytest.raises(AgentError):
+            connector.agent.call("fail")
+
+        results = connector.agent.call_many([("init", {}), ("init", {})])
+        assert len(results) == 2
+
+    async with anyio.create_task_group() as tg:
+        await tg.start(serve_agent, path, methods)
+        await anyio.to_thread.run_sync(run_client)
+        tg.cancel_scope.cancel()
+
+
+def describe() -> dict[str, Any]:
+    return {
+        "publish_rate": None,
+        "recorder": False,
+        "history_resolutions": None,
+        "mixer": False,
+        "loop_lag": False,
+    }
+
+
+@pytest.mark.anyio
+async def test_lazy_app_is_not_ready_until_agent_is(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    notified: list[str] = []
+
+    def notify(*states: str) -> bool:
+        notified.extend(states)
+        return True
+
+    monkeypatch.setattr(systemd, "notify", notify)
+
+    path = str(tmp_path / "agent.sock")
+    app = LazyAgentApp(AgentClient(path), first_delay=0.01, max_delay=0.01)
+    transport = httpx.ASGITransport(app=app)
+
+    lifespan: list[dict[str, Any]] = [{"type": "lifespan.startup"}]
+    shutdown = anyio.Event()
+    sent: list[str] = []
+
+    async def receive() -> dict[str, Any]:
+        if lifespan:
+            return lifespan.pop()
+        await shutdown.wait()
+        return {"type": "lifespan.shutdown"}
+
+    async def send(message: dict[str, Any]) -> None:
+        sent.append(message["type"])
+
+    async with anyio.create_task_group() as tg, httpx.AsyncClient(
+        transport=transport, base_url="http://api"
+    ) as client:
+        tg.start_soon(app, {"type": "lifespan"}, receive, send)
+        await anyio.sleep(0.05)
+
+        # Serving and ready without agent and without any request
+        assert notified == ["READY=1"]
+        response = await client.get("/init")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert response.json()["detail"]["message"] == "NotReady"
+
+        await tg.start(serve_agent, path, methods | {"describe": describe})
+        with anyio.fail_after(1):
+            while not app.app:
+                await anyio.sleep(0.01)
+        response = await client.get("/init")
+
+        shutdown.set()
+        with anyio.fail_after(1):
+            while "lifespan.shutdown.complete" not in sent:
+                await anyio.sleep(0.01)
+        tg.cancel_scope.cancel()
+
+    assert response.status_code == 200
+    assert response.json()["buffer_size"] == 256
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+
+
+def test_agent_client_is_not_ready_without_agent(tmp_path: Path):
+    with pytest.raises(PortConnectorError) as exc_info:
+        AgentClient(str(tmp_path / "agent.sock")).call("init")
+    assert isinstance(exc_info.value.data, NotReady)
+
+
+def test_agent_client_does_not_replay_after_send(tmp_path: Path):
+    path = str(tmp_path / "agent.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+    requests: list[bytes] = []
+
+    def serve():
+        # Take requests and drop connections without replying
+        while True:
+            conn, _ = listener.accept()
+            with conn, conn.makefile("rb") as reader:
+                if not (line := reader.readline()):
+                    return
+                requests.append(line)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    with pytest.raises(ConnectionResetError):
+        AgentClient(path).call("init")
+    listener.close()
+
+    assert len(requests) == 1
@@ -0,0 +1,101 @@
+from typing import Any
+
+import httpx
+import pytest
+
+from jackson import api_client
+from jackson.admission import Overloaded
+from jackson.api_client import APIClient, Backoff, ServerError, request_with_backoff
+from jackson.api_server import get_app
+from jackson.connector_server import InitResponse, PortConnectorError
+
+
+class FlakyPortConnector:
+    def __init__(self, rejections: int, retry_after: int = 0) -> None:
+        self.rejections = rejections
+        self.retry_after = retry_after
+        self.calls = 0
+
+    def init(self, *args: Any) -> InitResponse:
+        self.calls += 1
+        if self.calls <= self.rejections:
+            data = Overloaded(pending=8, retry_after=self.retry_after)
+            raise PortConnectorError(data)
+        return InitResponse(inputs=2, outputs=2, rate=48000, buffer_size=256)
+
+
+def get_api_client(port_connector: Any, backoff: Backoff) -> APIClient:
+    app = get_app(port_connector)
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://test")
+    return APIClient(client=client, client_name="Lev", backoff=backoff)
+
+
+@pytest.mark.anyio
+async def test_init_retries_when_overloaded():
+    port_connector = FlakyPortConnector(rejections=2)
+    api = get_api_client(port_connector, Backoff(base=0.001, deadline=1))
+
+    response = await api.init(receive_channels=2, send_channels=2)
+
+    assert response.buffer_size == 256
+    assert port_connector.calls == 3
+
+
+@pytest.mark.anyio
+async def test_init_gives_up_at_deadline():
+    # Retry-After alone is past the deadline
+    port_connector = FlakyPortConnector(rejections=10, retry_after=5)
+    api = get_api_client(port_connector, Backoff(base=0.001, deadline=1))
+
+    with pytest.raises(ServerError) as exc_info:
+        await api.init(receive_channels=2, send_channels=2)
+
+    assert exc_info.value.data == Overloaded(pending=8, retry_after=5)
+    assert port_connector.calls == 1
+
+
+@pytest.mark.anyio
+async def test_overloaded_response_has_retry_after():
+    port_connector = FlakyPortConnector(rejections=1, retry_after=3)
+    api = get_api_client(port_connector, Backoff())
+
+    response = await api.client.get("/init")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+
+
+@pytest.mark.anyio
+async def test_request_with_backoff_returns_other_statuses():
+    statuses = [429, 404, 200]
+
+    async def func():
+        return httpx.Response(statuses.pop(0))
+
+    response = await request_with_backoff(func, Backoff(base=0.001, deadline=1))
+
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_request_with_backoff_retries_briefly(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(api_client, "BRIEF_RETRY_DELAY", 0)
+    calls = 0
+
+    async def func():
+        nonlocal calls
+        calls += 1
+        return httpx.Response(404)
+
+    response = await request_with_backoff(
+        func, Backoff(base=0.001, deadline=60), brief_retry_statuses=(404,)
+    )
+
+    assert response.status_code == 404
+    assert calls == api_client.BRIEF_RETRY_ATTEMPTS
+
+
+def test_backoff_delay_is_capped():
+    backoff = Backoff(base=1, cap=4)
+    assert all(0 <= backoff.delay(attempt) <= 4 for attempt in range(20))
@@ -0,0 +1,68 @@
+import pytest
+
+from jackson.bandwidth import (
+    BandwidthBudget,
+    BandwidthExceeded,
+    ClientBandwidth,
+    max_channels,
+    stream_kbps,
+)
+
+
+def test_stream_kbps():
+    # 187.5 packets per second of 256 16-bit samples per channel and headers
+    assert stream_kbps(2, rate=48000, buffer_size=256) == 187.5 * (1024 + 44) * 8 / 1000
+
+
+def test_stream_kbps_sends_at_least_one_channel():
+    assert stream_kbps(0, 48000, 256) == stream_kbps(1, 48000, 256)
+
+
+@pytest.mark.parametrize("channels", [1, 2, 8, 64])
+def test_max_channels_roundtrip(channels: int):
+    kbps = stream_kbps(channels, 48000, 256)
+    assert max_channels(kbps, 48000, 256) == channels
+    assert max_channels(kbps - 1, 48000, 256) == channels - 1
+
+
+def test_max_channels_none_fit():
+    assert max_channels(10, 48000, 256) == 0
+
+
+def reserve(budget: BandwidthBudget, name: str, receive: int, send: int) -> None:
+    result = budget.check(name, receive, send, rate=48000, buffer_size=256)
+    assert isinstance(result, ClientBandwidth)
+    budget.reserve(name, result)
+
+
+def test_check_suggests_channels_that_fit():
+    budget = BandwidthBudget(uplink_kbps=stream_kbps(10, 48000, 256))
+    reserve(budget, "Lev", receive=4, send=2)
+
+    result = budget.check("Nina", 8, 8, rate=48000, buffer_size=256)
+    assert isinstance(result, BandwidthExceeded)
+    assert result.uplink_available_kbps == pytest.approx(
+        stream_kbps(10, 48000, 256) - stream_kbps(4, 48000, 256)
+    )
+    assert result.downlink_available_kbps is None
+    # Each stream carries its own headers
+    assert result.suggested_receive_channels == 5
+    assert result.suggested_send_channels == 8
+
+
+def test_check_excludes_own_usage():
+    budget = BandwidthBudget(uplink_kbps=stream_kbps(4, 48000, 256))
+    reserve(budget, "Lev", receive=4, send=2)
+    reserve(budget, "Lev", receive=4, send=2)
+
+    budget.release("Lev")
+    assert budget.usage().uplink_kbps == 0
+
+
+def test_unlimited_by_default():
+    budget = BandwidthBudget()
+    reserve(budget, "Lev", receive=64, send=64)
+
+    usage = budget.usage()
+    assert usage.uplink_kbps == stream_kbps(64, 48000, 256)
+    assert usage.uplink_budget_kbps is None
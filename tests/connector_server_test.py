@@ -2,15 +2,22 @@ import jack
 import jack_server
 import pytest
 
+from jackson.bandwidth import BandwidthBudget, BandwidthExceeded
 from jackson.connector_server import (
+    ConnectionRange,
+    FailedToConnectPorts,
     PlaybackPortAlreadyHasConnections,
     PortConnectorError,
     PortDirectionType,
     PortNotFound,
     ServerPortConnector,
+    SessionNotFound,
+    group_connections,
     validate_playback_port_is_free,
 )
-from jackson.port_connection import PortName
+from jackson.port_connection import PortName, PortRange
+from jackson.scenes import SceneNotFound
+from jackson.shards import ShardPool
 
 
 @pytest.mark.parametrize("connected", [[], ["system:capture_1"]])
@@ -53,19 +60,216 @@ def test_init(
     assert response.buffer_size == jack_server_.driver.period
 
 
-def test_get_existing_port(server_port_connector: ServerPortConnector):
-    name = "system:playback_1"
-    port = server_port_connector._get_existing_port(
-        type="source", name=PortName.parse(name)
+def test_init_assigns_shard(jack_client: jack.Client):
+    connector = ServerPortConnector(jack_client, shards=ShardPool([4464, 4465]))
+    conn = ConnectionRange(
+        source="system:capture_1",  # type: ignore
+        destination="system:playback_1",  # type: ignore
+        client_should="receive",
+    )
+
+    assert connector.init("Lev", 1, 1).jacktrip_port == 4464
+    assert connector.init("Anton", 1, 1).jacktrip_port == 4465
+    connector.connect("Lev", [conn])
+    assert connector.shards_usage().shards[0].clients == ["Lev"]
+
+    connector.disconnect("Lev")
+    assert not connector.shards_usage().shards[0].clients
+
+
+def test_validate_ports_exist(server_port_connector: ServerPortConnector):
+    server_port_connector._validate_ports_exist(
+        type="source",
+        range=PortRange.parse("system:playback_1..2"),
+        existing={"system:playback_1", "system:playback_2"},
     )
-    assert port.name == name
 
 
 @pytest.mark.parametrize("type", ["source", "destination"])
-def test_get_existing_port_fails(
+def test_validate_ports_exist_fails(
     server_port_connector: ServerPortConnector, type: PortDirectionType
 ):
-    name = PortName.parse("system:send_1")
     with pytest.raises(PortConnectorError) as exc:
-        server_port_connector._get_existing_port(type=type, name=name)
-    assert exc.value.data == PortNotFound(type=type, name=name)
+        server_port_connector._validate_ports_exist(
+            type=type,
+            range=PortRange.parse("system:send_1..2"),
+            existing={"system:send_1"},
+        )
+    assert exc.value.data == PortNotFound(
+        type=type, name=PortName.parse("system:send_2")
+    )
+
+
+def test_connect_and_disconnect(
+    server_port_connector: ServerPortConnector, jack_client: jack.Client
+):
+    conn = ConnectionRange(
+        source="system:capture_1",  # type: ignore
+        destination="system:playback_1",  # type: ignore
+        client_should="receive",
+    )
+    response = server_port_connector.connect("Lev", [conn])
+    assert response.lease_ttl == server_port_connector.leases.ttl
+
+    port = jack_client.get_port_by_name("system:playback_1")
+    assert [p.name for p in jack_client.get_all_connections(port)] == [
+        "system:capture_1"
+    ]
+
+    server_port_connector.disconnect("Lev")
+    assert not jack_client.get_all_connections(port)
+    assert not server_port_connector.leases.leases
+
+
+def test_connect_over_bandwidth_budget(jack_client: jack.Client):
+    # Fits one channel each way at 48 kHz / 256 samples
+    budget = BandwidthBudget(uplink_kbps=900, downlink_kbps=900)
+    connector = ServerPortConnector(jack_client, bandwidth=budget)
+    conns = [
+        ConnectionRange(
+            source=f"system:capture_{idx}",  # type: ignore
+            destination=f"system:playback_{idx}",  # type: ignore
+            client_should="receive",
+        )
+        for idx in (1, 2)
+    ]
+
+    with pytest.raises(PortConnectorError) as exc:
+        connector.connect("Lev", conns)
+    assert isinstance(exc.value.data, BandwidthExceeded)
+    assert exc.value.data.suggested_receive_channels == 1
+    assert not connector.leases.leases
+
+    connector.connect("Lev", conns[:1])
+    assert list(connector.bandwidth_usage().clients) == ["Lev"]
+
+    connector.disconnect("Lev")
+    assert not connector.bandwidth_usage().clients
+
+
+def test_failed_connect_leaves_nothing_behind(
+    jack_client: jack.Client, monkeypatch: pytest.MonkeyPatch
+):
+    connector = ServerPortConnector(jack_client, bandwidth=BandwidthBudget())
+    conns = [
+        ConnectionRange(
+            source=f"system:capture_{idx}",  # type: ignore
+            destination=f"system:playback_{idx}",  # type: ignore
+            client_should="receive",
+        )
+        for idx in (1, 2)
+    ]
+    make_connection = connector._make_connection
+
+    def fail_second(source: str, destination: str, port: str | None = None):
+        if source == "system:capture_2":
+            raise PortConnectorError(
+                FailedToConnectPorts(
+                    source=PortName.parse(source),
+                    destination=PortName.parse(destination),
+                )
+            )
+        make_connection(source, destination, port)
+
+    monkeypatch.setattr(connector, "_make_connection", fail_second)
+
+    with pytest.raises(PortConnectorError):
+        connector.connect("Lev", conns)
+    port = jack_client.get_port_by_name("system:capture_1")
+    assert not jack_client.get_all_connections(port)
+    assert not connector.leases.leases
+    assert not connector.bandwidth_usage().clients
+
+
+def test_heartbeat_fails_without_session(server_port_connector: ServerPortConnector):
+    with pytest.raises(PortConnectorError) as exc:
+        server_port_connector.heartbeat("Lev")
+    assert exc.value.data == SessionNotFound(client_name="Lev")
+
+
+def test_switch_scene(jack_client: jack.Client):
+    connector = ServerPortConnector(
+        jack_client,
+        scenes={
+            "verse": frozenset({("system:capture_1", "system:playback_1")}),
+            "chorus": frozenset(
+                {
+                    ("system:capture_1", "system:playback_2"),
+                    ("system:capture_2", "system:playback_2"),
+                }
+            ),
+        },
+    )
+    playback_1 = jack_client.get_port_by_name("system:playback_1")
+    playback_2 = jack_client.get_port_by_name("system:playback_2")
+
+    response = connector.switch_scene("verse")
+    assert (response.connected, response.disconnected) == (1, 0)
+
+    response = connector.switch_scene("chorus")
+    assert (response.connected, response.disconnected) == (2, 1)
+    assert not jack_client.get_all_connections(playback_1)
+    assert len(jack_client.get_all_connections(playback_2)) == 2
+    assert connector.list_scenes().current == "chorus"
+
+    connector.switch_scene("verse")
+    assert not jack_client.get_all_connections(playback_2)
+    jack_client.disconnect("system:capture_1", "system:playback_1")
+
+
+def test_switch_scene_keeps_session_connections(jack_client: jack.Client):
+    edge = ("system:capture_1", "system:playback_1")
+    connector = ServerPortConnector(
+        jack_client, scenes={"verse": frozenset({edge}), "empty": frozenset()}
+    )
+    jack_client.connect(*edge)
+
+    assert connector.switch_scene("verse").connected == 0
+    connector.switch_scene("empty")
+
+    port = jack_client.get_port_by_name("system:playback_1")
+    assert len(jack_client.get_all_connections(port)) == 1
+    jack_client.disconnect(*edge)
+
+
+def test_switch_scene_not_found(server_port_connector: ServerPortConnector):
+    with pytest.raises(PortConnectorError) as exc:
+        server_port_connector.switch_scene("verse")
+    assert exc.value.data == SceneNotFound(name="verse")
+
+
+def test_group_connections():
+    def conn(src: str, dest: str):
+        return PortName.parse(src), PortName.parse(dest), "send"
+
+    result = group_connections(
+        [
+            conn("Lev:receive_2", "system:playback_12"),
+            conn("Lev:receive_1", "system:playback_11"),
+            conn("Lev:receive_3", "system:playback_15"),
+            conn("Lev:receive_4", "system:playback_16"),
+        ]
+    )
+    assert [r.encode() for r in result] == [
+        {
+            "source": "Lev:receive_1..2",
+            "destination": "system:playback_11..12",
+            "client_should": "send",
+        },
+        {
+            "source": "Lev:receive_3..4",
+            "destination": "system:playback_15..16",
+            "client_should": "send",
+        },
+    ]
+
+
+def test_connection_range_validates_length():
+    with pytest.raises(ValueError):
+        ConnectionRange.parse_obj(
+            {
+                "source": "system:capture_1..2",
+                "destination": "Lev:receive_1",
+                "client_should": "receive",
+            }
+        )
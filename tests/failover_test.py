@@ -0,0 +1,74 @@
+from ipaddress import IPv4Address
+from typing import Any
+
+import httpx
+import pytest
+
+from jackson.api_client import APIClient
+from jackson.api_server import get_app
+from jackson.connector_server import InitResponse
+from jackson.failover import (
+    NoHealthyServer,
+    ProbeResult,
+    ServerCandidate,
+    choose_server,
+    probe_servers,
+)
+
+INIT = InitResponse(inputs=2, outputs=2, rate=48000, buffer_size=256)
+
+
+class HealthyPortConnector:
+    def init(self, *args: Any) -> InitResponse:
+        return INIT
+
+
+def get_candidate(transport: httpx.AsyncBaseTransport, url: str) -> ServerCandidate:
+    client = httpx.AsyncClient(transport=transport, base_url=url)
+    return ServerCandidate(
+        api=APIClient(client=client, client_name="Lev"),
+        host=IPv4Address("127.0.0.1"),
+        jacktrip_port=4464,
+    )
+
+
+def refuse(request: httpx.Request) -> httpx.Response:
+    raise httpx.ConnectError("Connection refused", request=request)
+
+
+@pytest.mark.anyio
+async def test_probe_servers():
+    healthy_app = get_app(HealthyPortConnector())  # type: ignore
+    healthy = get_candidate(httpx.ASGITransport(app=healthy_app), "http://healthy")
+    down = get_candidate(httpx.MockTransport(refuse), "http://down")
+
+    results = await probe_servers([down, healthy], receive_channels=2, send_channels=2)
+
+    assert [r.candidate for r in results] == [down, healthy]
+    assert results[0].init is None and results[0].rtt is None
+    assert "ConnectError" in (results[0].error or "")
+    assert results[1].init == INIT and results[1].rtt is not None
+    assert choose_server(results) is results[1]
+
+
+def get_result(url: str, rtt: float | None) -> ProbeResult:
+    candidate = get_candidate(httpx.MockTransport(refuse), url)
+    if rtt is None:
+        return ProbeResult(candidate, error="ConnectError()")
+    return ProbeResult(candidate, init=INIT, rtt=rtt)
+
+
+def test_choose_server_picks_lowest_rtt():
+    results = [get_result("http://a", 0.05), get_result("http://b", 0.01)]
+    assert choose_server(results) is results[1]
+
+
+def test_choose_server_avoids_lost_server():
+    results = [get_result("http://a", 0.05), get_result("http://b", 0.01)]
+    assert choose_server(results, avoid=results[1].candidate) is results[0]
+    assert choose_server(results[1:], avoid=results[1].candidate) is results[1]
+
+
+def test_choose_server_fails_without_healthy_one():
+    with pytest.raises(NoHealthyServer, match="http://a"):
+        choose_server([get_result("http://a", None)])
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import httpx
+import pytest
+
+from jackson.api_server import get_app
+from jackson.history import MetricsHistory, Ring, read_dump
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ring_aggregates_bucket():
+    ring = Ring(resolution=10, capacity=3)
+    ring.add(100, 1)
+    ring.add(105, 3)
+    ring.add(110, 4)
+
+    assert ring.points(now=110) == [(100, 2, 2.0, 3.0), (110, 1, 4.0, 4.0)]
+
+
+def test_ring_overwrites_oldest_bucket():
+    ring = Ring(resolution=1, capacity=3)
+    for now in range(5):
+        ring.add(now, now)
+
+    assert [p[0] for p in ring.points(now=4)] == [2, 3, 4]
+    assert [p[0] for p in ring.points(now=4, since=3)] == [3, 4]
+    # Nothing recorded lately
+    assert ring.points(now=100) == []
+
+
+def test_history_downsamples():
+    clock = FakeClock()
+    history = MetricsHistory(capacities={1: 60, 10: 6}, clock=clock)
+
+    for idx in range(20):
+        history.record("dsp_load", idx)
+        clock.now += 1
+
+    assert len(history.query("dsp_load", 1).points) == 20
+    assert history.query("dsp_load", 10).points == [
+        (1000, 10, 4.5, 9.0),
+        (1010, 10, 14.5, 19.0),
+    ]
+    assert history.query("xruns", 10).points == []
+
+
+def test_dump_and_read(tmp_path: Path):
+    history = MetricsHistory(capacities={1: 60, 10: 6}, clock=FakeClock())
+    history.record("xruns", 150)
+    history.record("xruns", 50)
+    path = str(tmp_path / "history.json.gz")
+
+    history.dump(path)
+
+    dumped = {(r.series, r.resolution): r.points for r in read_dump(path)}
+    assert len(dumped) == 8
+    assert dumped[("xruns", 10)] == [(1000, 2, 100.0, 150.0)]
+    assert dumped[("dsp_load", 1)] == []
+
+
+@pytest.mark.anyio
+async def test_history_route():
+    history = MetricsHistory(capacities={1: 60}, clock=FakeClock())
+    history.record("connect_latency_ms", 12)
+    app = get_app(port_connector=None, history=history)  # type: ignore
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        response = await c.get("/history/connect_latency_ms")
+        assert response.json()["points"] == [[1000, 1, 12.0, 12.0]]
+
+        response = await c.get("/history/connect_latency_ms?resolution=10")
+        assert response.status_code == 422
+
+        response = await c.get("/history/cpu")
+        assert response.status_code == 422
@@ -0,0 +1,117 @@
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any, cast
+
+import anyio
+import jack
+import pytest
+
+from jackson.jack_events import (
+    ClientRegistered,
+    JackEvents,
+    PortRegistered,
+    PortsConnected,
+    XRun,
+)
+
+
+@dataclass
+class Port:
+    name: str
+
+
+@dataclass
+class FakeClient:
+    """Calls back from its own thread, like JACK's notification thread."""
+
+    ports: list[Port] = field(default_factory=list[Port])
+    callbacks: dict[str, Callable[..., None]] = field(
+        default_factory=dict[str, Callable[..., None]]
+    )
+
+    def set_client_registration_callback(self, cb: Callable[..., None]) -> None:
+        self.callbacks["client"] = cb
+
+    def set_port_registration_callback(self, cb: Callable[..., None]) -> None:
+        self.callbacks["port"] = cb
+
+    def set_port_connect_callback(self, cb: Callable[..., None]) -> None:
+        self.callbacks["connect"] = cb
+
+    def set_xrun_callback(self, cb: Callable[..., None]) -> None:
+        self.callbacks["xrun"] = cb
+
+    def get_ports(self) -> list[Port]:
+        return self.ports
+
+    def notify(self, *calls: tuple[str, tuple[Any, ...]]) -> None:
+        def run():
+            for name, args in calls:
+                self.callbacks[name](*args)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+
+
+def get_events(client: FakeClient) -> JackEvents:
+    events = JackEvents(cast(jack.Client, client))
+    events.install()
+    return events
+
+
+@pytest.mark.anyio
+async def test_subscribe_delivers_events_in_order():
+    client = FakeClient()
+    events = get_events(client)
+
+    with events.subscribe() as stream:
+        client.notify(
+            ("client", ("JackTrip", True)),
+            ("port", (Port("JackTrip:send_1"), True)),
+            ("connect", (Port("a:b_1"), Port("c:d_1"), False)),
+            ("xrun", (42.0,)),
+        )
+        received = [await stream.receive() for _ in range(4)]
+
+    assert received == [
+        ClientRegistered("JackTrip", True),
+        PortRegistered("JackTrip:send_1", True),
+        PortsConnected("a:b_1", "c:d_1", False),
+        XRun(42.0),
+    ]
+
+
+@pytest.mark.anyio
+async def test_wait_ports():
+    client = FakeClient(ports=[Port("JackTrip:send_1")])
+    events = get_events(client)
+    done = anyio.Event()
+
+    async def wait():
+        await events.wait_ports({"JackTrip:send_1", "JackTrip:send_2"})
+        done.set()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(wait)
+        await anyio.sleep(0.01)
+
+        client.notify(("port", (Port("JackTrip:receive_1"), True)))
+        await anyio.sleep(0.01)
+        assert not done.is_set()
+
+        client.notify(("port", (Port("JackTrip:send_2"), True)))
+        with anyio.fail_after(1):
+            await done.wait()
+
+    assert not events._waiters
+
+
+@pytest.mark.anyio
+async def test_wait_ports_already_exist():
+    client = FakeClient(ports=[Port("JackTrip:send_1")])
+    events = get_events(client)
+
+    with anyio.fail_after(1):
+        await events.wait_ports(["JackTrip:send_1"])
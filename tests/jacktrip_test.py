@@ -0,0 +1,42 @@
+import logging
+
+import anyio
+import pytest
+
+from jackson.jacktrip import UNDERRUN_PATTERN, ProcessExited, StreamingProcess
+
+
+@pytest.mark.anyio
+async def test_stop_kills_process_that_ignores_sigterm():
+    # Ignored signals survive exec
+    cmd = ["sh", "-c", "trap '' TERM; exec sleep 30"]
+    process = StreamingProcess(
+        cmd=cmd, env={}, log=logging.getLogger(__name__), kill_timeout=0.1
+    )
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(process.start)
+        await anyio.sleep(0.2)
+
+        with anyio.fail_after(2):
+            await process.stop()
+        tg.cancel_scope.cancel()
+
+    assert process.process
+    assert process.process.returncode == -9
+
+
+@pytest.mark.anyio
+async def test_on_output_gets_stderr_lines():
+    lines: list[str] = []
+    cmd = ["sh", "-c", "echo 'UDP waiting too long' >&2; echo done >&2"]
+    process = StreamingProcess(
+        cmd=cmd, env={}, log=logging.getLogger(__name__), on_output=lines.append
+    )
+
+    with pytest.raises(ProcessExited) as exc_info, anyio.fail_after(2):
+        await process.start()
+
+    assert exc_info.value.returncode == 0
+    assert lines == ["UDP waiting too long", "done"]
+    assert UNDERRUN_PATTERN.search(lines[0])
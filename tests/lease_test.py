@@ -0,0 +1,46 @@
+from jackson.lease import LeaseRegistry
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_acquire_creates_and_renews_lease():
+    clock = FakeClock()
+    registry = LeaseRegistry(ttl=10, clock=clock)
+
+    lease = registry.acquire("Lev")
+    assert lease.expires_at == 10
+
+    clock.now = 5
+    assert registry.acquire("Lev") is lease
+    assert lease.expires_at == 15
+
+
+def test_renew_fails_for_expired_lease():
+    clock = FakeClock()
+    registry = LeaseRegistry(ttl=10, clock=clock)
+    registry.acquire("Lev")
+
+    clock.now = 10
+    assert registry.renew("Lev") is None
+    assert registry.renew("Lev2") is None
+
+
+def test_release_expired():
+    clock = FakeClock()
+    registry = LeaseRegistry(ttl=10, clock=clock)
+    registry.acquire("Lev").edges.add(("system:capture_1", "Lev:receive_1"))
+
+    clock.now = 5
+    registry.acquire("Lev2")
+
+    clock.now = 12
+    (expired,) = registry.release_expired()
+    assert expired.client_name == "Lev"
+    assert expired.edges == {("system:capture_1", "Lev:receive_1")}
+    assert list(registry.leases) == ["Lev2"]
@@ -0,0 +1,142 @@
+import anyio
+import pytest
+
+from jackson.lifecycle import Component, Lifecycle, Step
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.events: list[str] = []
+
+    def step(self, event: str, delay: float = 0) -> Step:
+        async def func() -> None:
+            self.events.append(f"{event} begin")
+            await anyio.sleep(delay)
+            self.events.append(f"{event} end")
+
+        return func
+
+    def component(self, name: str, *depends_on: str, delay: float = 0) -> Component:
+        return Component(
+            name,
+            start=self.step(f"start {name}", delay),
+            stop=self.step(f"stop {name}", delay),
+            depends_on=depends_on,
+        )
+
+
+@pytest.mark.anyio
+async def test_start_and_stop_follow_dependencies():
+    rec = Recorder()
+    lifecycle = Lifecycle(
+        "test",
+        [
+            rec.component("api", "jack_server"),
+            rec.component("jack_server"),
+        ],
+    )
+
+    await lifecycle.start()
+    await lifecycle.stop()
+
+    assert rec.events == [
+        "start jack_server begin",
+        "start jack_server end",
+        "start api begin",
+        "start api end",
+        "stop api begin",
+        "stop api end",
+        "stop jack_server begin",
+        "stop jack_server end",
+    ]
+    assert all(
+        t.start is not None and t.stop is not None for t in lifecycle.timings.values()
+    )
+
+
+@pytest.mark.anyio
+async def test_independent_components_run_concurrently():
+    rec = Recorder()
+    lifecycle = Lifecycle(
+        "test",
+        [
+            rec.component("jack_server"),
+            rec.component("jacktrip", "jack_server", delay=0.01),
+            rec.component("meter", "jack_server", delay=0.01),
+        ],
+    )
+
+    await lifecycle.start()
+    assert rec.events[2:4] == ["start jacktrip begin", "start meter begin"]
+
+    rec.events.clear()
+    await lifecycle.stop()
+    assert rec.events[:2] == ["stop jacktrip begin", "stop meter begin"]
+    assert rec.events[-2:] == ["stop jack_server begin", "stop jack_server end"]
+
+
+@pytest.mark.anyio
+async def test_stop_abandons_wedged_component():
+    rec = Recorder()
+    wedged = Component(
+        "jacktrip",
+        stop=anyio.sleep_forever,
+        depends_on=("jack_server",),
+        stop_timeout=0.01,
+    )
+    lifecycle = Lifecycle("test", [rec.component("jack_server"), wedged])
+    await lifecycle.start()
+
+    with anyio.fail_after(1):
+        await lifecycle.stop()
+
+    assert lifecycle.timings["jacktrip"].stop is None
+    assert rec.events[-1] == "stop jack_server end"
+
+
+@pytest.mark.anyio
+async def test_stop_continues_after_failed_component():
+    async def fail() -> None:
+        raise RuntimeError
+
+    rec = Recorder()
+    failing = Component("jacktrip", stop=fail, depends_on=("jack_server",))
+    lifecycle = Lifecycle("test", [rec.component("jack_server"), failing])
+    await lifecycle.start()
+    await lifecycle.stop()
+
+    assert rec.events[-1] == "stop jack_server end"
+
+
+@pytest.mark.anyio
+async def test_stop_skips_components_that_never_started():
+    async def fail() -> None:
+        raise RuntimeError
+
+    rec = Recorder()
+    lifecycle = Lifecycle(
+        "test",
+        [
+            Component("jack_server", start=fail),
+            rec.component("api", "jack_server"),
+        ],
+    )
+
+    with pytest.raises(RuntimeError):
+        await lifecycle.start()
+    await lifecycle.stop()
+
+    assert rec.events == []
+
+
+@pytest.mark.parametrize(
+    "components",
+    (
+        [Component("a", depends_on=("b",))],
+        [Component("a", depends_on=("b",)), Component("b", depends_on=("a",))],
+        [Component("a"), Component("a")],
+    ),
+)
+def test_invalid_graph(components: list[Component]):
+    with pytest.raises(ValueError):
+        Lifecycle("test", components)
@@ -0,0 +1,38 @@
+import logging
+
+from rich.text import Text
+
+from jackson.logging import (
+    _ConsoleFormatter,
+    _RichMarkupStripper,
+    _SessionNameFilter,
+    session_name,
+)
+
+
+def get_record(msg: str, session: str | None) -> logging.LogRecord:
+    record = logging.LogRecord("Session", logging.INFO, __file__, 1, msg, None, None)
+    token = session_name.set(session)
+    try:
+        _SessionNameFilter().filter(record)
+    finally:
+        session_name.reset(token)
+    return record
+
+
+def test_file_log_has_plain_session_name():
+    record = get_record("Connected to [bold]server[/bold]", "Lev")
+    formatted = _RichMarkupStripper(fmt="%(message)s").format(record)
+    assert formatted == "[Lev] Connected to server"
+
+
+def test_console_log_escapes_session_name():
+    # Lowercase name in brackets would be taken for a style tag
+    record = get_record("Connected", "lev")
+    formatted = _ConsoleFormatter().format(record)
+    assert Text.from_markup(formatted).plain == "[lev] Connected"
+
+
+def test_log_without_session():
+    record = get_record("Connected", None)
+    assert _RichMarkupStripper(fmt="%(message)s").format(record) == "Connected"
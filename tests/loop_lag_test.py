@@ -0,0 +1,44 @@
+import logging
+import sys
+import time
+
+import anyio
+import pytest
+
+from jackson.loop_lag import LAG_BUCKETS, LoopLagMonitor, get_call_site
+
+
+def test_record_fills_histogram():
+    monitor = LoopLagMonitor()
+    monitor.record(0)
+    monitor.record(0.003)
+    monitor.record(5)
+
+    histogram = monitor.histogram()
+    assert histogram.counts[0] == histogram.counts[2] == histogram.counts[-1] == 1
+    assert len(histogram.counts) == len(LAG_BUCKETS) + 1
+    assert histogram.samples == 3
+    assert histogram.max_ms == 5000
+
+
+def test_get_call_site():
+    assert get_call_site(None) == "unknown"
+    assert get_call_site(sys._getframe()).startswith("test_get_call_site")
+
+
+@pytest.mark.anyio
+async def test_logs_stall_with_call_site(caplog: pytest.LogCaptureFixture):
+    monitor = LoopLagMonitor(
+        interval=0.005, stall_threshold=0.05, log=logging.getLogger("test")
+    )
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(monitor.run)
+        await anyio.sleep(0.02)
+        time.sleep(0.3)  # Blocks the loop
+        await anyio.sleep(0.02)
+        tg.cancel_scope.cancel()
+
+    assert monitor.stalls == 1
+    assert monitor.max_lag >= 0.25
+    assert "test_logs_stall_with_call_site" in caplog.text
@@ -0,0 +1,254 @@
+from dataclasses import dataclass, field, replace
+from ipaddress import IPv4Address
+from typing import Any, cast
+
+import anyio
+import httpx
+import jack_server
+import pytest
+from anyio.abc import TaskGroup
+
+from jackson import manager
+from jackson.api_client import APIClient, ServerError
+from jackson.connector_server import ConnectResponse, SessionNotFound
+from jackson.failover import ServerCandidate, ServerLost
+from jackson.jacktrip import ProcessExited
+from jackson.lifecycle import Component, Lifecycle
+from jackson.logging import session_name
+from jackson.manager import run_sessions
+
+
+class FakeManager:
+    def __init__(self, fail_after: float | None = None, failures: int = 1) -> None:
+        self.fail_after = fail_after
+        self.failures = failures
+        self.session_name: str | None = None
+        self.stopped = False
+
+    async def _fail(self) -> None:
+        assert self.fail_after is not None
+        await anyio.sleep(self.fail_after)
+        raise ProcessExited(["jacktrip"], 2)
+
+    async def start(self, tg: TaskGroup) -> None:
+        self.session_name = session_name.get()
+        if self.fail_after is not None:
+            for _ in range(self.failures):
+                tg.start_soon(self._fail)
+
+    async def stop(self) -> None:
+        self.stopped = True
+
+
+@pytest.mark.anyio
+async def test_run_sessions_isolates_failures():
+    failing, healthy = FakeManager(fail_after=0), FakeManager()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(run_sessions, {"Lev": failing, "Nina": healthy})
+        await anyio.sleep(0.1)
+
+        assert failing.stopped
+        assert not healthy.stopped
+        tg.cancel_scope.cancel()
+
+    assert healthy.stopped
+    assert (failing.session_name, healthy.session_name) == ("Lev", "Nina")
+
+
+@pytest.mark.anyio
+async def test_run_sessions_isolates_session_with_several_failures():
+    failing, healthy = FakeManager(fail_after=0, failures=2), FakeManager()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(run_sessions, {"Lev": failing, "Nina": healthy})
+        await anyio.sleep(0.1)
+
+        assert failing.stopped
+        assert not healthy.stopped
+        tg.cancel_scope.cancel()
+
+
+@pytest.mark.anyio
+async def test_run_sessions_exits_when_all_failed():
+    manager = FakeManager(fail_after=0)
+
+    with pytest.raises(SystemExit), anyio.fail_after(1):
+        await run_sessions({"Lev": manager})
+
+    assert manager.stopped
+    assert manager.session_name is None
+
+
+@dataclass
+class FakeDriver:
+    rate: int = 48000
+    period: int = 256
+
+
+@dataclass
+class FakeJackServer:
+    name: str = "JacksonServer"
+    driver: FakeDriver = field(default_factory=FakeDriver)
+
+
+def set_running_server(
+    monkeypatch: pytest.MonkeyPatch, params: tuple[int, int] | None
+) -> None:
+    def get(server_name: str) -> tuple[int, int] | None:
+        return params
+
+    monkeypatch.setattr(manager, "get_running_jack_server_params", get)
+
+
+@pytest.mark.parametrize(("running", "attached"), [(None, False), ((48000, 256), True)])
+def test_try_attach_jack_server(
+    monkeypatch: pytest.MonkeyPatch, running: tuple[int, int] | None, attached: bool
+):
+    set_running_server(monkeypatch, running)
+    server = cast(jack_server.Server, FakeJackServer())
+    assert manager.try_attach_jack_server(server) is attached
+
+
+def test_try_attach_jack_server_fails_on_mismatch(monkeypatch: pytest.MonkeyPatch):
+    set_running_server(monkeypatch, (44100, 256))
+    server = cast(jack_server.Server, FakeJackServer())
+    with pytest.raises(RuntimeError, match="rate 44100"):
+        manager.try_attach_jack_server(server)
+
+
+def get_failing_over_client(
+    monkeypatch: pytest.MonkeyPatch, server_count: int
+) -> manager.Client:
+    servers = [
+        ServerCandidate(
+            api=APIClient(
+                client=httpx.AsyncClient(base_url=f"http://server{idx}"),
+                client_name="Lev",
+            ),
+            host=IPv4Address("127.0.0.1"),
+            jacktrip_port=4464,
+        )
+        for idx in range(server_count)
+    ]
+    client = manager.Client(
+        servers=servers,
+        connection_map={},
+        get_jack_server=cast(Any, None),
+        get_jacktrip=cast(Any, None),
+    )
+    rounds: list[int] = []
+
+    async def lose() -> None:
+        raise ServerLost("No heartbeat for 10.0 s")
+
+    def get_components(tg: TaskGroup) -> list[Component]:
+        # First server is lost right after start, second one connects
+        async def start() -> None:
+            client.server = servers[len(rounds) % server_count]
+            rounds.append(len(rounds))
+            if len(rounds) == 1:
+                tg.start_soon(lose)
+            elif client.connected:
+                client.connected.set()
+
+        return [Component("session", start=start)]
+
+    monkeypatch.setattr(client, "_get_components", get_components)
+    return client
+
+
+@pytest.mark.anyio
+async def test_client_fails_over_to_another_server(monkeypatch: pytest.MonkeyPatch):
+    client = get_failing_over_client(monkeypatch, server_count=2)
+
+    async with anyio.create_task_group() as tg:
+        await client.start(tg)
+        with anyio.fail_after(1):
+            while not client.failovers:
+                await anyio.sleep(0.01)
+        tg.cancel_scope.cancel()
+    await client.stop()
+
+    failover = client.failovers[0]
+    assert (failover.lost, failover.chosen) == (client.servers[0], client.servers[1])
+    assert "No heartbeat" in failover.reason
+    assert failover.duration >= 0
+
+
+@pytest.mark.anyio
+async def test_client_without_candidates_fails_when_server_is_lost(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    client = get_failing_over_client(monkeypatch, server_count=1)
+
+    with pytest.raises(ServerLost):
+        async with anyio.create_task_group() as tg:
+            await client.start(tg)
+    await client.stop()
+    assert not client.failovers
+
+
+class FlakyAPI:
+    """Session is gone on the server, first reconnect fails."""
+
+    def __init__(self) -> None:
+        self.connects = 0
+
+    async def heartbeat(self) -> None:
+        raise ServerError("SessionNotFound", SessionNotFound(client_name="Lev"))
+
+    async def connect(self, connection_map: Any) -> ConnectResponse:
+        self.connects += 1
+        if self.connects == 1:
+            raise httpx.ConnectError("Connection refused")
+        return ConnectResponse(lease_ttl=0.03)
+
+
+@pytest.mark.anyio
+async def test_keep_session_alive_survives_failed_reconnect():
+    api = FlakyAPI()
+    client = manager.Client(
+        servers=[
+            ServerCandidate(
+                api=cast(APIClient, api),
+                host=IPv4Address("127.0.0.1"),
+                jacktrip_port=4464,
+            )
+        ],
+        connection_map={},
+        get_jack_server=cast(Any, None),
+        get_jacktrip=cast(Any, None),
+    )
+    client.server = client.servers[0]
+
+    with anyio.move_on_after(0.1):
+        await client._keep_session_alive(lease_ttl=0.03)
+
+    assert api.connects > 1
+
+
+@pytest.mark.anyio
+async def test_client_stops_session_before_jacktrip(monkeypatch: pytest.MonkeyPatch):
+    client = get_failing_over_client(monkeypatch, server_count=1)
+    events: list[str] = []
+
+    def record(event: str):
+        async def step() -> None:
+            events.append(event)
+            await anyio.sleep(0.01)
+
+        return step
+
+    async with anyio.create_task_group() as tg:
+        components = [
+            replace(c, start=record(f"start {c.name}"), stop=record(f"stop {c.name}"))
+            # Real dependency graph, not the one patched in by the helper
+            for c in manager.Client._get_components(client, tg)
+        ]
+    lifecycle = Lifecycle("client", components)
+    await lifecycle.start()
+    await lifecycle.stop()
+
+    assert events.index("start jacktrip") < events.index("start session")
+    assert events.index("stop session") < events.index("stop jacktrip")
@@ -0,0 +1,56 @@
+from typing import Any
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from jackson.api_server import get_app
+from jackson.metering import MIN_DB, LevelRing, _to_db
+from jackson.tap import is_bridge_receive_port, is_capture_port
+
+
+def test_level_ring_read_aggregates_last_blocks():
+    ring = LevelRing(slots=3, channels=2)
+
+    for peak, mean_square in ((0.5, 0.25), (1.0, 0.04), (0.1, 0.01), (0.2, 0.09)):
+        slot = ring.next_slot()
+        slot[0] = peak
+        slot[1] = mean_square
+        ring.commit()
+
+    peak, rms = ring.read(2)
+    assert np.allclose(peak, [0.2, 0.2])
+    assert np.allclose(rms, [np.sqrt(0.05), np.sqrt(0.05)])
+
+
+def test_level_ring_read_empty():
+    peak, rms = LevelRing(slots=3, channels=2).read(10)
+    assert not peak.any()
+    assert not rms.any()
+
+
+def test_to_db():
+    assert _to_db(np.array([1, 0], dtype=np.float32)) == [0, MIN_DB]
+
+
+def test_tap_filters():
+    assert is_capture_port("system:capture_1")
+    assert not is_capture_port("system:playback_1")
+    assert is_bridge_receive_port("Lev:receive_12")
+    assert is_bridge_receive_port("JackTrip:receive_1")
+    assert not is_bridge_receive_port("Mixer:out_1")
+    assert not is_bridge_receive_port("Lev:receive_1_monitor")
+
+
+class FakeMeter:
+    publish_rate = 100
+
+    def levels(self) -> list[Any]:
+        return [{"port": "system:capture_1", "peak_db": MIN_DB, "rms_db": MIN_DB}]
+
+
+def test_levels_stream_ends_cleanly_on_disconnect():
+    app = get_app(port_connector=None, meter=FakeMeter())  # type: ignore
+
+    with TestClient(app) as client:
+        with client.websocket_connect("/levels/stream") as websocket:
+            assert websocket.receive_json()[0]["port"] == "system:capture_1"
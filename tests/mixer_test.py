@@ -0,0 +1,113 @@
+import jack
+import numpy as np
+import pytest
+
+from jackson.connector_server import (
+    ConnectionRange,
+    MixerChannelNotFound,
+    PortConnectorError,
+    ServerPortConnector,
+)
+from jackson.metering import MIN_DB
+from jackson.mixer import MixMatrix, db_to_gain, gain_to_db, get_mixer, smoothing_factor
+
+
+def process(matrix: MixMatrix, block_in: np.ndarray, smoothing: float = 1):
+    block_out = np.zeros((matrix.outputs, block_in.shape[1]), dtype=np.float32)
+    matrix.process(block_in, block_out, smoothing)
+    return block_out
+
+
+def test_mix_matrix_sums_inputs():
+    matrix = MixMatrix(inputs=3, outputs=2)
+    matrix.set_gain(0, 0, 1)
+    matrix.set_gain(0, 1, 0.5)
+    matrix.set_gain(1, 2, 2)
+    block_in = np.array([[1, 1], [2, 2], [3, 3]], dtype=np.float32)
+
+    assert np.allclose(process(matrix, block_in), [[2, 2], [6, 6]])
+
+
+def test_mix_matrix_mute_keeps_gain():
+    matrix = MixMatrix(inputs=1, outputs=1)
+    matrix.set_gain(0, 0, 0.5)
+    block_in = np.ones((1, 4), dtype=np.float32)
+
+    matrix.set_muted(0, True)
+    assert not process(matrix, block_in).any()
+    assert matrix.gain(0, 0) == 0.5
+
+    matrix.set_muted(0, False)
+    assert np.allclose(process(matrix, block_in), 0.5)
+
+
+def test_mix_matrix_glides_to_target():
+    matrix = MixMatrix(inputs=1, outputs=1)
+    matrix.set_gain(0, 0, 1)
+    block_in = np.ones((1, 4), dtype=np.float32)
+
+    assert np.allclose(process(matrix, block_in, smoothing=0.5), 0.5)
+    assert np.allclose(process(matrix, block_in, smoothing=0.5), 0.75)
+
+
+def test_mix_matrix_publishes_new_target():
+    matrix = MixMatrix(inputs=2, outputs=2)
+    target = matrix.target
+    matrix.set_gain(1, 0, 1)
+
+    assert matrix.target is not target
+    assert not target.any()
+    assert matrix.target[1, 0] == 1
+
+
+def test_mix_matrix_clear_input():
+    matrix = MixMatrix(inputs=2, outputs=2)
+    matrix.set_gain(0, 1, 1)
+    matrix.set_gain(1, 1, 1)
+    matrix.set_muted(1, True)
+
+    matrix.clear_input(1)
+    assert not matrix.target.any()
+    assert not matrix.is_muted(1)
+
+
+def test_db_conversion():
+    assert db_to_gain(0) == 1
+    assert db_to_gain(MIN_DB) == 0
+    assert gain_to_db(0) == MIN_DB
+    assert gain_to_db(db_to_gain(-6)) == pytest.approx(-6)
+
+
+def test_smoothing_factor():
+    assert smoothing_factor(64, 48000, 0) == 1
+    assert 0 < smoothing_factor(64, 48000, 0.02) < smoothing_factor(256, 48000, 0.02)
+
+
+def test_connect_shares_mixed_playback_port(jack_client: jack.Client):
+    mixer = get_mixer("default", inputs=4, outputs=1, smoothing_time=0)
+    connector = ServerPortConnector(jack_client, mixer=mixer)
+
+    def conn(idx: int):
+        return ConnectionRange(
+            source=f"system:capture_{idx}",  # type: ignore
+            destination="system:playback_1",  # type: ignore
+            client_should="send",
+        )
+
+    connector.connect("Lev", [conn(1)])
+    connector.connect("Anton", [conn(2)])
+    state = mixer.set_gain("system:capture_2", "system:playback_1", -6)
+    assert [(c.source, c.client_name) for c in state.channels] == [
+        ("system:capture_1", "Lev"),
+        ("system:capture_2", "Anton"),
+    ]
+    assert state.channels[1].gains["system:playback_1"] == pytest.approx(-6)
+
+    connector.disconnect("Anton")
+    assert [c.source for c in mixer.state().channels] == ["system:capture_1"]
+    with pytest.raises(PortConnectorError) as exc:
+        mixer.set_muted("system:capture_2", True)
+    assert exc.value.data == MixerChannelNotFound(source="system:capture_2")
+
+    mixer.client.deactivate()
+    mixer.client.close()
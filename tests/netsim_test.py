@@ -0,0 +1,118 @@
+import random
+import socket
+from ipaddress import IPv4Address
+
+import anyio
+import pytest
+from anyio.abc import SocketAttribute, SocketStream, TaskGroup
+from anyio.streams.buffered import BufferedByteReceiveStream
+
+from jackson.netsim import _UDP_PORT, Link, LinkProfile, Netsim, NetsimProfile
+
+
+def get_link(**kwargs: float) -> Link:
+    return Link(LinkProfile(**kwargs), random.Random(1))
+
+
+def test_link_adds_latency():
+    link = get_link(latency_ms=20)
+    assert link.schedule(1, 100) == pytest.approx(1.02)
+
+
+def test_link_loses_packets():
+    link = get_link(loss=0.5)
+    delivered = [link.schedule(0, 100) for _ in range(1000)]
+    assert 400 < delivered.count(None) < 600
+    assert link.stats.lost == delivered.count(None)
+
+
+def test_link_keeps_order_with_jitter():
+    link = get_link(latency_ms=10, jitter_ms=5)
+    times = [link.schedule(idx * 0.001, 100) for idx in range(100)]
+    assert times == sorted(times)  # pyright: ignore
+
+
+def test_link_reorders():
+    link = get_link(reorder=0.1, reorder_gap_ms=5)
+    times = [link.schedule(idx * 0.001, 100) for idx in range(100)]
+    assert times != sorted(times)  # pyright: ignore
+    assert link.stats.reordered > 0
+
+
+def test_link_caps_bandwidth():
+    # 1000 bytes take 8 ms at 1000 kbps, queue holds 2 of them
+    link = get_link(bandwidth_kbps=1000, queue_ms=16)
+    times = [link.schedule(0, 1000) for _ in range(4)]
+    assert times[:3] == pytest.approx([0.008, 0.016, 0.024])
+    assert times[3] is None
+    assert link.stats.queue_drops == 1
+
+
+def test_same_seed_gives_same_impairments():
+    profile = NetsimProfile(upstream=LinkProfile(jitter_ms=5, loss=0.1), seed=7)
+
+    def run() -> list[float | None]:
+        proxy = Netsim(profile, server_host=IPv4Address("127.0.0.1"), server_port=0)
+        return [proxy.upstream.schedule(idx * 0.001, 100) for idx in range(100)]
+
+    assert run() == run()
+
+
+async def serve_fake_hub(tg: TaskGroup) -> tuple[int, list[int]]:
+    """Answers handshake with UDP port of an echo socket, records client ports."""
+    udp = await anyio.create_udp_socket(
+        family=socket.AF_INET, local_host="127.0.0.1", local_port=0
+    )
+    listener = await anyio.create_tcp_listener(local_host="127.0.0.1", local_port=0)
+    announced: list[int] = []
+
+    async def handle(stream: SocketStream) -> None:
+        buffered = BufferedByteReceiveStream(stream)
+        announced.append(_UDP_PORT.unpack(await buffered.receive_exactly(4))[0])
+        await stream.send(_UDP_PORT.pack(udp.extra(SocketAttribute.local_port)))
+
+    async def echo() -> None:
+        async for packet, (host, port) in udp:
+            await udp.sendto(packet, host, port)
+
+    tg.start_soon(listener.serve, handle)
+    tg.start_soon(echo)
+    return listener.extra(SocketAttribute.local_port), announced
+
+
+@pytest.mark.anyio
+async def test_relays_handshake_and_audio():
+    async with anyio.create_task_group() as tg:
+        hub_port, announced = await serve_fake_hub(tg)
+        proxy = Netsim(
+            NetsimProfile(upstream=LinkProfile(latency_ms=5)),
+            server_host=IPv4Address("127.0.0.1"),
+            server_port=hub_port,
+            listen_host="127.0.0.1",
+            listen_port=0,
+        )
+        listener = await anyio.create_tcp_listener(local_host="127.0.0.1", local_port=0)
+        tg.start_soon(listener.serve, proxy._handle_client)
+
+        client_udp = await anyio.create_udp_socket(
+            family=socket.AF_INET, local_host="127.0.0.1", local_port=0
+        )
+        with anyio.fail_after(2):
+            async with await anyio.connect_tcp(
+                "127.0.0.1", listener.extra(SocketAttribute.local_port)
+            ) as tcp:
+                await tcp.send(
+                    _UDP_PORT.pack(client_udp.extra(SocketAttribute.local_port))
+                )
+                reply = await BufferedByteReceiveStream(tcp).receive_exactly(4)
+
+            (proxy_port,) = _UDP_PORT.unpack(reply)
+            await client_udp.sendto(b"audio", "127.0.0.1", proxy_port)
+            packet, _ = await client_udp.receive()
+
+        assert packet == b"audio"
+        assert announced and announced[0] != client_udp.extra(
+            SocketAttribute.local_port
+        )
+        assert proxy.upstream.stats.forwarded == proxy.downstream.stats.forwarded == 1
+        tg.cancel_scope.cancel()
@@ -4,10 +4,13 @@ from jackson.port_connection import (
     ClientShould,
     PortConnection,
     PortName,
+    PortRange,
     _build_connection,
     _build_specific_connections,
     _validate_bridge_limit,
     build_connection_map,
+    expand_port_ranges,
+    parse_idx_range,
 )
 
 
@@ -53,6 +56,47 @@ def test_port_name_parse_fails():
         PortName.parse("my_app:playback_1_2")
 
 
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("system:capture_1..4", PortRange("system", "capture", 1, 4)),
+        ("my:app:send_3", PortRange("my:app", "send", 3, 3)),
+    ],
+)
+def test_port_range_parse(value: str, expected: PortRange):
+    result = PortRange.parse(value)
+    assert result == expected
+    assert str(result) == value
+
+
+@pytest.mark.parametrize(
+    "value", ["system:capture_4..1", "system:capture", "system:foo_1"]
+)
+def test_port_range_parse_fails(value: str):
+    with pytest.raises(ValueError):
+        PortRange.parse(value)
+
+
+def test_port_range_names():
+    names = list(PortRange.parse("Lev:send_2..3").names())
+    assert names == ["Lev:send_2", "Lev:send_3"]
+
+
+def test_parse_idx_range():
+    assert parse_idx_range(3) == range(3, 4)
+    assert parse_idx_range("3") == range(3, 4)
+    assert parse_idx_range("1..3") == range(1, 4)
+
+
+def test_expand_port_ranges():
+    assert expand_port_ranges({"1..2": "11..12", 5: 15}) == {1: 11, 2: 12, 5: 15}
+
+
+def test_expand_port_ranges_fails():
+    with pytest.raises(ValueError):
+        expand_port_ranges({"1..2": "11..13"})
+
+
 def test_port_connection_methods_send(send_connection: PortConnection):
     c = send_connection
     assert c.get_local_connection() == (c.source, c.local_bridge)
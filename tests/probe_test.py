@@ -0,0 +1,72 @@
+from ipaddress import IPv4Address
+
+import anyio
+import pytest
+
+from jackson.probe import (
+    build_network_report,
+    choose_queue_length,
+    predict_underrun_rate,
+    probe_network,
+    serve_echo,
+)
+
+PERIOD = 256 / 48000
+
+
+def test_predict_underrun_rate():
+    delays = [0, PERIOD * 1.5, PERIOD * 3.5, PERIOD * 10]
+    assert predict_underrun_rate(delays, PERIOD, queue=2) == 0.5
+    assert predict_underrun_rate(delays, PERIOD, queue=4) == 0.25
+    assert predict_underrun_rate(delays, PERIOD, queue=10) == 0
+
+
+def test_predict_underrun_rate_no_delays():
+    assert predict_underrun_rate([], PERIOD, queue=2) == 0
+
+
+def test_choose_queue_length():
+    delays = [0] * 99 + [PERIOD * 5.5]
+    assert choose_queue_length(delays, PERIOD, target=0.01) == 2
+    assert choose_queue_length(delays, PERIOD, target=0.001) == 6
+
+
+def test_choose_queue_length_clamps():
+    delays = [PERIOD * 1000]
+    assert choose_queue_length(delays, PERIOD, target=0, max_length=16) == 16
+
+
+def test_build_network_report():
+    rtts = [0.010, 0.012, None, 0.010 + PERIOD * 8.5]
+    report = build_network_report(rtts, period=PERIOD, target=0.001)
+    assert report
+    assert report.rtt_ms == pytest.approx(12)
+    assert report.loss == 0.25
+    assert report.queue_length == 5
+    assert report.predicted_underrun_rate == 0.25
+
+
+def test_build_network_report_all_lost():
+    assert build_network_report([None, None], period=PERIOD, target=0.001) is None
+
+
+@pytest.mark.anyio
+async def test_probe_network_loopback():
+    port = 14465
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(serve_echo, port)
+        await anyio.sleep(0.1)
+
+        report = await probe_network(
+            IPv4Address("127.0.0.1"),
+            port,
+            period=PERIOD,
+            target_underrun_rate=0.001,
+            count=20,
+            interval=0.001,
+        )
+        tg.cancel_scope.cancel()
+
+    assert report
+    assert report.loss == 0
+    assert report.queue_length >= 2
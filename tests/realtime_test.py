@@ -0,0 +1,122 @@
+import logging
+import os
+import subprocess
+import sys
+import time
+from collections.abc import Generator
+
+import pytest
+
+from jackson.realtime import (
+    RealtimePolicy,
+    Scheduling,
+    apply_policy,
+    get_scheduling,
+    get_thread_ids,
+    matches,
+)
+
+pytestmark = pytest.mark.skipif(sys.platform != "linux", reason="Linux only")
+log = logging.getLogger(__name__)
+# Threads are pinned to one CPU already otherwise, there's nothing to apply
+multiple_cpus = pytest.mark.skipif(
+    len(os.sched_getaffinity(0)) < 2, reason="Needs several CPUs"
+)
+
+
+@pytest.fixture
+def child() -> Generator[subprocess.Popen[bytes], None, None]:
+    process = subprocess.Popen(["sleep", "30"])
+    yield process
+    process.kill()
+    process.wait()
+
+
+@pytest.fixture
+def threaded_child() -> Generator[subprocess.Popen[bytes], None, None]:
+    code = "import threading, time; threading.Thread(target=time.sleep, args=(30,)).start()"
+    process = subprocess.Popen([sys.executable, "-c", code])
+    while len(get_thread_ids(process.pid)) < 2:
+        time.sleep(0.01)
+    yield process
+    process.kill()
+    process.wait()
+
+
+@multiple_cpus
+def test_apply_policy_pins_cpus(
+    child: subprocess.Popen[bytes], caplog: pytest.LogCaptureFixture
+):
+    cpu = min(os.sched_getaffinity(0))
+    policy = RealtimePolicy(cpus=frozenset({cpu}))
+
+    with caplog.at_level(logging.INFO):
+        apply_policy(child.pid, policy, log)
+
+    assert get_scheduling(child.pid).cpus == {cpu}
+    assert f"Process {child.pid} runs with SCHED_OTHER priority 0, CPUs {cpu}" in (
+        caplog.text
+    )
+
+
+@multiple_cpus
+def test_apply_policy_sets_every_thread_once(
+    threaded_child: subprocess.Popen[bytes], caplog: pytest.LogCaptureFixture
+):
+    cpu = min(os.sched_getaffinity(0))
+    policy = RealtimePolicy(cpus=frozenset({cpu}))
+
+    with caplog.at_level(logging.INFO):
+        assert apply_policy(threaded_child.pid, policy, log)
+        assert "(2 threads set)" in caplog.text
+
+        caplog.clear()
+        assert apply_policy(threaded_child.pid, policy, log)
+        assert not caplog.text  # Nothing left to change
+
+    for tid in get_thread_ids(threaded_child.pid):
+        assert get_scheduling(tid).cpus == {cpu}
+
+
+def test_apply_policy_checks_each_thread(
+    threaded_child: subprocess.Popen[bytes],
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    def ignore(*args: object) -> None:
+        pass
+
+    monkeypatch.setattr(os, "sched_setaffinity", ignore)
+    cpus = frozenset({max(os.sched_getaffinity(0)) + 1})
+    apply_policy(threaded_child.pid, RealtimePolicy(cpus=cpus), log)
+
+    assert caplog.text.count("thread ") == 2
+
+
+def test_apply_policy_warns_when_not_permitted(
+    child: subprocess.Popen[bytes],
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    def deny(*args: object) -> None:
+        raise PermissionError(1, "Operation not permitted")
+
+    monkeypatch.setattr(os, "sched_setscheduler", deny)
+    assert not apply_policy(child.pid, RealtimePolicy(priority=70), log)
+
+    assert "Failed to apply realtime policy" in caplog.text
+
+
+@pytest.mark.parametrize(
+    ("policy", "expected"),
+    [
+        (RealtimePolicy(), True),
+        (RealtimePolicy(priority=70), True),
+        (RealtimePolicy(priority=80), False),
+        (RealtimePolicy(cpus=frozenset({2, 3})), True),
+        (RealtimePolicy(cpus=frozenset({2})), False),
+    ],
+)
+def test_matches(policy: RealtimePolicy, expected: bool):
+    scheduling = Scheduling(policy="SCHED_FIFO", priority=70, cpus=frozenset({2, 3}))
+    assert matches(scheduling, policy) is expected
@@ -0,0 +1,106 @@
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, cast
+
+import jack
+import numpy as np
+
+from jackson.recorder import WAV_HEADER_SIZE, BlockRing, Recorder, WavTrack
+
+
+def test_block_ring_overrun():
+    ring = BlockRing(slots=2, channels=1, blocksize=4)
+
+    for _ in range(3):
+        if (slot := ring.next_slot()) is not None:
+            slot.fill(1)
+            ring.commit()
+
+    assert ring.written == 2
+    assert ring.overruns == 1
+
+
+def test_block_ring_pending_stops_at_wrap():
+    ring = BlockRing(slots=3, channels=1, blocksize=4)
+    ring.written, ring.read = 4, 2
+
+    assert len(ring.pending()) == 1
+    ring.consume(1)
+    assert len(ring.pending()) == 1
+
+
+def test_wav_track(tmp_path: Path):
+    path = tmp_path / "track.wav"
+    track = WavTrack(path=path, rate=48000)
+    samples = np.arange(8, dtype=np.float32)
+    track.write(samples[:4])
+    track.write(samples[4:])
+    track.close()
+
+    content = path.read_bytes()
+    assert len(content) == WAV_HEADER_SIZE + 8 * 4
+    assert content[:4] == b"RIFF"
+    assert content[38:42] == b"fact"
+    assert int.from_bytes(content[46:50], "little") == 8
+    assert content[50:54] == b"data"
+    assert int.from_bytes(content[54:58], "little") == 8 * 4
+    assert np.array_equal(
+        np.frombuffer(content[WAV_HEADER_SIZE:], dtype=np.float32), samples
+    )
+
+
+class FakePort:
+    def __init__(self, client: "FakeClient") -> None:
+        self.client = client
+
+    def get_array(self) -> Any:
+        return np.ones(self.client.blocksize, dtype=np.float32)
+
+
+class FakePorts:
+    def __init__(self, client: "FakeClient") -> None:
+        self.client = client
+
+    def register(self, name: str) -> FakePort:
+        return FakePort(self.client)
+
+
+class FakeClient:
+    samplerate = 48000
+
+    def __init__(self, blocksize: int) -> None:
+        self.blocksize = blocksize
+        self.inports = FakePorts(self)
+        self.on_blocksize: Callable[[int], None] | None = None
+
+    def set_blocksize_callback(self, callback: Callable[[int], None]) -> None:
+        self.on_blocksize = callback
+
+    def set_process_callback(self, callback: Callable[[int], None]) -> None:
+        pass
+
+    def set_blocksize(self, blocksize: int) -> None:
+        assert self.on_blocksize
+        self.blocksize = blocksize
+        self.on_blocksize(blocksize)
+
+
+def test_recorder_follows_buffer_size(tmp_path: Path):
+    client = FakeClient(blocksize=256)
+    recorder = Recorder(
+        client=cast(jack.Client, client),
+        directory=tmp_path,
+        channels=1,
+        buffer_seconds=0.1,
+    )
+    recorder.taps.taps[0] = "Lev:receive_1"
+
+    recorder._process(256)
+    client.set_blocksize(64)
+    recorder._process(64)
+
+    assert recorder._write_pending() == 1
+    assert recorder._write_pending() == 1
+    assert recorder.tracks[0].frames == 256 + 64
+    assert recorder.status().frames == 256 + 64
+    recorder.tracks[0].close()
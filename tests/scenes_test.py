@@ -0,0 +1,36 @@
+import pytest
+
+from jackson.port_connection import PortRange
+from jackson.scenes import diff_edges, expand_scene
+
+
+def test_expand_scene():
+    spec = [
+        (PortRange.parse("system:capture_1..2"), PortRange.parse("Lev:send_1..2")),
+        (PortRange.parse("system:capture_1"), PortRange.parse("Rita:send_1")),
+    ]
+    assert expand_scene(spec) == {
+        ("system:capture_1", "Lev:send_1"),
+        ("system:capture_2", "Lev:send_2"),
+        ("system:capture_1", "Rita:send_1"),
+    }
+
+
+def test_expand_scene_validates_length():
+    spec = [(PortRange.parse("system:capture_1..2"), PortRange.parse("Lev:send_1"))]
+    with pytest.raises(ValueError):
+        expand_scene(spec)
+
+
+def test_diff_edges():
+    current = {("a:send_1", "b:receive_1"), ("a:send_2", "b:receive_2")}
+    target = {("a:send_2", "b:receive_2"), ("a:send_3", "b:receive_1")}
+
+    to_connect, to_disconnect = diff_edges(current, target)
+    assert to_connect == [("a:send_3", "b:receive_1")]
+    assert to_disconnect == [("a:send_1", "b:receive_1")]
+
+
+def test_diff_edges_same_scene():
+    edges = {("a:send_1", "b:receive_1")}
+    assert diff_edges(edges, edges) == ([], [])
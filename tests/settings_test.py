@@ -1,13 +1,21 @@
 from ipaddress import IPv4Address
 
+import pytest
+from pydantic import ValidationError
+
 from jackson.port_connection import build_connection_map
+from jackson.realtime import RealtimePolicy
 from jackson.settings import (
     ClientSettings,
+    ServerSettings,
     _ClientAudio,
     _ClientPorts,
     _ClientServer,
     _FileClientSettings,
+    _Realtime,
+    _ServerServer,
 )
+from jackson.shards import MAX_SHARDS
 
 
 def test_client_server_settings_api_url():
@@ -28,7 +36,104 @@ def test_load_client_settings():
     settings = ClientSettings.load(f.dict())
     assert settings.name == f.name
     assert settings.audio == f.audio
-    assert settings.server == f.server
+    assert settings.servers == [f.server]
     assert settings.connection_map == build_connection_map(
         client_name=settings.name, receive=f.ports.receive, send=f.ports.send
     )
+
+
+def test_client_ports_accept_ranges():
+    ports = _ClientPorts(receive={"1..3": "11..13"}, send={4: 14})  # type: ignore
+    assert ports.receive == {1: 11, 2: 12, 3: 13}
+    assert ports.send == {4: 14}
+
+
+def get_server_settings(scenes: dict[str, list[list[str]]]) -> ServerSettings:
+    return ServerSettings.parse_obj(
+        {
+            "audio": {
+                "driver": "dummy",
+                "device": None,
+                "sample_rate": 48000,
+                "buffer_size": 256,
+            },
+            "server": {"jacktrip_port": 4464, "api_port": 8000},
+            "scenes": scenes,
+        }
+    )
+
+
+def test_server_scenes():
+    settings = get_server_settings(
+        {"verse": [["system:capture_1..2", "Lev:send_1..2"]]}
+    )
+    source, destination = settings.scenes["verse"][0]
+    assert str(source) == "system:capture_1..2"
+    assert str(destination) == "Lev:send_1..2"
+
+
+def test_server_scenes_validate_length():
+    with pytest.raises(ValidationError):
+        get_server_settings({"verse": [["system:capture_1..2", "Lev:send_1"]]})
+
+
+def test_realtime_jacktrip_policy():
+    assert _Realtime().jacktrip_policy is None
+    assert _Realtime(jacktrip_cpus=[2, 3]).jacktrip_policy == RealtimePolicy(
+        cpus=frozenset({2, 3})
+    )
+    with pytest.raises(ValidationError):
+        _Realtime(jacktrip_priority=100)
+
+
+def test_client_settings_take_server_candidates():
+    servers = [
+        _ClientServer(jacktrip_port=0, api_port=0, host=IPv4Address(f"10.0.0.{idx}"))
+        for idx in (1, 2)
+    ]
+    f = _FileClientSettings(
+        name="Lev",
+        audio=_ClientAudio(driver="dummy", device=None),
+        servers=servers,
+        ports=_ClientPorts(receive={1: 1}, send={}),
+    )
+    assert ClientSettings.load(f.dict()).servers == servers
+
+
+@pytest.mark.parametrize("both", [True, False])
+def test_client_settings_need_either_server_or_servers(both: bool):
+    server = _ClientServer(jacktrip_port=0, api_port=0, host=IPv4Address("10.0.0.1"))
+    with pytest.raises(ValidationError, match="Either server or servers"):
+        _FileClientSettings(
+            name="Lev",
+            audio=_ClientAudio(driver="dummy", device=None),
+            server=server if both else None,
+            servers=[server] if both else [],
+            ports=_ClientPorts(receive={1: 1}, send={}),
+        )
+
+
+def test_realtime_shard_policy():
+    realtime = _Realtime(jacktrip_priority=80, jacktrip_cpus=[2, 3])
+    assert realtime.get_shard_policy(0, 1) == realtime.jacktrip_policy
+    assert realtime.get_shard_policy(2, 3) == RealtimePolicy(
+        priority=80, cpus=frozenset({2})
+    )
+    assert _Realtime().get_shard_policy(1, 2) is None
+
+
+def test_shards_are_limited_by_udp_ports():
+    _ServerServer(jacktrip_port=4464, api_port=8000, jacktrip_shards=MAX_SHARDS)
+    with pytest.raises(ValidationError):
+        _ServerServer(jacktrip_port=4464, api_port=8000, jacktrip_shards=MAX_SHARDS + 1)
+
+
+def test_audio_channels_must_be_positive():
+    assert _ClientAudio(driver="dummy", device=None, channels=16).channels == 16
+    with pytest.raises(ValidationError):
+        _ClientAudio(driver="dummy", device=None, channels=0)
+
+
+def test_audio_channels_only_for_dummy_driver():
+    with pytest.raises(ValidationError, match="only be set for dummy driver"):
+        _ClientAudio(driver="coreaudio", device="BlackHole16ch_UID", channels=16)
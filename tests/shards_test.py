@@ -0,0 +1,79 @@
+import os
+import time
+
+from jackson.jacktrip import JackTripBackend
+from jackson.shards import (
+    MAX_SHARDS,
+    MIN_UDP_PORTS_PER_SHARD,
+    UDP_PORT_LIMIT,
+    ShardPool,
+    get_shard_ports,
+    get_udp_base_port,
+    read_cpu_seconds,
+)
+
+
+def test_assigns_least_loaded_shard():
+    pool = ShardPool(get_shard_ports(4464, 3))
+
+    assert pool.assign("Lev", channels=8) == 4464
+    assert pool.assign("Anton", channels=2) == 4465
+    assert pool.assign("Masha", channels=2) == 4466
+    assert pool.assign("Ilya", channels=2) == 4465
+
+
+def test_client_keeps_its_shard():
+    pool = ShardPool([4464, 4465])
+    assert pool.assign("Lev", channels=2) == 4464
+    assert pool.assign("Lev", channels=4) == 4464
+    assert pool.usage().shards[0].channels == 4
+
+
+def test_pending_assignment_expires():
+    pool = ShardPool([4464, 4465], pending_ttl=0.01)
+    pool.assign("Lev", channels=2)
+    pool.activate("Lev")
+    pool.assign("Anton", channels=2)
+
+    time.sleep(0.02)
+    usage = pool.usage()
+    assert [s.clients for s in usage.shards] == [["Lev"], []]
+
+
+def test_release():
+    pool = ShardPool([4464, 4465])
+    pool.assign("Lev", channels=2)
+    pool.activate("Lev")
+    pool.release("Lev")
+    assert pool.assign("Anton", channels=2) == 4464
+
+
+def test_usage():
+    pool = ShardPool([4464, 4465])
+    pool.assign("Lev", channels=2)
+    pool.record_cpu(1, 12.5)
+
+    first, second = pool.usage().shards
+    assert (first.port, first.clients, first.channels) == (4464, ["Lev"], 2)
+    assert first.cpu_percent is None
+    assert second.cpu_percent == 12.5
+
+
+def test_read_cpu_seconds():
+    assert (read_cpu_seconds(os.getpid()) or 0) >= 0
+    assert read_cpu_seconds(-1) is None
+
+
+def test_shards_get_own_udp_ports():
+    cmd = JackTripBackend().build_server_cmd(
+        port=4465, udp_base_port=get_udp_base_port(1, shards=2)
+    )
+    assert cmd[-2:] == ["--udpbaseport", "63269"]
+    assert "--udpbaseport" not in JackTripBackend().build_server_cmd(port=4464)
+
+
+def test_udp_ports_of_most_shards_fit_port_range():
+    bases = [get_udp_base_port(idx, MAX_SHARDS) for idx in range(MAX_SHARDS)]
+    ends = bases[1:] + [UDP_PORT_LIMIT + 1]
+    assert all(end - base >= MIN_UDP_PORTS_PER_SHARD for base, end in zip(bases, ends))
+    assert bases[-1] + MIN_UDP_PORTS_PER_SHARD - 1 <= UDP_PORT_LIMIT
@@ -0,0 +1,38 @@
+import os
+import socket
+from pathlib import Path
+
+import pytest
+
+from jackson.systemd import get_watchdog_interval, notify
+
+
+def test_notify(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    path = str(tmp_path / "notify.sock")
+    monkeypatch.setenv("NOTIFY_SOCKET", path)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.bind(path)
+        assert notify("READY=1", "STATUS=Serving")
+        assert sock.recv(1024) == b"READY=1\nSTATUS=Serving"
+
+
+def test_notify_outside_systemd(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv("NOTIFY_SOCKET", raising=False)
+    assert not notify("READY=1")
+
+
+def test_get_watchdog_interval(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv("WATCHDOG_USEC", raising=False)
+    assert get_watchdog_interval() is None
+
+    monkeypatch.setenv("WATCHDOG_USEC", "10000000")
+    monkeypatch.setenv("WATCHDOG_PID", str(os.getpid()))
+    assert get_watchdog_interval() == 5
+
+    monkeypatch.setenv("WATCHDOG_PID", str(os.getpid() + 1))
+    assert get_watchdog_interval() is None
+
+    monkeypatch.setenv("WATCHDOG_PID", str(os.getppid()))
+    assert get_watchdog_interval() is None
+    assert get_watchdog_interval(from_child=True) == 5
@@ -0,0 +1,43 @@
+import json
+import time
+from pathlib import Path
+
+from jackson.tracing import SamplingProfiler, Tracer
+
+
+def test_tracer_disabled_is_noop():
+    tracer = Tracer()
+    with tracer.span("noop"):
+        pass
+    assert tracer.file is None
+
+
+def test_tracer_writes_complete_events(tmp_path: Path):
+    path = tmp_path / "trace.json"
+    tracer = Tracer()
+    tracer.open(str(path))
+
+    with tracer.span("outer", client_name="Lev"):
+        with tracer.span("inner"):
+            pass
+    tracer.close()
+
+    # Unterminated JSON array is valid in Chrome Trace Event Format
+    content = path.read_text().rstrip().rstrip(",") + "]"
+    inner, outer = json.loads(content)
+    assert (inner["name"], outer["name"]) == ("inner", "outer")
+    assert outer["ph"] == "X"
+    assert outer["args"] == {"client_name": "Lev"}
+    assert outer["ts"] <= inner["ts"]
+    assert outer["dur"] >= inner["dur"]
+
+
+def test_sampling_profiler(tmp_path: Path):
+    path = tmp_path / "profile.folded"
+    profiler = SamplingProfiler(str(path), interval=0.001)
+    profiler.start()
+    while not profiler.samples:
+        time.sleep(0.001)
+    profiler.stop()
+
+    assert "test_sampling_profiler" in path.read_text()
@@ -0,0 +1,97 @@
+import logging
+import sys
+from ipaddress import IPv4Address
+
+import anyio
+import pytest
+
+from jackson.jacktrip import JackTripBackend
+from jackson.port_connection import build_connection_map
+from jackson.transport import StubBackend, get_client, get_server, get_transport
+
+
+def test_get_transport():
+    assert isinstance(get_transport("jacktrip"), JackTripBackend)
+    assert get_transport("stub").name == "stub"
+
+
+def build_client_cmd(backend: JackTripBackend, exit_on_timeout: bool) -> list[str]:
+    return backend.build_client_cmd(
+        server_host=IPv4Address("127.0.0.1"),
+        server_port=4464,
+        receive_channels=2,
+        send_channels=0,
+        remote_name="Lev",
+        queue_length=4,
+        exit_on_timeout=exit_on_timeout,
+    )
+
+
+def test_jacktrip_client_cmd():
+    cmd = build_client_cmd(JackTripBackend(), exit_on_timeout=True)
+    assert cmd[0] == "jacktrip"
+    assert cmd[cmd.index("--sendchannels") + 1] == "1"
+    assert cmd[cmd.index("--clientname") + 1] == "JackTrip"
+    assert cmd[-3:] == ["--queue", "4", "--timeout"]
+
+
+def test_stub_client_cmd_names_bridge():
+    backend = StubBackend()
+    cmd = build_client_cmd(backend, exit_on_timeout=False)
+    assert cmd[:3] == [sys.executable, "-m", "jackson.stub_transport"]
+    assert cmd[cmd.index("--clientname") + 1] == backend.bridge_client_name
+
+    map = build_connection_map(
+        client_name="Lev",
+        receive={1: 1},
+        send={2: 2},
+        local_bridge_client_name=backend.bridge_client_name,
+    )
+    assert {p.client for p in map} == {backend.bridge_client_name}
+
+
+def test_is_underrun():
+    backend = JackTripBackend()
+    assert backend.is_underrun("UDP waiting too long (more than 30ms)")
+    assert not backend.is_underrun("Received Connection from Peer!")
+
+
+@pytest.mark.anyio
+async def test_stub_server_starts_without_jacktrip():
+    lines: list[str] = []
+    ready = anyio.Event()
+
+    def on_output(line: str) -> None:
+        lines.append(line)
+        if "Waiting for client connections" in line:
+            ready.set()
+
+    process = get_server(
+        StubBackend(), jack_server_name="default", port=0, log=logging.getLogger()
+    )
+    process.on_output = on_output
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(process.start)
+        with anyio.fail_after(5):
+            await ready.wait()
+        await process.stop()
+        tg.cancel_scope.cancel()
+
+    assert process.cmd[0] == sys.executable
+
+
+def test_get_client_sets_jack_server():
+    process = get_client(
+        JackTripBackend(),
+        jack_server_name="JacksonClient",
+        server_host=IPv4Address("127.0.0.1"),
+        server_port=4464,
+        receive_channels=1,
+        send_channels=1,
+        remote_name="Lev",
+        queue_length=None,
+        log=logging.getLogger(),
+    )
+    assert process.env == {"JACK_DEFAULT_SERVER": "JacksonClient"}
+    assert "--queue" not in process.cmd